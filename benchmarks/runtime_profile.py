@@ -0,0 +1,161 @@
+"""Compare the default and performance runtime profiles.
+
+Measures handle_dm_message latency (with REST calls replaced by a yield to the loop, so only
+the bot's own work and loop overhead are timed) and gateway event decode throughput with
+stdlib json against discord.py's decoder, which is orjson in both profiles when installed.
+Each profile runs in its own process because the event loop policy is global.
+
+Run from the repository root with the bot's .env in place: python -m benchmarks.runtime_profile
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+DECODE_EVENTS = 50000
+DM_CALLS = 5000
+DM_CONCURRENCY = 100
+
+# A MESSAGE_CREATE frame roughly the size of a real one
+EVENT = json.dumps({
+    "op": 0, "s": 42, "t": "MESSAGE_CREATE",
+    "d": {
+        "id": "1180000000000000000", "channel_id": "1180000000000000001", "guild_id": None,
+        "author": {"id": "1180000000000000002", "username": "someone", "global_name": "Someone",
+                   "avatar": "a" * 32, "discriminator": "0", "public_flags": 0},
+        "content": "Hello, I need help with my account " * 4,
+        "timestamp": "2024-01-01T00:00:00.000000+00:00", "edited_timestamp": None,
+        "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+        "attachments": [], "embeds": [], "pinned": False, "type": 0, "flags": 0,
+        "nonce": "1180000000000000003",
+    },
+})
+
+class FakeAvatar:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+class FakeUser:
+    display_avatar = FakeAvatar()
+
+    def __init__(self, user_id):
+        self.id = user_id
+
+    def __str__(self):
+        return f"user{self.id}"
+
+class FakeMessage:
+    _next_id = 1
+
+    def __init__(self, author):
+        self.id = FakeMessage._next_id
+        FakeMessage._next_id += 1
+        self.author = author
+        self.content = "Hello, I need help with my account"
+        self.created_at = datetime.now(timezone.utc)
+        self.attachments = []
+
+class FakeSent:
+    def __init__(self, message_id):
+        self.id = message_id
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.category_id = None
+
+    async def send(self, *args, **kwargs):
+        await asyncio.sleep(0)  # stands in for the REST round-trip
+        return FakeSent(self.id)
+
+class FakeGuild:
+    def __init__(self, channels):
+        self.channels = channels
+
+    def get_channel_or_thread(self, channel_id):
+        return self.channels.get(channel_id)
+
+def bench_decode():
+    from discord.utils import _from_json
+    payload = EVENT.encode()
+    results = {}
+    for name, decode in (("stdlib", json.loads), ("discord", _from_json)):
+        start = time.perf_counter()
+        for _ in range(DECODE_EVENTS):
+            decode(payload)
+        results[name] = DECODE_EVENTS / (time.perf_counter() - start)
+    return results
+
+async def bench_dm(bot):
+    users = [FakeUser(10**17 + i) for i in range(DM_CONCURRENCY)]
+    channels = {}
+    for user in users:
+        channel = FakeChannel(10**18 + user.id)
+        channels[channel.id] = channel
+        bot.tickets.open(user.id, channel)
+    guild = FakeGuild(channels)
+    bot.get_guild = lambda guild_id: guild
+
+    latencies = []
+
+    async def one(user):
+        for _ in range(DM_CALLS // DM_CONCURRENCY):
+            start = time.perf_counter()
+            await bot.handle_dm_message(FakeMessage(user))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(user) for user in users))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "p50_us": statistics.median(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+        "per_second": len(latencies) / elapsed,
+    }
+
+def child(profile):
+    os.environ["RUNTIME_PROFILE"] = profile
+    os.environ["STORE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ.setdefault("GUILD_ID", "1")
+
+    from utils.runtime import apply_profile
+    features = apply_profile(profile)
+    from main import ModmailBot
+
+    async def run():
+        bot = ModmailBot()
+        try:
+            return await bench_dm(bot)
+        finally:
+            bot.store.close()
+
+    result = {"features": features, "decode": bench_decode(), "dm": asyncio.run(run())}
+    print(json.dumps(result))
+
+def main():
+    rows = {}
+    for profile in ("default", "performance"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.runtime_profile", "--child", profile],
+            check=True, capture_output=True, text=True
+        ).stdout
+        rows[profile] = json.loads(output.strip().splitlines()[-1])
+
+    for profile, result in rows.items():
+        features = result["features"]
+        print(f"{profile} (uvloop={features['uvloop']}, orjson={features['orjson']})")
+        print(f"  event decode: stdlib {result['decode']['stdlib']:,.0f}/s, "
+              f"discord.py {result['decode']['discord']:,.0f}/s")
+        print(f"  handle_dm_message: p50 {result['dm']['p50_us']:.0f}us, p99 {result['dm']['p99_us']:.0f}us, "
+              f"{result['dm']['per_second']:,.0f}/s at {DM_CONCURRENCY} concurrent users")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,48 @@
+"""Memory per open ticket in the TicketRegistry, compared with the old active/claimed dicts.
+
+Run from the repository root with the bot's .env in place: python -m benchmarks.ticket_registry [tickets]
+"""
+import sys
+import time
+import tracemalloc
+
+from utils.registry import TicketRecord, TicketRegistry
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return kept, used
+
+def build_registry(count):
+    registry = TicketRegistry()
+    now = time.time()
+    for i in range(count):
+        registry.add(TicketRecord(10**17 + i, 10**18 + i, 10**17 + i % 40 if i % 2 else None, now + i, 10**18 + i))
+    return registry
+
+def build_dicts(count):
+    active_tickets = {}
+    claimed_tickets = {}
+    for i in range(count):
+        active_tickets[10**17 + i] = 10**18 + i
+        if i % 2:
+            claimed_tickets[10**18 + i] = 10**17 + i % 40
+    return active_tickets, claimed_tickets
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    registry, registry_bytes = measure(lambda: build_registry(count))
+    _, dict_bytes = measure(lambda: build_dicts(count))
+
+    print(f"{count} open tickets, half of them claimed")
+    print(f"  TicketRegistry: {registry_bytes / count:7.1f} bytes/ticket ({registry_bytes / 1024:.0f} KiB)")
+    print(f"  old dicts:      {dict_bytes / count:7.1f} bytes/ticket ({dict_bytes / 1024:.0f} KiB) - owner/claimer only")
+    print(f"  claimed={registry.claimed_count} unclaimed={registry.unclaimed_count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import discord
+from discord.ext import commands
+import re
+from typing import Optional
+from utils.helpers import is_staff, get_user_from_channel
+from config import MODMAIL_EMBED_COLOR, ERROR_EMBED_COLOR
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+def parse_duration(text):
+    """Parse durations like 30m, 12h or 7d into seconds, or None if it isn't one"""
+    match = re.fullmatch(r"(\d+)([smhdw])", text.lower()) if text else None
+    if not match:
+        return None
+    return int(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+class Block(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command(name="block")
+    @is_staff()
+    async def block(self, ctx, user: Optional[discord.User] = None, duration: str = None, *, reason: str = None):
+        """Stop a user from opening tickets, optionally for a duration (e.g. 7d)"""
+        try:
+            # Default to the owner of the current ticket
+            if user is None:
+                user = await get_user_from_channel(self.bot, ctx.channel) if ctx.channel.name.startswith("ticket-") else None
+            if user is None:
+                error_embed = discord.Embed(
+                    title="❌ Invalid Usage",
+                    description="Please provide a user, or run this in their ticket.\n\n**Usage:** `?block [@user] [duration] [reason]`",
+                    color=ERROR_EMBED_COLOR
+                )
+                await ctx.send(embed=error_embed)
+                return
+
+            # The second word is only a duration if it looks like one
+            seconds = parse_duration(duration)
+            if duration and seconds is None:
+                reason = f"{duration} {reason}" if reason else duration
+            reason = reason or "No reason provided"
+
+            expires = self.bot.blocklist.block(user.id, seconds, reason, ctx.author.id)
+
+            block_embed = discord.Embed(
+                title="⛔ User Blocked",
+                description=f"{user.mention} can no longer open modmail tickets",
+                color=ERROR_EMBED_COLOR,
+                timestamp=discord.utils.utcnow()
+            )
+            block_embed.add_field(name="User", value=f"{user} ({user.id})", inline=True)
+            block_embed.add_field(name="Expires", value=f"<t:{int(expires)}:R>" if expires else "Never", inline=True)
+            block_embed.add_field(name="Reason", value=reason, inline=False)
+            block_embed.add_field(name="Blocked by", value=ctx.author.mention, inline=True)
+
+            await ctx.send(embed=block_embed)
+
+        except Exception as e:
+            error_embed = discord.Embed(
+                title="❌ Error",
+                description=f"An error occurred while blocking the user: {str(e)}",
+                color=ERROR_EMBED_COLOR
+            )
+            await ctx.send(embed=error_embed)
+
+    @commands.command(name="unblock")
+    @is_staff()
+    async def unblock(self, ctx, user: Optional[discord.User] = None):
+        """Allow a blocked user to open tickets again"""
+        try:
+            if user is None:
+                user = await get_user_from_channel(self.bot, ctx.channel) if ctx.channel.name.startswith("ticket-") else None
+            if user is None:
+                error_embed = discord.Embed(
+                    title="❌ Invalid Usage",
+                    description="Please provide a user.\n\n**Usage:** `?unblock @user`",
+                    color=ERROR_EMBED_COLOR
+                )
+                await ctx.send(embed=error_embed)
+                return
+
+            if not self.bot.blocklist.unblock(user.id):
+                error_embed = discord.Embed(
+                    title="❌ Not Blocked",
+                    description=f"{user.mention} is not blocked.",
+                    color=ERROR_EMBED_COLOR
+                )
+                await ctx.send(embed=error_embed)
+                return
+
+            unblock_embed = discord.Embed(
+                title="✅ User Unblocked",
+                description=f"{user.mention} can open modmail tickets again",
+                color=MODMAIL_EMBED_COLOR,
+                timestamp=discord.utils.utcnow()
+            )
+            unblock_embed.add_field(name="User", value=f"{user} ({user.id})", inline=True)
+            unblock_embed.add_field(name="Unblocked by", value=ctx.author.mention, inline=True)
+
+            await ctx.send(embed=unblock_embed)
+
+        except Exception as e:
+            error_embed = discord.Embed(
+                title="❌ Error",
+                description=f"An error occurred while unblocking the user: {str(e)}",
+                color=ERROR_EMBED_COLOR
+            )
+            await ctx.send(embed=error_embed)
+
+async def setup(bot):
+    await bot.add_cog(Block(bot))
@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 from utils.helpers import is_staff, is_ticket_channel, get_user_from_channel
+from utils.tickets import add_ticket_member
 from config import MODMAIL_EMBED_COLOR, ERROR_EMBED_COLOR
 
 class Claim(commands.Cog):
@@ -26,8 +27,9 @@ class Claim(commands.Cog):
                 return
             
             # Check if ticket is already claimed
-            if hasattr(self.bot, 'claimed_tickets') and channel.id in self.bot.claimed_tickets:
-                claimer_id = self.bot.claimed_tickets[channel.id]
+            record = self.bot.tickets.adopt(channel)
+            if record.claimer_id is not None:
+                claimer_id = record.claimer_id
                 claimer = ctx.guild.get_member(claimer_id)
                 claimer_name = claimer.mention if claimer else f"<@{claimer_id}>"
                 
@@ -40,10 +42,9 @@ class Claim(commands.Cog):
                 return
             
             # Claim the ticket
-            if not hasattr(self.bot, 'claimed_tickets'):
-                self.bot.claimed_tickets = {}
-            
-            self.bot.claimed_tickets[channel.id] = ctx.author.id
+            self.bot.tickets.claim(channel.id, ctx.author.id)
+            self.bot.assigner.claimed(channel.id, ctx.author.id)
+            await add_ticket_member(channel, ctx.author)
             
             # Create claim embed
             claim_embed = discord.Embed(
@@ -85,7 +86,8 @@ class Claim(commands.Cog):
                 return
             
             # Check if ticket is claimed
-            if not hasattr(self.bot, 'claimed_tickets') or channel.id not in self.bot.claimed_tickets:
+            record = self.bot.tickets.adopt(channel)
+            if record.claimer_id is None:
                 error_embed = discord.Embed(
                     title="❌ Not Claimed",
                     description="This ticket is not currently claimed.",
@@ -94,7 +96,7 @@ class Claim(commands.Cog):
                 await ctx.send(embed=error_embed)
                 return
             
-            claimer_id = self.bot.claimed_tickets[channel.id]
+            claimer_id = record.claimer_id
             
             # Check if the person unclaiming is the one who claimed it or has manage_channels permission
             if ctx.author.id != claimer_id and not ctx.author.guild_permissions.manage_channels:
@@ -113,7 +115,10 @@ class Claim(commands.Cog):
             claimer = ctx.guild.get_member(claimer_id)
             claimer_name = claimer.display_name if claimer else f"<@{claimer_id}>"
             
-            del self.bot.claimed_tickets[channel.id]
+            self.bot.tickets.unclaim(channel.id)
+            
+            # Back into the auto-assign queue at its original position
+            self.bot.assigner.unclaimed(channel.id, claimer_id, record.created)
             
             # Create unclaim embed
             unclaim_embed = discord.Embed(
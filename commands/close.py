@@ -1,8 +1,15 @@
 import discord
 from discord.ext import commands
 import asyncio
-from utils.helpers import is_staff, is_ticket_channel, get_user_from_channel, create_transcript, send_dm_safely
-from config import TRANSCRIPT_CHANNEL, MODMAIL_EMBED_COLOR, ERROR_EMBED_COLOR
+import time
+import logging
+from utils.helpers import is_staff, is_ticket_channel, get_user_from_channel, render_transcripts, deliver_dm
+from utils.transcripts import collect_records
+from utils.tickets import delete_ticket
+from utils import metrics
+from config import TRANSCRIPT_FORMATS, TRANSCRIPT_CHANNEL, MODMAIL_EMBED_COLOR, ERROR_EMBED_COLOR
+
+log = logging.getLogger(__name__)
 
 class Close(commands.Cog):
     def __init__(self, bot):
@@ -37,23 +44,48 @@ class Close(commands.Cog):
             
             await ctx.send(embed=embed)
             
-            # Create transcript
-            transcript_file = await create_transcript(channel)
+            # Record the close as a job so an interrupted close resumes after a restart
+            payload = {
+                "channel_id": channel.id,
+                "user_id": user.id,
+                "closer_id": ctx.author.id,
+                "reason": reason,
+                "stage": "transcript"
+            }
+            job_id = self.bot.store.add_job("close", payload)
             
-            # Send transcript to transcript channel
-            transcript_channel = self.bot.get_channel(TRANSCRIPT_CHANNEL)
-            if transcript_channel:
-                transcript_embed = discord.Embed(
-                    title="📄 Ticket Transcript",
-                    description=f"Transcript for ticket with {user} ({user.id})",
-                    color=MODMAIL_EMBED_COLOR
-                )
-                transcript_embed.add_field(name="Closed by", value=ctx.author.mention, inline=True)
-                transcript_embed.add_field(name="Reason", value=reason, inline=True)
-                transcript_embed.add_field(name="User", value=f"{user} ({user.id})", inline=False)
-                
-                await transcript_channel.send(embed=transcript_embed, file=transcript_file)
+            async with self.bot.work.track():
+                try:
+                    await self.run_close(job_id, payload, channel, user)
+                except Exception:
+                    # A close that failed outright is reported to staff, not retried on the next boot
+                    self.bot.store.finish_job(job_id)
+                    raise
             
+        except Exception as e:
+            error_embed = discord.Embed(
+                title="❌ Error",
+                description=f"An error occurred while closing the ticket: {str(e)}",
+                color=ERROR_EMBED_COLOR
+            )
+            await ctx.send(embed=error_embed)
+
+    async def run_close(self, job_id, payload, channel, user):
+        """Run the close steps, checkpointing each stage in the store"""
+        reason = payload["reason"]
+        
+        if payload["stage"] == "transcript":
+            # Copy the history into the job (the ticket cache has all of it for tickets opened since
+            # the last restart), rendering and upload happen after the ticket is gone
+            cached = self.bot.message_cache.history(channel.id)
+            if cached is not None:
+                metrics.incr("transcripts_from_cache")
+            payload["records"] = await collect_records(channel, cached)
+            payload["channel_name"] = channel.name
+            payload["stage"] = "notify"
+            self.bot.store.update_job(job_id, payload)
+        
+        if payload["stage"] == "notify":
             # Notify user
             user_embed = discord.Embed(
                 title="🔒 Ticket Closed",
@@ -67,29 +99,128 @@ class Close(commands.Cog):
                 inline=False
             )
             
-            dm_sent = await send_dm_safely(user, embed=user_embed)
-            if not dm_sent:
+            result = await deliver_dm(user, embed=user_embed)
+            if result == "transient":
+                self.bot.dm_queue.enqueue(user.id, f"close:{channel.id}", embed=user_embed)
+                await channel.send("⏳ Closing notification could not be delivered yet, it will be retried automatically")
+            elif result == "permanent":
                 await channel.send("⚠️ Could not send closing notification to user (DMs disabled)")
             
-            # Remove from active tickets and claimed tickets
-            if hasattr(self.bot, 'active_tickets') and user.id in self.bot.active_tickets:
-                del self.bot.active_tickets[user.id]
-            
-            if hasattr(self.bot, 'claimed_tickets') and channel.id in self.bot.claimed_tickets:
-                del self.bot.claimed_tickets[channel.id]
-            
-            # Delete channel after 5 seconds
+            payload["stage"] = "delete"
+            self.bot.store.update_job(job_id, payload)
+        
+        # Remove from the ticket registry and cache
+        record = self.bot.tickets.remove(channel.id)
+        self.bot.message_cache.drop(channel.id)
+        self.bot.assigner.closed(channel.id, record.claimer_id if record else None)
+        self.record_history(payload, record)
+        
+        # Delete channel (or archive thread) after 5 seconds
+        if isinstance(channel, discord.Thread):
+            await channel.send("This thread will be archived in 5 seconds...")
+        else:
             await channel.send("This channel will be deleted in 5 seconds...")
-            await asyncio.sleep(5)
-            await channel.delete()
+        await asyncio.sleep(5)
+        closer_user = self.bot.get_user(payload["closer_id"])
+        await delete_ticket(channel, reason=f"Ticket closed by {closer_user or payload['closer_id']}")
+        
+        payload["stage"] = "upload"
+        self.bot.store.update_job(job_id, payload)
+        self.start_upload(job_id, payload, user)
+
+    def start_upload(self, job_id, payload, user):
+        """Render and post the transcript in the background, the job stays open until it is posted"""
+        self.bot.work.begin()  # counted now, so a shutdown right after the close still waits for it
+        task = asyncio.create_task(self.upload_transcript(job_id, payload, user))
+        task.add_done_callback(lambda _: self.bot.work.end())
+        return task
+
+    async def upload_transcript(self, job_id, payload, user):
+        closer = f"<@{payload['closer_id']}>"
+        reason = payload["reason"]
+        try:
+            transcript_files = await render_transcripts(payload["channel_name"], TRANSCRIPT_FORMATS, payload["records"])
             
-        except Exception as e:
-            error_embed = discord.Embed(
-                title="❌ Error",
-                description=f"An error occurred while closing the ticket: {str(e)}",
-                color=ERROR_EMBED_COLOR
+            # Hand the transcript to the batcher, concurrent closes are uploaded together
+            transcript_embed = discord.Embed(
+                title="📄 Ticket Transcript",
+                description=f"Transcript for ticket with {user} ({user.id})",
+                color=MODMAIL_EMBED_COLOR
             )
-            await ctx.send(embed=error_embed)
+            transcript_embed.add_field(name="Closed by", value=closer, inline=True)
+            transcript_embed.add_field(name="Reason", value=reason, inline=True)
+            transcript_embed.add_field(name="User", value=f"{user} ({user.id})", inline=False)
+            
+            await self.bot.transcript_batcher.submit(
+                transcript_embed,
+                transcript_files,
+                summary=f"**{user}** ({user.id}) - closed by {closer}: {reason[:200]}"
+            )
+        except Exception as e:
+            # The ticket is already closed, so the failure goes to the transcript log channel
+            log.exception("Transcript for %s could not be posted: %s", payload["channel_id"], e, extra={"event": "transcript_failed"})
+            await self.report_transcript_failure(payload, user, e)
+        self.bot.store.finish_job(job_id)
+
+    async def report_transcript_failure(self, payload, user, error):
+        channel = self.bot.get_channel(TRANSCRIPT_CHANNEL)
+        if not channel:
+            return
+        embed = discord.Embed(
+            title="❌ Transcript Failed",
+            description=f"The transcript for the ticket with {user} ({user.id}) could not be posted: {str(error)[:500]}",
+            color=ERROR_EMBED_COLOR
+        )
+        embed.add_field(name="Closed by", value=f"<@{payload['closer_id']}>", inline=True)
+        embed.add_field(name="Reason", value=payload["reason"][:1024], inline=True)
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException as e:
+            log.warning("Could not report transcript failure: %s", e, extra={"event": "transcript_failure_report_failed"})
+
+    def record_history(self, payload, record):
+        """Add the closed ticket to the owner's history card"""
+        if record is None:
+            return  # already recorded before a restart
+        self.bot.store.record_close(
+            payload["user_id"], payload["channel_id"], record.created, time.time(),
+            payload["reason"], payload["closer_id"]
+        )
+
+    async def resume(self, job_id, payload):
+        """Finish a close that was interrupted by a restart"""
+        if payload["stage"] == "upload":
+            # Ticket already gone, only the transcript is left
+            user = self.bot.get_user(payload["user_id"]) or await self.bot.fetch_user(payload["user_id"])
+            self.start_upload(job_id, payload, user)
+            return
+        
+        channel = self.bot.get_channel(payload["channel_id"])
+        if not channel:
+            try:
+                channel = await self.bot.fetch_channel(payload["channel_id"])
+            except discord.NotFound:
+                # Channel is already gone, only the in-memory state is left to clean up
+                record = self.bot.tickets.remove(payload["channel_id"])
+                self.bot.assigner.closed(payload["channel_id"], record.claimer_id if record else None)
+                self.record_history(payload, record)
+                self.bot.store.finish_job(job_id)
+                return
+        
+        user = self.bot.get_user(payload["user_id"]) or await self.bot.fetch_user(payload["user_id"])
+        async with self.bot.work.track():
+            try:
+                await self.run_close(job_id, payload, channel, user)
+            except Exception as e:
+                # Same as a failed ?close: tell staff in the ticket, which is still there, instead of retrying forever
+                self.bot.store.finish_job(job_id)
+                error_embed = discord.Embed(
+                    title="❌ Error",
+                    description=f"An error occurred while finishing the close of this ticket: {str(e)}",
+                    color=ERROR_EMBED_COLOR
+                )
+                await channel.send(embed=error_embed)
+                raise
 
 async def setup(bot):
     await bot.add_cog(Close(bot))
\ No newline at end of file
@@ -0,0 +1,187 @@
+import discord
+from discord.ext import commands
+import asyncio
+import io
+import linecache
+import tracemalloc
+from datetime import datetime
+from utils.auth import is_owner
+from config import MODMAIL_EMBED_COLOR, ERROR_EMBED_COLOR
+
+TOP_SITES = 25
+
+# Allocations made by the profiler itself would otherwise top every report
+SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+]
+
+def format_size(size, signed=False):
+    sign = "+" if signed else ""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:{sign},.1f} {unit}"
+        size /= 1024
+    return f"{size:{sign},.1f} GiB"
+
+class MemProf(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.baseline = None
+        self.last = None
+
+    @commands.command(name="memprof", hidden=True)
+    @is_owner()
+    async def memprof(self, ctx, action: str = None, frames: int = 1):
+        """Track memory allocations with tracemalloc (Owner only)"""
+        try:
+            action = (action or "").lower()
+            if action == "start":
+                await self.start(ctx, frames)
+            elif action == "snapshot":
+                await self.snapshot(ctx)
+            elif action == "diff":
+                await self.diff(ctx)
+            elif action == "stop":
+                await self.stop(ctx)
+            else:
+                error_embed = discord.Embed(
+                    title="❌ Invalid Usage",
+                    description="**Usage:** `?memprof <start [frames]|snapshot|diff|stop>`",
+                    color=ERROR_EMBED_COLOR
+                )
+                await ctx.send(embed=error_embed)
+
+        except Exception as e:
+            error_embed = discord.Embed(
+                title="❌ Memory Profiler Error",
+                description=f"An error occurred while profiling memory: {str(e)}",
+                color=ERROR_EMBED_COLOR
+            )
+            await ctx.send(embed=error_embed)
+
+    async def start(self, ctx, frames):
+        if tracemalloc.is_tracing():
+            await ctx.send(embed=discord.Embed(title="ℹ️ Already Tracing", description="Use `?memprof snapshot` or `?memprof diff`.", color=MODMAIL_EMBED_COLOR))
+            return
+        tracemalloc.start(max(1, min(frames, 25)))
+        self.baseline = self.last = await asyncio.to_thread(self.take)
+
+        embed = discord.Embed(
+            title="🔬 Memory Profiling Started",
+            description="Allocations made from now on are traced. This slows the bot down until `?memprof stop`.",
+            color=MODMAIL_EMBED_COLOR
+        )
+        embed.add_field(name="Frames per trace", value=str(tracemalloc.get_traceback_limit()), inline=True)
+        await ctx.send(embed=embed)
+
+    async def snapshot(self, ctx):
+        if not await self.require_tracing(ctx):
+            return
+        snapshot = await asyncio.to_thread(self.take)
+        stats = await asyncio.to_thread(self.group, snapshot.statistics, "lineno")
+        self.last = snapshot
+
+        lines = self.header("Top allocation sites")
+        for stat in stats[:TOP_SITES]:
+            lines.append(f"{format_size(stat.size):>12}  {stat.count:>9,} blocks  {self.site(stat.traceback)}")
+        await self.send_report(ctx, "snapshot", lines, f"Top {min(TOP_SITES, len(stats))} of {len(stats):,} allocation sites")
+
+    async def diff(self, ctx):
+        if not await self.require_tracing(ctx):
+            return
+        snapshot = await asyncio.to_thread(self.take)
+        previous = self.last
+        stats = await asyncio.to_thread(self.group, snapshot.compare_to, previous, "lineno")
+        since_start = await asyncio.to_thread(self.group, snapshot.compare_to, self.baseline, "filename")
+        self.last = snapshot
+
+        lines = self.header("Growth since the previous snapshot")
+        for stat in stats[:TOP_SITES]:
+            lines.append(f"{format_size(stat.size_diff, signed=True):>12}  {stat.count_diff:>+9,} blocks  "
+                         f"(now {format_size(stat.size)})  {self.site(stat.traceback)}")
+        lines += ["", "Growth per file since ?memprof start", ""]
+        for stat in since_start[:TOP_SITES]:
+            lines.append(f"{format_size(stat.size_diff, signed=True):>12}  {stat.traceback[0].filename}")
+
+        total = sum(stat.size_diff for stat in stats)
+        await self.send_report(ctx, "diff", lines, f"Net change since the previous snapshot: {format_size(total, signed=True)}")
+
+    async def stop(self, ctx):
+        if not await self.require_tracing(ctx):
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.baseline = self.last = None
+
+        embed = discord.Embed(
+            title="🛑 Memory Profiling Stopped",
+            description="Tracing is off and the snapshots have been released.",
+            color=MODMAIL_EMBED_COLOR
+        )
+        embed.add_field(name="Traced at stop", value=format_size(current), inline=True)
+        embed.add_field(name="Peak", value=format_size(peak), inline=True)
+        await ctx.send(embed=embed)
+
+    async def require_tracing(self, ctx):
+        if tracemalloc.is_tracing():
+            return True
+        await ctx.send(embed=discord.Embed(
+            title="❌ Not Tracing",
+            description="Start profiling first with `?memprof start`.",
+            color=ERROR_EMBED_COLOR
+        ))
+        return False
+
+    def take(self):
+        return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+    def group(self, method, *args):
+        """Run a statistics call and sort the biggest first (runs in a worker thread)"""
+        stats = method(*args)
+        if stats and hasattr(stats[0], "size_diff"):
+            stats.sort(key=lambda stat: abs(stat.size_diff), reverse=True)
+        return stats
+
+    def site(self, traceback):
+        frame = traceback[0]
+        line = linecache.getline(frame.filename, frame.lineno).strip()
+        return f"{frame.filename}:{frame.lineno}  {line}"
+
+    def header(self, title):
+        """Traced totals and the size of the caches we suspect first"""
+        current, peak = tracemalloc.get_traced_memory()
+        bot = self.bot
+        return [
+            f"Memory profile generated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Traced: {format_size(current)} (peak {format_size(peak)})",
+            "",
+            f"Cached messages: {len(bot.cached_messages):,}",
+            f"Ticket cache messages: {len(bot.message_cache):,} in {len(bot.message_cache.channels):,} tickets",
+            f"DM cache messages: {len(bot.dm_cache):,}",
+            f"Cached users: {len(bot.users):,}",
+            f"Cached members: {sum(len(guild.members) for guild in bot.guilds):,}",
+            f"Open tickets: {len(bot.tickets):,}",
+            f"DM message map entries (in memory): {len(bot.message_map):,}",
+            f"Queued DMs: {bot.dm_dispatcher.depth:,}",
+            "",
+            title,
+            "",
+        ]
+
+    async def send_report(self, ctx, kind, lines, summary):
+        report = io.BytesIO("\n".join(lines).encode("utf-8"))
+        filename = f"memprof-{kind}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt"
+
+        embed = discord.Embed(
+            title=f"🔬 Memory {kind.title()}",
+            description=summary,
+            color=MODMAIL_EMBED_COLOR,
+            timestamp=discord.utils.utcnow()
+        )
+        await ctx.send(embed=embed, file=discord.File(report, filename=filename))
+
+async def setup(bot):
+    await bot.add_cog(MemProf(bot))
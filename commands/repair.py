@@ -2,16 +2,19 @@ import discord
 from discord.ext import commands
 import psutil
 import platform
-from utils.helpers import is_authorized_user
-from config import MODMAIL_EMBED_COLOR
+from utils.auth import is_owner
+from utils import metrics
+from config import MODMAIL_EMBED_COLOR, RESTART_EXIT_CODE
 from main import get_uptime
 
+MAX_COUNTER_FIELDS = 2  # each up to 1024 characters, the whole embed has to stay under 6000
+
 class Repair(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
     @commands.command(name="repair")
-    @is_authorized_user(790869950076157983)
+    @is_owner()
     async def repair(self, ctx):
         """System information and bot diagnostics (Owner only)"""
         try:
@@ -34,16 +37,9 @@ class Repair(commands.Cog):
             # Get OS info
             os_info = f"{platform.system()} {platform.release()}"
             
-            # Count active tickets
+            # Ticket counts are kept up to date by the registry
             guild = ctx.guild
-            active_tickets = 0
-            claimed_tickets = 0
-            
-            for channel in guild.text_channels:
-                if channel.name.startswith("ticket-"):
-                    active_tickets += 1
-                    if hasattr(self.bot, 'claimed_tickets') and channel.id in self.bot.claimed_tickets:
-                        claimed_tickets += 1
+            tickets = self.bot.tickets
             
             # Create main embed
             embed = discord.Embed(
@@ -57,7 +53,8 @@ class Repair(commands.Cog):
                 name="🤖 Bot Status",
                 value=f"**Ping:** {latency}ms\n"
                       f"**Uptime:** {uptime}\n"
-                      f"**Status:** Online ✅",
+                      f"**Status:** Online ✅"
+                      + (f"\n**Lease:** {self.bot.lease.holder}" if self.bot.lease else ""),
                 inline=True
             )
             
@@ -82,12 +79,50 @@ class Repair(commands.Cog):
             # Modmail Statistics
             embed.add_field(
                 name="📊 Modmail Stats",
-                value=f"**Active Tickets:** {active_tickets}\n"
-                      f"**Claimed Tickets:** {claimed_tickets}\n"
-                      f"**Unclaimed Tickets:** {active_tickets - claimed_tickets}",
+                value=f"**Active Tickets:** {tickets.open_count}\n"
+                      f"**Claimed Tickets:** {tickets.claimed_count}\n"
+                      f"**Unclaimed Tickets:** {tickets.unclaimed_count}\n"
+                      f"**Queued DMs:** {self.bot.dm_dispatcher.depth} (peak {self.bot.dm_dispatcher.peak})",
                 inline=True
             )
             
+            # Ticket Category Load
+            pool = self.bot.category_pool
+            if not pool.loaded:
+                pool.load(guild)
+            category_load = [f"**{name}:** {count}/{pool.limit}" for name, count in pool.load_summary(guild)]
+            embed.add_field(
+                name="🗂️ Category Load",
+                value="\n".join(category_load) or "No ticket categories found",
+                inline=True
+            )
+
+            # Ticket State Reconciliation
+            embed.add_field(
+                name="🧹 Reconciliation",
+                value="\n".join(self.bot.reconciler.summary()),
+                inline=True
+            )
+
+            # Event Counters
+            counters = metrics.snapshot()
+            # Split over fields of at most 1024 characters, capped so the embed stays under its size limit
+            chunks = [[]]
+            for line in (f"**{name}:** {value}" for name, value in counters):
+                if sum(len(l) + 1 for l in chunks[-1]) + len(line) > 1024:
+                    chunks.append([])
+                chunks[-1].append(line)
+            shown = [chunk for chunk in chunks if chunk][:MAX_COUNTER_FIELDS]
+            for index, chunk in enumerate(shown):
+                if index == len(shown) - 1 and len(chunks) > len(shown):
+                    hidden = sum(len(c) for c in chunks[len(shown):])
+                    chunk = chunk[:-1] + [f"*...and {hidden + 1} more*"]
+                embed.add_field(
+                    name="📈 Counters" if index == 0 else "📈 Counters (cont.)",
+                    value="\n".join(chunk),
+                    inline=True
+                )
+
             # Guild Information
             embed.add_field(
                 name="🏰 Guild Info",
@@ -160,7 +195,7 @@ class Repair(commands.Cog):
             await ctx.send(embed=error_embed)
 
     @commands.command(name="restart", hidden=True)
-    @is_authorized_user(790869950076157983)
+    @is_owner()
     async def restart(self, ctx):
         """Restart the bot (Owner only)"""
         try:
@@ -171,12 +206,13 @@ class Repair(commands.Cog):
                 timestamp=discord.utils.utcnow()
             )
             restart_embed.add_field(name="Requested by", value=ctx.author.mention, inline=True)
+            restart_embed.add_field(name="In-flight Work", value=str(self.bot.work.inflight), inline=True)
             restart_embed.set_footer(text="Bot will be back online shortly")
             
             await ctx.send(embed=restart_embed)
             
-            # Close the bot gracefully
-            await self.bot.close()
+            # Drain in-flight work, persist state and exit with the restart code
+            await self.bot.shutdown(RESTART_EXIT_CODE)
             
         except Exception as e:
             error_embed = discord.Embed(
@@ -187,7 +223,7 @@ class Repair(commands.Cog):
             await ctx.send(embed=error_embed)
 
     @commands.command(name="status", hidden=True)
-    @is_authorized_user(790869950076157983)
+    @is_owner()
     async def status(self, ctx, *, status_text: str = None):
         """Change bot status (Owner only)"""
         try:
@@ -1,6 +1,6 @@
 import discord
 from discord.ext import commands
-from utils.helpers import is_staff, is_ticket_channel, get_user_from_channel, send_dm_safely
+from utils.helpers import is_staff, is_ticket_channel, get_user_from_channel, deliver_dm
 from config import MODMAIL_EMBED_COLOR, ERROR_EMBED_COLOR
 
 class Reply(commands.Cog):
@@ -10,9 +10,12 @@ class Reply(commands.Cog):
     @commands.command(name="reply")
     @is_staff()
     @is_ticket_channel()
-    async def reply(self, ctx, *, message: str):
+    async def reply(self, ctx, *, message: str = None):
         """Reply to the user in this ticket"""
         try:
+            if not await self.check_message(ctx, message, "reply"):
+                return
+            
             channel = ctx.channel
             user = await get_user_from_channel(self.bot, channel)
             
@@ -37,24 +40,31 @@ class Reply(commands.Cog):
             )
             
             # Send to user
-            dm_sent = await send_dm_safely(user, embed=user_embed)
+            result = await deliver_dm(user, embed=user_embed)
+            if result == "transient":
+                await self.queue_retry(ctx, user, user_embed, message, "Reply")
+                return
             
             # Create confirmation embed for ticket channel
-            if dm_sent:
+            if result == "sent":
+                self.bot.assigner.replied(ctx.author.id)
+                attachments_note = await self.send_attachments(ctx, user)
                 confirmation_embed = discord.Embed(
                     title="✅ Reply Sent",
                     description=f"Successfully sent reply to {user.mention}",
                     color=MODMAIL_EMBED_COLOR
                 )
-                confirmation_embed.add_field(name="Message", value=message, inline=False)
+                confirmation_embed.add_field(name="Message", value=message or "*(attachments only)*", inline=False)
                 confirmation_embed.add_field(name="Sent by", value=ctx.author.mention, inline=True)
+                if attachments_note:
+                    confirmation_embed.add_field(name="Attachments", value=attachments_note, inline=False)
             else:
                 confirmation_embed = discord.Embed(
                     title="❌ Reply Failed",
                     description=f"Could not send reply to {user.mention} (DMs may be disabled)",
                     color=ERROR_EMBED_COLOR
                 )
-                confirmation_embed.add_field(name="Attempted Message", value=message, inline=False)
+                confirmation_embed.add_field(name="Attempted Message", value=message or "*(attachments only)*", inline=False)
             
             await ctx.send(embed=confirmation_embed)
             
@@ -69,9 +79,12 @@ class Reply(commands.Cog):
     @commands.command(name="a_reply")
     @is_staff()
     @is_ticket_channel()
-    async def a_reply(self, ctx, *, message: str):
+    async def a_reply(self, ctx, *, message: str = None):
         """Send an anonymous reply to the user"""
         try:
+            if not await self.check_message(ctx, message, "a_reply"):
+                return
+            
             channel = ctx.channel
             user = await get_user_from_channel(self.bot, channel)
             
@@ -96,17 +109,24 @@ class Reply(commands.Cog):
             )
             
             # Send to user
-            dm_sent = await send_dm_safely(user, embed=user_embed)
+            result = await deliver_dm(user, embed=user_embed)
+            if result == "transient":
+                await self.queue_retry(ctx, user, user_embed, message, "Anonymous Reply")
+                return
             
             # Create confirmation embed for ticket channel
-            if dm_sent:
+            if result == "sent":
+                self.bot.assigner.replied(ctx.author.id)
+                attachments_note = await self.send_attachments(ctx, user)
                 confirmation_embed = discord.Embed(
                     title="✅ Anonymous Reply Sent",
                     description=f"Successfully sent anonymous reply to {user.mention}",
                     color=MODMAIL_EMBED_COLOR
                 )
-                confirmation_embed.add_field(name="Message", value=message, inline=False)
+                confirmation_embed.add_field(name="Message", value=message or "*(attachments only)*", inline=False)
                 confirmation_embed.add_field(name="Sent by", value=ctx.author.mention, inline=True)
+                if attachments_note:
+                    confirmation_embed.add_field(name="Attachments", value=attachments_note, inline=False)
                 confirmation_embed.add_field(name="Anonymous", value="Yes", inline=True)
             else:
                 confirmation_embed = discord.Embed(
@@ -114,7 +134,7 @@ class Reply(commands.Cog):
                     description=f"Could not send reply to {user.mention} (DMs may be disabled)",
                     color=ERROR_EMBED_COLOR
                 )
-                confirmation_embed.add_field(name="Attempted Message", value=message, inline=False)
+                confirmation_embed.add_field(name="Attempted Message", value=message or "*(attachments only)*", inline=False)
             
             await ctx.send(embed=confirmation_embed)
             
@@ -126,5 +146,56 @@ class Reply(commands.Cog):
             )
             await ctx.send(embed=error_embed)
 
+    async def queue_retry(self, ctx, user, user_embed, message, label):
+        """Post a queued confirmation and hand the DM to the retry queue, which edits it as it goes"""
+        confirmation_embed = discord.Embed(
+            title=f"⏳ {label} Queued",
+            description=f"Discord didn't accept the reply to {user.mention} yet, it will be retried automatically",
+            color=0xffaa00
+        )
+        confirmation_embed.add_field(name="Message", value=message or "*(attachments only)*", inline=False)
+        confirmation_embed.add_field(name="Sent by", value=ctx.author.mention, inline=True)
+        
+        # Files aren't kept for the retry, the user gets links to them with the queued message
+        links = None
+        if ctx.message.attachments:
+            links = "\n".join(f"📎 {attachment.url}" for attachment in ctx.message.attachments)[:2000]
+            confirmation_embed.add_field(
+                name="Attachments",
+                value="⚠️ Not re-uploaded - the retry sends links to them, which stop working if this message is deleted",
+                inline=False
+            )
+        
+        confirmation = await ctx.send(embed=confirmation_embed)
+        self.bot.dm_queue.enqueue(
+            user.id,
+            f"reply:{ctx.message.id}",
+            embed=user_embed,
+            content=links,
+            confirm=confirmation,
+            label=label
+        )
+
+    async def check_message(self, ctx, message, command):
+        """A reply needs text, attachments or both"""
+        if message or ctx.message.attachments:
+            return True
+        error_embed = discord.Embed(
+            title="❌ Invalid Usage",
+            description=f"Please provide a message or attach a file.\n\n**Usage:** `?{command} <message>`",
+            color=ERROR_EMBED_COLOR
+        )
+        await ctx.send(embed=error_embed)
+        return False
+
+    async def send_attachments(self, ctx, user):
+        """Re-upload the command's attachments to the user, returning a summary for the confirmation"""
+        attachments = ctx.message.attachments
+        if not attachments:
+            return None
+        sent, notes = await self.bot.attachments.relay(attachments, user)
+        lines = [f"✅ {len(sent.attachments)} file(s) delivered"] if sent else []
+        return "\n".join(lines + notes)[:1024]
+
 async def setup(bot):
     await bot.add_cog(Reply(bot))
\ No newline at end of file
@@ -1,31 +1,32 @@
 import discord
+import logging
 from discord.ext import commands
+import asyncio
+from typing import Union
+from utils.auth import is_role_manager_id
+
+log = logging.getLogger(__name__)
 
 class RoleCommand(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        # Specific user ID who can run this command
-        self.authorized_user_id = 498952210701352981
         # Channel to send notifications to
         self.notification_channel_id = 1407804143892172810
+        # Bulk role operations: parallel role edits and seconds between progress updates
+        self.bulk_concurrency = 3
+        self.bulk_progress_interval = 3
 
-    def is_authorized_user(self, user_id):
-        """Check if user is authorized to run role commands"""
-        return user_id == self.authorized_user_id
-
-    @commands.command(name="role")
-    async def role_command(self, ctx, member: discord.Member = None, role: discord.Role = None):
-        """Add or remove a role from a user. Only usable by authorized user."""
-        
+    async def check_invoker(self, ctx):
+        """Check the author may run role commands here, sending an error embed if not"""
         # Check if user is authorized
-        if not self.is_authorized_user(ctx.author.id):
+        if not is_role_manager_id(ctx.author.id):
             embed = discord.Embed(
                 title="❌ Permission Denied",
                 description="You don't have permission to use this command.",
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed, delete_after=10)
-            return
+            return False
 
         # Check if command is used in a guild (not DMs)
         if not ctx.guild:
@@ -35,23 +36,12 @@ class RoleCommand(commands.Cog):
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed, delete_after=10)
-            return
+            return False
 
-        # Check if both member and role were provided
-        if not member or not role:
-            embed = discord.Embed(
-                title="❌ Invalid Usage",
-                description="Please provide both a user and a role.\n\n**Usage:** `?role @user @role`",
-                color=discord.Color.red()
-            )
-            embed.add_field(
-                name="Examples:",
-                value="• `?role @JohnDoe @Moderator`\n• `?role @user123 @VIP`",
-                inline=False
-            )
-            await ctx.send(embed=embed, delete_after=15)
-            return
+        return True
 
+    async def check_role_manageable(self, ctx, role):
+        """Check the bot and the author can both manage this role, sending an error embed if not"""
         # Check bot permissions
         if not ctx.guild.me.guild_permissions.manage_roles:
             embed = discord.Embed(
@@ -60,7 +50,7 @@ class RoleCommand(commands.Cog):
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed, delete_after=10)
-            return
+            return False
 
         # Check if the role is higher than the bot's highest role
         if role.position >= ctx.guild.me.top_role.position:
@@ -70,7 +60,7 @@ class RoleCommand(commands.Cog):
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed, delete_after=10)
-            return
+            return False
 
         # Check if the role is higher than the author's highest role (for safety)
         if role.position >= ctx.author.top_role.position and ctx.author.id != ctx.guild.owner_id:
@@ -80,6 +70,33 @@ class RoleCommand(commands.Cog):
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed, delete_after=10)
+            return False
+
+        return True
+
+    @commands.command(name="role")
+    async def role_command(self, ctx, member: discord.Member = None, role: discord.Role = None):
+        """Add or remove a role from a user. Only usable by authorized user."""
+        
+        if not await self.check_invoker(ctx):
+            return
+
+        # Check if both member and role were provided
+        if not member or not role:
+            embed = discord.Embed(
+                title="❌ Invalid Usage",
+                description="Please provide both a user and a role.\n\n**Usage:** `?role @user @role`",
+                color=discord.Color.red()
+            )
+            embed.add_field(
+                name="Examples:",
+                value="• `?role @JohnDoe @Moderator`\n• `?role @user123 @VIP`",
+                inline=False
+            )
+            await ctx.send(embed=embed, delete_after=15)
+            return
+
+        if not await self.check_role_manageable(ctx, role):
             return
 
         try:
@@ -118,9 +135,9 @@ class RoleCommand(commands.Cog):
                 if notification_channel:
                     await notification_channel.send(embed=embed)
                 else:
-                    print(f"⚠️ Could not find notification channel with ID {self.notification_channel_id}")
+                    log.warning("Could not find notification channel with ID %s", self.notification_channel_id, extra={"event": "notification_channel_missing"})
             except Exception as e:
-                print(f"❌ Failed to send notification to channel: {e}")
+                log.error("Failed to send notification to channel: %s", e, extra={"event": "notification_failed"})
 
         except discord.HTTPException as e:
             embed = discord.Embed(
@@ -130,7 +147,7 @@ class RoleCommand(commands.Cog):
             )
             await ctx.send(embed=embed, delete_after=10)
         except Exception as e:
-            print(f"Unexpected error in role command: {e}")
+            log.exception("Unexpected error in role command: %s", e, extra={"event": "role_command_failed"})
             embed = discord.Embed(
                 title="❌ Unexpected Error",
                 description="An unexpected error occurred. Please try again later.",
@@ -138,5 +155,150 @@ class RoleCommand(commands.Cog):
             )
             await ctx.send(embed=embed, delete_after=10)
 
+    @commands.command(name="bulkrole")
+    async def bulk_role_command(self, ctx, action: str = None, role: discord.Role = None, *targets: Union[discord.Member, discord.Role]):
+        """Add, remove or toggle a role for many users at once. Only usable by authorized user."""
+
+        if not await self.check_invoker(ctx):
+            return
+
+        # Check the action, role and targets were provided
+        action = (action or "").lower()
+        if action not in ("add", "remove", "toggle") or not role or not targets:
+            embed = discord.Embed(
+                title="❌ Invalid Usage",
+                description="Please provide an action, a role and at least one user or role to apply it to.\n\n"
+                            "**Usage:** `?bulkrole <add|remove|toggle> @role @user... [@filter_role...]`",
+                color=discord.Color.red()
+            )
+            embed.add_field(
+                name="Examples:",
+                value="• `?bulkrole add @Whitelisted @user1 @user2 @user3`\n"
+                      "• `?bulkrole remove @Trial @Staff` - everyone with @Staff",
+                inline=False
+            )
+            await ctx.send(embed=embed, delete_after=15)
+            return
+
+        # Hierarchy is validated once for the whole batch
+        if not await self.check_role_manageable(ctx, role):
+            return
+
+        # Expand role targets to their members and drop duplicates
+        members = {}
+        for target in targets:
+            if isinstance(target, discord.Role):
+                for member in target.members:
+                    members[member.id] = member
+            else:
+                members[target.id] = target
+
+        # Only queue members whose roles actually change
+        jobs = []
+        skipped = 0
+        for member in members.values():
+            has_role = role in member.roles
+            if (action == "add" and has_role) or (action == "remove" and not has_role):
+                skipped += 1
+                continue
+            jobs.append((member, "remove" if has_role else "add"))
+
+        progress = await ctx.send(embed=self.bulk_embed(role, action, len(jobs), [], [], [], skipped))
+        added, removed, failed = await self.run_bulk(ctx, role, action, jobs, progress, skipped)
+
+        summary = self.bulk_embed(role, action, len(jobs), added, removed, failed, skipped, finished=True)
+        summary.set_footer(text=f"Action performed by {ctx.author}", icon_url=ctx.author.display_avatar.url)
+        try:
+            await progress.edit(embed=summary)
+        except discord.HTTPException:
+            await ctx.send(embed=summary)
+
+        # Send one summary notification for the whole batch
+        try:
+            notification_channel = self.bot.get_channel(self.notification_channel_id)
+            if notification_channel:
+                await notification_channel.send(embed=summary)
+            else:
+                log.warning("Could not find notification channel with ID %s", self.notification_channel_id, extra={"event": "notification_channel_missing"})
+        except Exception as e:
+            log.error("Failed to send notification to channel: %s", e, extra={"event": "notification_failed"})
+
+    async def run_bulk(self, ctx, role, action, jobs, progress, skipped):
+        """Apply queued role changes with a bounded number of workers, editing the progress message as they go"""
+        queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+
+        added, removed, failed = [], [], []
+
+        async def worker():
+            while True:
+                try:
+                    member, change = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    if change == "add":
+                        await member.add_roles(role, reason=f"Bulk role added by {ctx.author}")
+                        added.append(member)
+                    else:
+                        await member.remove_roles(role, reason=f"Bulk role removed by {ctx.author}")
+                        removed.append(member)
+                except discord.HTTPException as e:
+                    failed.append((member, str(e)))
+
+        workers = asyncio.gather(*(worker() for _ in range(min(self.bulk_concurrency, len(jobs)))))
+        last_done = 0
+        while not workers.done():
+            await asyncio.wait([workers], timeout=self.bulk_progress_interval)
+            done = len(added) + len(removed) + len(failed)
+            if done != last_done and not workers.done():
+                last_done = done
+                try:
+                    await progress.edit(embed=self.bulk_embed(role, action, len(jobs), added, removed, failed, skipped))
+                except discord.HTTPException:
+                    pass
+
+        return added, removed, failed
+
+    def bulk_embed(self, role, action, total, added, removed, failed, skipped, finished=False):
+        """Build the progress/summary embed for a bulk role operation"""
+        done = len(added) + len(removed) + len(failed)
+        if finished:
+            title = "✅ Bulk Role Complete" if not failed else "⚠️ Bulk Role Finished With Errors"
+            color = discord.Color.green() if not failed else discord.Color.orange()
+        else:
+            title = "⏳ Bulk Role In Progress"
+            color = discord.Color.blue()
+
+        embed = discord.Embed(
+            title=title,
+            description=f"`{action}` role `{role.name}` - **{done}/{total}** processed",
+            color=color,
+            timestamp=discord.utils.utcnow()
+        )
+        embed.add_field(name="Added", value=str(len(added)), inline=True)
+        embed.add_field(name="Removed", value=str(len(removed)), inline=True)
+        embed.add_field(name="Unchanged", value=str(skipped), inline=True)
+
+        if finished:
+            for name, members in (("Added to", added), ("Removed from", removed)):
+                if members:
+                    embed.add_field(name=name, value=self.member_list(members), inline=False)
+        if failed:
+            embed.add_field(
+                name=f"Failed ({len(failed)})",
+                value=self.member_list([member for member, _ in failed]),
+                inline=False
+            )
+        return embed
+
+    def member_list(self, members, limit=20):
+        """Mention up to `limit` members, summarising the rest"""
+        text = ", ".join(member.mention for member in members[:limit])
+        if len(members) > limit:
+            text += f" and {len(members) - limit} more"
+        return text
+
 async def setup(bot):
     await bot.add_cog(RoleCommand(bot))
\ No newline at end of file
@@ -11,8 +11,117 @@ TRANSCRIPT_CHANNEL = int(os.getenv('TRANSCRIPT_CHANNEL'))
 TICKET_CATEGORY = int(os.getenv('TICKET_CATEGORY'))
 STAFF_ROLE = int(os.getenv('STAFF_ROLE'))
 
+# Authorization - the owner runs every command (including ?repair), role managers run ?role/?bulkrole
+BOT_OWNER_ID = int(os.getenv('BOT_OWNER_ID', '790869950076157983'))
+ROLE_MANAGER_IDS = {int(u) for u in os.getenv('ROLE_MANAGER_IDS', '498952210701352981').split(',') if u.strip()}
+
+# Ticket category pool - TICKET_CATEGORY is always first, extra IDs are comma-separated
+TICKET_CATEGORIES = [TICKET_CATEGORY] + [int(c) for c in os.getenv('TICKET_CATEGORIES', '').split(',') if c.strip()]
+CATEGORY_CHANNEL_LIMIT = 50  # Discord's hard cap on channels per category
+OVERFLOW_CATEGORY_PREFIX = os.getenv('OVERFLOW_CATEGORY_PREFIX', 'Tickets Overflow')
+
+# Ticket backend - "channel" creates a text channel per ticket, "thread" opens a private
+# thread under TICKET_THREAD_CHANNEL (staff need Manage Threads there to see every ticket)
+TICKET_MODE = os.getenv('TICKET_MODE', 'channel').lower()
+TICKET_THREAD_CHANNEL = int(os.getenv('TICKET_THREAD_CHANNEL', '0')) or None
+
+# Pre-warmed spare ticket channels (channel mode only, 0 disables the pool)
+SPARE_POOL_SIZE = int(os.getenv('SPARE_POOL_SIZE', '0'))
+SPARE_REFILL_INTERVAL = float(os.getenv('SPARE_REFILL_INTERVAL', '5'))  # Seconds between spare creations
+SPARE_CHANNEL_PREFIX = 'spare-'
+
+# Message caching - discord.py's global cache (every channel, 0 disables it) and the ticket/DM caches
+# transcripts and edit mirroring read before the REST API
+MAX_MESSAGES = int(os.getenv('MAX_MESSAGES', '1000')) or None
+TICKET_CACHE_MESSAGES = int(os.getenv('TICKET_CACHE_MESSAGES', '500'))  # Per ticket, longer tickets fall back to REST
+TICKET_CACHE_CHANNELS = int(os.getenv('TICKET_CACHE_CHANNELS', '500'))
+DM_CACHE_MESSAGES = int(os.getenv('DM_CACHE_MESSAGES', '25'))  # Per user
+DM_CACHE_USERS = int(os.getenv('DM_CACHE_USERS', '2000'))
+
+# Local persistent state (tickets, resumable jobs)
+STORE_PATH = os.getenv('STORE_PATH', 'data/modmail.db')
+
+# Graceful restart - how long ?restart waits for in-flight work, and the exit code the supervisor sees
+SHUTDOWN_DEADLINE = float(os.getenv('SHUTDOWN_DEADLINE', '30'))
+RESTART_EXIT_CODE = int(os.getenv('RESTART_EXIT_CODE', '75'))
+
+# Hot standby - a second process on the same host and store waits on a lease and takes over when the
+# leader stops renewing it. The leader renews every LEASE_HEARTBEAT seconds, a lease lapses after LEASE_TTL.
+# DMs to open tickets sent during the handover are fetched and forwarded after it, a first DM from a user
+# without a ticket sent in that window (up to LEASE_TTL plus the reconnect) is not recovered.
+STANDBY_MODE = os.getenv('STANDBY_MODE', '0') == '1'
+LEASE_TTL = float(os.getenv('LEASE_TTL', '10'))
+LEASE_HEARTBEAT = float(os.getenv('LEASE_HEARTBEAT', '2'))
+DM_CATCH_UP_LIMIT = int(os.getenv('DM_CATCH_UP_LIMIT', '50'))  # DMs fetched per open ticket after a takeover
+
+# DM edit/delete mirroring - entries kept in memory before spilling to the store, and days kept on disk
+MESSAGE_MAP_CAPACITY = int(os.getenv('MESSAGE_MAP_CAPACITY', '50000'))
+MESSAGE_MAP_RETENTION_DAYS = int(os.getenv('MESSAGE_MAP_RETENTION_DAYS', '30'))
+
+# DM delivery retries - backoff is exponential with full jitter, capped at DM_RETRY_MAX_DELAY seconds
+DM_RETRY_MAX_ATTEMPTS = int(os.getenv('DM_RETRY_MAX_ATTEMPTS', '8'))
+DM_RETRY_BASE_DELAY = float(os.getenv('DM_RETRY_BASE_DELAY', '2'))
+DM_RETRY_MAX_DELAY = float(os.getenv('DM_RETRY_MAX_DELAY', '900'))
+DM_QUEUE_MEMORY_LIMIT = int(os.getenv('DM_QUEUE_MEMORY_LIMIT', '500'))  # Queued DMs scheduled in memory at once
+
+# Per-user DM flood limiter - token bucket refilled at DM_RATE_PER_SECOND up to DM_BURST
+DM_RATE_PER_SECOND = float(os.getenv('DM_RATE_PER_SECOND', '0.5'))
+DM_BURST = int(os.getenv('DM_BURST', '5'))
+DM_LIMITER_MAX_USERS = int(os.getenv('DM_LIMITER_MAX_USERS', '10000'))  # Buckets kept before evicting the least recent
+DM_LIMITER_IDLE_SECONDS = float(os.getenv('DM_LIMITER_IDLE_SECONDS', '600'))
+DM_DIGEST_MAX_MESSAGES = int(os.getenv('DM_DIGEST_MAX_MESSAGES', '25'))  # Throttled messages per digest, a full one is sent early
+DM_THROTTLE_NOTICE_COOLDOWN = float(os.getenv('DM_THROTTLE_NOTICE_COOLDOWN', '600'))  # Seconds between "slow down" DMs to one user
+
+# DM dispatch - workers handling DMs (one user at a time each) and the cap on DMs queued across all users.
+# DMs over the cap are parked in the store and fed back in once the queues drain.
+DM_WORKERS = int(os.getenv('DM_WORKERS', '4'))
+DM_QUEUE_LIMIT = int(os.getenv('DM_QUEUE_LIMIT', '1000'))
+
+# Ticket state reconciliation - repairs needing API calls run this many at a time, this many seconds apart
+RECONCILE_BATCH_SIZE = int(os.getenv('RECONCILE_BATCH_SIZE', '5'))
+RECONCILE_BATCH_INTERVAL = float(os.getenv('RECONCILE_BATCH_INTERVAL', '5'))
+
+# Attachment relay - parallel downloads, largest file re-uploaded, bytes buffered in memory before
+# spilling to a temp file, and how many recent uploads are remembered for duplicate detection
+ATTACHMENT_CONCURRENCY = int(os.getenv('ATTACHMENT_CONCURRENCY', '4'))
+ATTACHMENT_MAX_BYTES = int(os.getenv('ATTACHMENT_MAX_BYTES', str(10 * 1024 * 1024)))
+ATTACHMENT_SPOOL_BYTES = int(os.getenv('ATTACHMENT_SPOOL_BYTES', str(1024 * 1024)))
+ATTACHMENT_DEDUP_ENTRIES = int(os.getenv('ATTACHMENT_DEDUP_ENTRIES', '5000'))
+
+# Transcripts - formats attached on close ("txt", "html" or both) and the rendering process pool size
+TRANSCRIPT_FORMATS = [f.strip() for f in os.getenv('TRANSCRIPT_FORMATS', 'txt').split(',') if f.strip()]
+TRANSCRIPT_WORKERS = int(os.getenv('TRANSCRIPT_WORKERS', '2'))
+
+# Transcript uploads are grouped into one message per window (Discord allows 10 files per message),
+# and a batch is sent early rather than go over TRANSCRIPT_BATCH_MAX_BYTES in one request
+TRANSCRIPT_BATCH_WINDOW = float(os.getenv('TRANSCRIPT_BATCH_WINDOW', '3'))
+TRANSCRIPT_BATCH_MAX_FILES = 10
+TRANSCRIPT_BATCH_MAX_BYTES = int(os.getenv('TRANSCRIPT_BATCH_MAX_BYTES', str(8 * 1024 * 1024)))
+
+# Auto-assignment of unclaimed tickets - "off", "claim" (assign the ticket) or "ping" (mention a staff member).
+# Needs the privileged presence intent to tell who is online.
+AUTO_ASSIGN_MODE = os.getenv('AUTO_ASSIGN_MODE', 'off').lower()
+AUTO_ASSIGN_MAX_CLAIMS = int(os.getenv('AUTO_ASSIGN_MAX_CLAIMS', '5'))  # Staff at this many claims are skipped
+AUTO_ASSIGN_REPLY_WEIGHT = float(os.getenv('AUTO_ASSIGN_REPLY_WEIGHT', '0.25'))  # Load added per recent reply
+AUTO_ASSIGN_REPLY_WINDOW = float(os.getenv('AUTO_ASSIGN_REPLY_WINDOW', '900'))  # Seconds a reply counts towards load
+AUTO_ASSIGN_INTERVAL = float(os.getenv('AUTO_ASSIGN_INTERVAL', '60'))  # Retry waiting tickets at least this often
+
+# Runtime profile - "performance" runs on uvloop (pip install uvloop)
+RUNTIME_PROFILE = os.getenv('RUNTIME_PROFILE', 'default').lower()
+
+# Logging - JSON lines to stdout and a size-rotated file, written from a background thread
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FILE = os.getenv('LOG_FILE', 'logs/modmail.log')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(5 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+LOG_ERROR_WINDOW = float(os.getenv('LOG_ERROR_WINDOW', '60'))  # Seconds between repeats of the same warning/error
+LOG_SAMPLE_RATES = {  # Fraction of info/debug records kept per event
+    'whitelist_reply': 0.1,
+    'dm_forwarded': 0.1,
+}
+
 # Modmail configuration
-BLOCKED_USERS = set()  # You can store this in a database later
+BLOCKED_USERS = set()  # Permanent blocks from config, ?block stores the rest in the local store
 MODMAIL_EMBED_COLOR = 0x00ff00  # Green
 ERROR_EMBED_COLOR = 0xff0000   # Red
 INFO_EMBED_COLOR = 0x0099ff    # Blue
\ No newline at end of file
@@ -1,41 +1,154 @@
 import discord
+import logging
 from discord.ext import commands
 import os
 import asyncio
+import sys
 import time
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from utils.helpers import send_dm_safely
+from utils.helpers import send_dm_safely, format_duration
+from utils.categories import CategoryPool
+from utils.spares import SpareChannelPool
+from utils import metrics
+from utils.tickets import find_ticket_channel, open_ticket
+from utils.logger import setup_logging, stop_logging
+from utils.store import Store
+from utils.lifecycle import WorkTracker
+from utils.message_map import MessageMap
+from utils.dm_queue import DMQueue
+from utils.blocklist import Blocklist
+from utils.ratelimit import UserRateLimiter
+from utils.transcripts import shutdown_pool
+from utils.transcript_batcher import TranscriptBatcher
+from utils.assigner import Assigner
+from utils.registry import TicketRegistry
+from utils.auth import StaffCache, is_staff_id
+from utils.dispatcher import DMDispatcher
+from utils.reconcile import Reconciler
+from utils.runtime import apply_profile
+from utils.message_cache import MessageCache
+from utils.attachments import AttachmentRelay
+from utils.lease import Lease
+from config import (
+    SHUTDOWN_DEADLINE, AUTO_ASSIGN_MODE, BOT_OWNER_ID, MAX_MESSAGES, DM_CACHE_MESSAGES, DM_CACHE_USERS,
+    STANDBY_MODE, RESTART_EXIT_CODE, DM_CATCH_UP_LIMIT
+)
+
+log = logging.getLogger("modmail")
 
 # Load environment variables
 load_dotenv()
 
 start_time = time.time()
 
+DIGEST_TITLE_PREFIX = "📥"
+
+def digest_link(jump_url, dm_id):
+    return f"[<t:{int(discord.utils.snowflake_time(dm_id).timestamp())}:T>]({jump_url})"
+
+def digest_text(content):
+    # One line per DM, so a line can be found and rewritten later
+    return content.replace("\n", " ") if content else "*(no text)*"
+
+def rewrite_digest_line(embed, dm_id, rewrite):
+    """Rewrite the line for one DM in a digest embed with rewrite(link, text), False if it isn't there"""
+    lines = (embed.description or "").split("\n")
+    marker = f"/{dm_id})"
+    for index, line in enumerate(lines):
+        end = line.find(marker)
+        if end != -1:
+            end += len(marker)
+            lines[index] = rewrite(line[:end], line[end:].strip())
+            embed.description = "\n".join(lines)[:4096]
+            return True
+    return False
+
+def is_digest(message):
+    return bool(message.embeds) and (message.embeds[0].title or "").startswith(DIGEST_TITLE_PREFIX)
+
 class ModmailBot(commands.Bot):
-    def __init__(self):
+    def __init__(self, max_messages=MAX_MESSAGES):
         intents = discord.Intents.default()
         intents.message_content = True
         intents.guilds = True
         intents.members = True
         intents.dm_messages = True
+        intents.presences = AUTO_ASSIGN_MODE != 'off'  # online status for auto-assignment
         
+        self.prefix = '?'
         super().__init__(
-            command_prefix='?',
+            command_prefix=self.prefix,
             intents=intents,
-            help_command=None
+            help_command=None,
+            max_messages=max_messages
         )
         
-        # Store active tickets and claimed tickets
-        self.active_tickets = {}
-        self.claimed_tickets = {}  # ticket_channel_id: user_id
+        # Local persistent state and in-flight work tracking for graceful restarts
+        self.store = Store()
+        self.work = WorkTracker()
+        self.exit_code = 0
+        
+        # Leader lease for running a hot standby next to this process (off unless STANDBY_MODE=1)
+        self.lease = Lease(self.store) if STANDBY_MODE else None
+        self._fenced = False  # lost the lease, must not write state over the new leader's
+        self._connected_at = None  # first gateway connection, DMs after it arrive as events
+        self._catch_up_from = {}  # owner id -> last forwarded DM id at that point
+        
+        # Messages from ticket channels and DMs, read by transcripts and edit mirroring before REST
+        self.message_cache = MessageCache()
+        self.dm_cache = MessageCache(per_channel=DM_CACHE_MESSAGES, max_channels=DM_CACHE_USERS)
+        
+        # Re-uploads attachments in both directions so they don't depend on expiring CDN links
+        self.attachments = AttachmentRelay()
+        
+        # DM message id -> forwarded ticket message, for edit/delete mirroring
+        self.message_map = MessageMap(self.store)
+        
+        # Durable retry queue for DMs that failed with a transient error
+        self.dm_queue = DMQueue(self, self.store)
+        
+        # Users who may not open tickets (checked first for every DM)
+        self.blocklist = Blocklist(self.store)
+        
+        # Per-user token buckets in front of handle_dm_message
+        self.dm_limiter = UserRateLimiter()
+        
+        # Per-user ordered DM queues served by a worker pool, so on_message never waits on REST calls
+        self.dm_dispatcher = DMDispatcher(self, self.handle_dm_message)
+        
+        # Groups transcript uploads from concurrent closes into shared messages
+        self.transcript_batcher = TranscriptBatcher(self)
+        self._resumed = False
+        
+        # Open tickets with their owner, claimer and activity (restored from the last clean shutdown)
+        self.tickets = TicketRegistry()
+        self.tickets.load(self.store)
+        
+        # Keeps the registry in step with channel events and sweeps it on startup
+        self.reconciler = Reconciler(self)
+        
+        # Optional auto-assignment of unclaimed tickets
+        self.assigner = Assigner(self)
+        
+        # Live occupancy of the ticket categories
+        self.category_pool = CategoryPool()
+        
+        # Pre-warmed ticket channels (disabled unless SPARE_POOL_SIZE is set)
+        self.spare_pool = SpareChannelPool(self)
+        
+        # Staff member ids for permission checks (filled in on_ready, kept current by member events)
+        self.staff = StaffCache()
         
         # Special user who can run all commands
-        self.special_user_id = 790869950076157983
+        self.special_user_id = BOT_OWNER_ID
         
         # Channel ID for whitelist auto-response
         self.whitelist_channel_id = 1384510906897137745
         
+        # Guild channels whose plain (non-command) messages on_message cares about
+        self.watched_channel_ids = {self.whitelist_channel_id}
+        
     async def setup_hook(self):
         """Load all command cogs and set status"""
         try:
@@ -45,54 +158,89 @@ class ModmailBot(commands.Bot):
                 'commands.close',
                 'commands.claim',
                 'commands.repair',
-                'commands.role'  # Add this line
+                'commands.memprof',
+                'commands.role',  # Add this line
+                'commands.block'
             ]
             
             for extension in command_files:
                 try:
                     await self.load_extension(extension)
-                    print(f"✅ Loaded {extension}")
+                    log.info("Loaded %s", extension, extra={"event": "extension_loaded"})
                 except Exception as e:
-                    print(f"❌ Failed to load {extension}: {e}")
+                    log.error("Failed to load %s: %s", extension, e, extra={"event": "extension_failed"})
+            
+            # Pick up DM retries left over from the last run
+            self.dm_queue.start()
+            self.blocklist.start()
+            self.dm_dispatcher.start()
+            if self.lease:
+                asyncio.create_task(self.lease.keep(on_beat=self.flush_state, on_lost=self.lease_lost))
             
             # Set the status here in setup_hook instead of on_ready
             activity = discord.Game(name="DM For Support")
             await self.change_presence(activity=activity, status=discord.Status.online)
-            print("✅ Bot status set in setup_hook")
+            log.info("Bot status set in setup_hook", extra={"event": "status_set"})
             
         except Exception as e:
-            print(f"Error in setup_hook: {e}")
+            log.exception("Error in setup_hook: %s", e, extra={"event": "setup_hook_failed"})
+
+    async def on_connect(self):
+        if self._connected_at is None:
+            # Live DMs forwarded from here on move last_dm_id past anything missed, so remember where it was
+            self._connected_at = discord.utils.utcnow()
+            self._catch_up_from = {record.owner_id: record.last_dm_id for record in self.tickets}
 
     async def on_ready(self):
-        print(f'{self.user} has connected to Discord!')
-        print(f'Bot is in {len(self.guilds)} guilds')
-        print(f'Bot started at: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
+        log.info("%s has connected to Discord!", self.user, extra={"event": "ready"})
+        log.info("Bot is in %d guilds", len(self.guilds), extra={"event": "ready"})
+        log.info("Bot started at: %s", datetime.now().strftime("%Y-%m-%d %H:%M:%S"), extra={"event": "ready"})
+        
+        # Build ticket category counters once, events keep them current afterwards
+        guild_id = os.getenv('GUILD_ID')
+        guild = self.get_guild(int(guild_id)) if guild_id else None
+        if guild:
+            self.staff.load(guild)
+            self.category_pool.load(guild)
+            log.info("Tracking %d ticket categories", len(self.category_pool.counts), extra={"event": "categories_loaded"})
+            await self.spare_pool.reconcile(guild)
+            self.reconciler.sweep(guild)
+            self.assigner.start(guild)
+        
+        # Finish work interrupted by the last shutdown (only once per process)
+        if not self._resumed:
+            self._resumed = True
+            await self.resume_jobs()
+            if self.lease:
+                # Ticket state and the message map are flushed every heartbeat in standby mode,
+                # so only DMs from the last heartbeat before a crash can be forwarded twice
+                await self.catch_up_dms()
         
         # Backup status setting with retry logic
         await asyncio.sleep(2)  # Wait a bit before setting status
         try:
             activity = discord.Game(name="DM For Support")
             await self.change_presence(activity=activity, status=discord.Status.online)
-            print("✅ Bot status set in on_ready (backup)")
+            log.info("Bot status set in on_ready (backup)", extra={"event": "status_set"})
         except Exception as e:
-            print(f"❌ Failed to set status: {e}")
+            log.error("Failed to set status: %s", e, extra={"event": "status_failed"})
             # Retry after 5 seconds
             await asyncio.sleep(5)
             try:
                 activity = discord.Game(name="DM For Support")
                 await self.change_presence(activity=activity, status=discord.Status.online)
-                print("✅ Bot status set after retry")
+                log.info("Bot status set after retry", extra={"event": "status_set"})
             except Exception as e:
-                print(f"❌ Failed to set status after retry: {e}")
+                log.error("Failed to set status after retry: %s", e, extra={"event": "status_failed"})
         
         # Validate environment variables
         required_env_vars = ['GUILD_ID', 'TICKET_CATEGORY', 'STAFF_ROLE']
         missing_vars = [var for var in required_env_vars if not os.getenv(var)]
         
         if missing_vars:
-            print(f"❌ Missing environment variables: {', '.join(missing_vars)}")
+            log.error("Missing environment variables: %s", ', '.join(missing_vars), extra={"event": "config_missing"})
         else:
-            print("✅ All required environment variables found")
+            log.info("All required environment variables found", extra={"event": "config_ok"})
         
     async def on_command_error(self, ctx, error):
         """Handle command errors globally"""
@@ -107,111 +255,239 @@ class ModmailBot(commands.Bot):
             )
             await ctx.send(embed=embed, delete_after=10)
         else:
-            print(f"Unhandled error in command {ctx.command}: {error}")
+            log.error("Unhandled error in command %s: %s", ctx.command, error, extra={"event": "command_error"})
         
+    async def resume_jobs(self):
+        """Replay DMs received while draining and finish interrupted closes"""
+        for job_id, kind, payload in self.store.pending_jobs():
+            try:
+                if kind == "forward_dm":
+                    user = self.get_user(payload["user_id"]) or await self.fetch_user(payload["user_id"])
+                    dm_channel = user.dm_channel or await user.create_dm()
+                    message = self.dm_cache.get(dm_channel.id, payload["message_id"]) or await dm_channel.fetch_message(payload["message_id"])
+                    async with self.work.track():
+                        await self.handle_dm_message(message)
+                    self.store.finish_job(job_id)
+                elif kind == "close":
+                    close_cog = self.get_cog("Close")
+                    if close_cog:
+                        await close_cog.resume(job_id, payload)
+                log.info("Resumed %s job %s", kind, job_id, extra={"event": "job_resumed"})
+            except discord.NotFound:
+                self.store.finish_job(job_id)
+                log.warning("Dropped %s job %s, its target no longer exists", kind, job_id, extra={"event": "job_dropped"})
+            except Exception as e:
+                log.exception("Failed to resume %s job %s: %s", kind, job_id, e, extra={"event": "job_resume_failed"})
+
+    async def replay_parked_dms(self):
+        """Feed parked DMs back into the dispatcher oldest first, as far as there is room"""
+        dispatcher = self.dm_dispatcher
+        while True:
+            jobs = self.store.pending_jobs("forward_dm")
+            if not jobs:
+                # Backlog cleared, users' new DMs can be queued directly again
+                dispatcher.parked_users.clear()
+                return
+            for job_id, _, payload in jobs:
+                if not self.work.accepting or dispatcher.depth >= dispatcher.limit:
+                    return  # the next free slot picks up from here
+                try:
+                    user = self.get_user(payload["user_id"]) or await self.fetch_user(payload["user_id"])
+                    dm_channel = user.dm_channel or await user.create_dm()
+                    message = self.dm_cache.get(dm_channel.id, payload["message_id"]) or await dm_channel.fetch_message(payload["message_id"])
+                    dispatcher.enqueue(message)
+                    self.store.finish_job(job_id)
+                except discord.NotFound:
+                    self.store.finish_job(job_id)
+                except Exception as e:
+                    # Stop rather than skip it, later DMs from the same user must not overtake this one
+                    log.exception("Failed to replay parked DM job %s: %s", job_id, e, extra={"event": "dm_replay_failed"})
+                    return
+
+    async def catch_up_dms(self):
+        """Forward DMs sent to open tickets while no process was connected (during a standby takeover).
+
+        Only users with an open ticket can be caught up on: a first DM from anyone else sent while
+        nothing was connected never reaches the bot, as the gateway does not replay missed events.
+        """
+        caught_up = 0
+        cutoff = discord.Object(discord.utils.time_snowflake(self._connected_at or discord.utils.utcnow()))
+        for owner_id, last_dm_id in self._catch_up_from.items():
+            if last_dm_id is None or owner_id in self.blocklist or not self.tickets.for_owner(owner_id):
+                continue
+            try:
+                user = self.get_user(owner_id) or await self.fetch_user(owner_id)
+                dm_channel = user.dm_channel or await user.create_dm()
+                async for message in dm_channel.history(after=discord.Object(last_dm_id), before=cutoff,
+                                                        oldest_first=True, limit=DM_CATCH_UP_LIMIT):
+                    if message.author.bot or self.message_map.get(message.id):
+                        continue
+                    if not self.dm_dispatcher.submit(message):
+                        self.dm_dispatcher.park(message)
+                    caught_up += 1
+            except discord.HTTPException as e:
+                log.warning("DM catch-up failed for %s: %s", owner_id, e, extra={"event": "dm_catch_up_failed"})
+        if caught_up:
+            metrics.incr("dms_caught_up", caught_up)
+            log.info("Caught up on %d DMs sent while disconnected", caught_up, extra={"event": "dm_catch_up"})
+
+    def warm_state(self):
+        """Reload store-backed state while standing by, so a takeover starts from the leader's last flush"""
+        tickets = TicketRegistry()
+        tickets.load(self.store)
+        self.tickets = tickets
+        self.blocklist = Blocklist(self.store)
+
+    def lease_lost(self):
+        """Another process holds the lease now, stop at once and let the supervisor restart us as the standby"""
+        self._fenced = True
+        self.exit_code = RESTART_EXIT_CODE
+        asyncio.create_task(self.close())
+
+    def flush_state(self):
+        """Write in-memory ticket state and recent message map entries to the local store"""
+        if self._fenced:
+            return
+        self.store.set('tickets', self.tickets.dump())
+        self.message_map.save()
+
+    async def shutdown(self, exit_code=0):
+        """Stop taking new work, let in-flight work finish, persist state and disconnect"""
+        log.info("Draining in-flight work (%d running)", self.work.inflight, extra={"event": "shutdown_drain"})
+        drained = await self.work.drain(SHUTDOWN_DEADLINE)
+        if not drained:
+            log.warning("Shutdown deadline hit with %d units still running, they will resume on next boot",
+                        self.work.inflight, extra={"event": "shutdown_deadline"})
+        self.exit_code = exit_code
+        await self.close()
+
+    async def close(self):
+        self.flush_state()
+        if self.lease and not self._fenced:
+            # Hand over straight away instead of making the standby wait out the TTL
+            self.lease.release()
+        shutdown_pool()
+        await self.attachments.close()
+        await super().close()
+
+    async def on_member_update(self, before, after):
+        if self.staff.member_update(before, after):
+            self.assigner.staff_added(after.id)
+
+    async def on_member_remove(self, member):
+        self.staff.member_remove(member)
+
+    async def on_guild_role_delete(self, role):
+        self.staff.role_deleted(role)
+
+    async def on_guild_channel_create(self, channel):
+        self.category_pool.channel_created(channel)
+        self.reconciler.channel_created(channel)
+
+    async def on_thread_create(self, thread):
+        self.reconciler.channel_created(thread)
+
+    async def on_guild_channel_delete(self, channel):
+        self.category_pool.channel_deleted(channel)
+        self.reconciler.channel_deleted(channel)
+
+    async def on_guild_channel_update(self, before, after):
+        self.category_pool.channel_moved(before, after)
+        self.reconciler.channel_updated(before, after)
+
+    async def on_thread_delete(self, thread):
+        self.reconciler.channel_deleted(thread)
+
+    async def on_thread_update(self, before, after):
+        if after.archived and not before.archived:
+            await self.reconciler.thread_archived(after)
+        else:
+            self.reconciler.channel_updated(before, after)
+
     async def on_message(self, message):
+        metrics.incr("messages_seen")
+        
+        # Keep ticket and DM messages (including our own) in the scoped caches
+        if message.channel.id in self.message_cache or message.channel.id in self.tickets:
+            self.message_cache.add(message)
+        elif message.guild is None:
+            self.dm_cache.add(message)
+        
+        # Cheap pre-filter before any command parsing or Context creation
+        if message.author.bot:
+            metrics.incr("messages_skipped_bot")
+            return
+        
+        is_dm = isinstance(message.channel, discord.DMChannel)
+        if is_dm and message.author.id in self.blocklist:
+            metrics.incr("messages_blocked_user")
+            return
+        
+        is_command = message.content.startswith(self.prefix)
+        
+        if not is_command and not is_dm and message.channel.id not in self.watched_channel_ids:
+            metrics.incr("messages_skipped_prefilter")
+            return
+        
+        # While draining for a restart, park DMs in the store so the next boot forwards them
+        if not self.work.accepting:
+            if is_dm:
+                self.store.add_job("forward_dm", {"user_id": message.author.id, "message_id": message.id})
+            return
+        
         # Process commands first
-        await self.process_commands(message)
+        if is_command:
+            metrics.incr("messages_command_parsed")
+            await self.process_commands(message)
         
         # Handle specific channel auto-response
-        if message.channel.id == self.whitelist_channel_id and not message.author.bot:
+        if message.channel.id == self.whitelist_channel_id:
             try:
                 await message.channel.send("To become Whitelisted, please apply here: <#1384509015962288210>, if you need support, please DM the support bot. Please speak in <#1384510906897137745>")
-                print(f"✅ Sent whitelist message for user {message.author} in channel {message.channel.name}")
+                log.info("Sent whitelist message for user %s in channel %s", message.author, message.channel.name, extra={"event": "whitelist_reply"})
             except Exception as e:
-                print(f"❌ Failed to send whitelist message: {e}")
+                log.error("Failed to send whitelist message: %s", e, extra={"event": "whitelist_reply_failed"})
         
         # Handle DM messages for modmail
-        elif isinstance(message.channel, discord.DMChannel) and not message.author.bot:
-            await self.handle_dm_message(message)
+        elif is_dm:
+            # Per-user flood limiter: throttled messages are batched into a digest instead of dropped
+            if not self.dm_limiter.allow(message.author.id):
+                if self.dm_limiter.buffer(message):
+                    asyncio.create_task(self.flush_dm_digest(message.author))
+                elif self.dm_limiter.digest_full(message.author.id):
+                    # A full digest goes out now, the pending flush sends whatever comes after it
+                    self.submit_dm_digest(message.author, *self.dm_limiter.drain_digest(message.author.id))
+                return
+            
+            if not self.dm_dispatcher.submit(message):
+                # Queues are full (or this user's earlier DMs are parked), keep it in the store behind them
+                self.dm_dispatcher.park(message)
+                log.warning("DM queue full, parked message from %s", message.author.id, extra={"event": "dm_dispatch_overflow"})
     
     async def handle_dm_message(self, message):
         """Handle incoming DM messages and forward them to modmail threads"""
         try:
             guild_id = os.getenv('GUILD_ID')
             if not guild_id:
-                print("❌ GUILD_ID not set in environment variables")
+                log.error("GUILD_ID not set in environment variables", extra={"event": "config_missing"})
                 return
                 
             guild = self.get_guild(int(guild_id))
             if not guild:
-                print(f"❌ Could not find guild with ID {guild_id}")
+                log.error("Could not find guild with ID %s", guild_id, extra={"event": "guild_missing"})
                 return
             
             user_id = message.author.id
             
             # Check if user has an active ticket
-            ticket_channel = None
-            for channel in guild.text_channels:
-                if channel.name == f"ticket-{user_id}":
-                    ticket_channel = channel
-                    break
+            ticket_channel = find_ticket_channel(self, guild, user_id)
             
             # If no active ticket, create one
             if not ticket_channel:
-                # Validate category exists
-                category_id = os.getenv('TICKET_CATEGORY')
-                if not category_id:
-                    print("❌ TICKET_CATEGORY not set in environment variables")
-                    return
-                
-                try:
-                    category = guild.get_channel(int(category_id))
-                    if not category:
-                        print(f"❌ Could not find category with ID {category_id}")
-                        return
-                    
-                    # Check if it's actually a category
-                    if not isinstance(category, discord.CategoryChannel):
-                        print(f"❌ Channel {category_id} is not a category channel")
-                        return
-                        
-                except ValueError:
-                    print(f"❌ Invalid TICKET_CATEGORY ID: {category_id}")
-                    return
-                
-                # Validate staff role exists
-                staff_role_id = os.getenv('STAFF_ROLE')
-                if not staff_role_id:
-                    print("❌ STAFF_ROLE not set in environment variables")
-                    return
-                
-                try:
-                    staff_role = guild.get_role(int(staff_role_id))
-                    if not staff_role:
-                        print(f"❌ Could not find staff role with ID {staff_role_id}")
-                        return
-                except ValueError:
-                    print(f"❌ Invalid STAFF_ROLE ID: {staff_role_id}")
-                    return
-                
-                # Get the specific user to add to all tickets
-                auto_add_user_id = self.special_user_id
-                auto_add_user = guild.get_member(auto_add_user_id)
-                
-                # Create ticket channel with permission overwrites
-                overwrites = {
-                    guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                    staff_role: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-                    guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
-                }
-                
-                # Add the specific user to the ticket permissions if they exist in the guild
-                if auto_add_user:
-                    overwrites[auto_add_user] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
-                    print(f"✅ Added user {auto_add_user} to ticket permissions")
-                else:
-                    print(f"⚠️ User with ID {auto_add_user_id} not found in guild, but ticket will still be created")
-                
-                try:
-                    ticket_channel = await guild.create_text_channel(
-                        name=f"ticket-{user_id}",
-                        category=category,
-                        overwrites=overwrites
-                    )
-                except discord.HTTPException as e:
-                    print(f"❌ Failed to create ticket channel: {e}")
+                ticket_channel = await open_ticket(self, guild, message.author)
+                if not ticket_channel:
                     return
+                self.message_cache.start(ticket_channel.id)
                 
                 # Send initial message
                 embed = discord.Embed(
@@ -223,8 +499,24 @@ class ModmailBot(commands.Bot):
                 embed.add_field(name="User ID", value=user_id, inline=True)
                 embed.add_field(name="Account Created", value=message.author.created_at.strftime("%Y-%m-%d"), inline=True)
                 
+                # Precomputed on every close, one primary-key lookup here
+                history = self.store.user_history(user_id)
+                if history:
+                    tickets, total_resolution, last_closed, last_reason, last_closer = history
+                    embed.add_field(
+                        name="📁 Ticket History",
+                        value=f"**Prior tickets:** {tickets}\n"
+                              f"**Average resolution:** {format_duration(total_resolution / tickets)}\n"
+                              f"**Last closed:** <t:{int(last_closed)}:R> by <@{last_closer}>\n"
+                              f"**Last reason:** {(last_reason or 'No reason provided')[:200]}",
+                        inline=False
+                    )
+                else:
+                    embed.add_field(name="📁 Ticket History", value="First ticket", inline=False)
+                
                 await ticket_channel.send(embed=embed)
-                self.active_tickets[user_id] = ticket_channel.id
+                self.tickets.open(user_id, ticket_channel)
+                self.assigner.ticket_opened(ticket_channel.id)
                 
                 # Send confirmation to user that ticket was created
                 user_confirmation = discord.Embed(
@@ -242,49 +534,173 @@ class ModmailBot(commands.Bot):
                 await send_dm_safely(message.author, embed=user_confirmation)
             
             # Forward the message to the ticket channel
-            embed = discord.Embed(
-                description=message.content,
-                color=discord.Color.blue(),
-                timestamp=message.created_at
-            )
-            embed.set_author(
-                name=f"{message.author} ({message.author.id})",
-                icon_url=message.author.display_avatar.url
-            )
+            embed = self.build_forward_embed(message.author, message.content, message.created_at)
+            forwarded = await ticket_channel.send(embed=embed)
+            self.message_map.add(message.id, ticket_channel.id, forwarded.id)
+            self.tickets.touch(ticket_channel.id, dm_id=message.id)
             
-            await ticket_channel.send(embed=embed)
-            
-            # Handle attachments
+            # Re-upload attachments, anything that couldn't be is linked instead
             if message.attachments:
+                _, notes = await self.attachments.relay(message.attachments, ticket_channel, content="📎 **Attachments:**")
+                if notes:
+                    await ticket_channel.send("\n".join(notes)[:2000])
+            
+            log.info("Forwarded DM from %s to %s", user_id, ticket_channel.id, extra={"event": "dm_forwarded"})
+            
+        except Exception as e:
+            log.exception("Error handling DM: %s", e, extra={"event": "dm_failed"})
+
+    async def flush_dm_digest(self, user):
+        """Tell a flooding user to slow down once, then forward their buffered messages as one digest"""
+        async with self.work.track():
+            # One notice per throttling episode, not one per digest
+            if self.dm_limiter.should_notify(user.id):
+                notice = discord.Embed(
+                    title="⏳ Slow Down",
+                    description="You're sending messages faster than we can forward them. "
+                                "Nothing is lost - your next messages will be delivered to staff together in a moment.",
+                    color=discord.Color.orange()
+                )
+                if await send_dm_safely(user, embed=notice):
+                    metrics.incr("dm_throttle_notices")
+            
+            await asyncio.sleep(max(self.dm_limiter.wait_time(user.id), 1))
+            messages, throttled = self.dm_limiter.take_digest(user.id)
+            self.submit_dm_digest(user, messages, throttled)
+
+    def submit_dm_digest(self, user, messages, throttled):
+        """Queue a digest behind the user's other DMs, so it can't overtake them or race a ticket being opened"""
+        if not messages:
+            return
+        if not self.dm_dispatcher.submit(messages[0], handler=lambda _: self.forward_dm_digest(user, messages, throttled)):
+            # Queues are full, park the messages one by one like any other DM
+            for message in messages:
+                self.dm_dispatcher.park(message)
+            log.warning("DM queue full, parked digest from %s", user.id, extra={"event": "dm_dispatch_overflow"})
+
+    async def forward_dm_digest(self, user, messages, throttled):
+        """Post buffered messages in the user's ticket as one embed (runs in the user's dispatcher turn)"""
+        log.info("Forwarding digest of %d throttled DMs from %s", throttled, user.id, extra={"event": "dm_digest"})
+        try:
+            guild = self.get_guild(int(os.getenv('GUILD_ID')))
+            ticket_channel = find_ticket_channel(self, guild, user.id)
+            if not ticket_channel:
+                # The ticket was closed meanwhile, the first message opens a new one
+                await self.handle_dm_message(messages[0])
+                messages = messages[1:]
+                throttled -= 1
+                ticket_channel = find_ticket_channel(self, guild, user.id)
+            if not ticket_channel or not messages:
+                return
+            
+            lines = []
+            for message in messages:
+                # The link carries the DM id, edits and deletes find their line by it
+                line = f"{digest_link(message.jump_url, message.id)} {digest_text(message.content)}"
                 for attachment in message.attachments:
-                    await ticket_channel.send(f"📎 **Attachment:** {attachment.url}")
+                    line += f"\n📎 {attachment.url}"
+                lines.append(line)
             
+            embed = self.build_forward_embed(user, "\n".join(lines)[:4000], messages[-1].created_at)
+            embed.title = f"{DIGEST_TITLE_PREFIX} {len(messages)} messages sent while rate limited"
+            forwarded = await ticket_channel.send(embed=embed)
+            for message in messages:
+                self.message_map.add(message.id, ticket_channel.id, forwarded.id)
+                self.tickets.touch(ticket_channel.id, dm_id=message.id)
+            metrics.incr("dm_digests_forwarded")
         except Exception as e:
-            print(f"❌ Error handling DM: {e}")
+            log.exception("Error forwarding DM digest: %s", e, extra={"event": "dm_digest_failed"})
 
-    def is_staff_or_special_user(self, user_id, guild):
-        """Check if user is staff or the special user who can run all commands"""
-        # Always allow the special user
-        if user_id == self.special_user_id:
-            return True
+    def build_forward_embed(self, author, content, timestamp):
+        """Embed used to show a user's DM inside their ticket"""
+        embed = discord.Embed(
+            description=content,
+            color=discord.Color.blue(),
+            timestamp=timestamp
+        )
+        embed.set_author(
+            name=f"{author} ({author.id})",
+            icon_url=author.display_avatar.url
+        )
+        return embed
+
+    async def on_raw_message_edit(self, payload):
+        """Mirror a user's DM edit onto the forwarded ticket message"""
+        if payload.guild_id is not None:
+            self.message_cache.update(payload.message)
+            return
+        before = payload.cached_message or self.dm_cache.get(payload.channel_id, payload.message_id)
+        self.dm_cache.update(payload.message)
+        # Link unfurls and other embed-only updates arrive as edits too, only a new edited_timestamp is the user
+        if "content" not in payload.data or not payload.data.get("edited_timestamp"):
+            return
+        if before is not None and before.content == payload.data["content"]:
+            return
         
-        # Check if user has staff role
-        staff_role_id = os.getenv('STAFF_ROLE')
-        if not staff_role_id:
-            return False
+        mapped = self.message_map.get(payload.message_id)
+        if not mapped:
+            return
         
         try:
-            staff_role = guild.get_role(int(staff_role_id))
-            if not staff_role:
-                return False
+            author_id = int(payload.data["author"]["id"])
+            author = self.get_user(author_id) or await self.fetch_user(author_id)
+            channel = self.get_channel(mapped[0]) or await self.fetch_channel(mapped[0])
+            
+            # Several DMs share one digest message, only the edited one's line changes
+            forwarded = self.message_cache.get(mapped[0], mapped[1]) or await channel.fetch_message(mapped[1])
+            if is_digest(forwarded):
+                embed = forwarded.embeds[0]
+                content = digest_text(payload.data["content"])
+                if rewrite_digest_line(embed, payload.message_id, lambda link, _: f"{link} {content} *(edited)*"):
+                    await forwarded.edit(embed=embed)
+                    metrics.incr("dm_edits_mirrored")
+                return
             
-            member = guild.get_member(user_id)
-            if member and staff_role in member.roles:
-                return True
-        except ValueError:
-            return False
+            embed = self.build_forward_embed(
+                author,
+                payload.data["content"],
+                discord.utils.snowflake_time(payload.message_id)
+            )
+            embed.set_footer(text="✏️ Edited by user")
+            await forwarded.edit(embed=embed)
+            metrics.incr("dm_edits_mirrored")
+        except discord.HTTPException as e:
+            log.warning("Failed to mirror DM edit %s: %s", payload.message_id, e, extra={"event": "dm_edit_failed"})
+
+    async def on_raw_message_delete(self, payload):
+        """Mark the forwarded ticket message when the user deletes their DM"""
+        if payload.guild_id is not None:
+            self.message_cache.remove(payload.channel_id, payload.message_id)
+            return
+        self.dm_cache.remove(payload.channel_id, payload.message_id)
         
-        return False
+        mapped = self.message_map.get(payload.message_id)
+        if not mapped:
+            return
+        
+        try:
+            channel = self.get_channel(mapped[0]) or await self.fetch_channel(mapped[0])
+            forwarded = self.message_cache.get(mapped[0], mapped[1]) or await channel.fetch_message(mapped[1])
+            if not forwarded.embeds:
+                return
+            
+            # Keep the text for staff and transcripts, just flag it as deleted
+            embed = forwarded.embeds[0]
+            if is_digest(forwarded):
+                if rewrite_digest_line(embed, payload.message_id, lambda link, text: f"{link} ~~{text}~~ *(deleted)*"):
+                    await forwarded.edit(embed=embed)
+                    metrics.incr("dm_deletes_mirrored")
+                return
+            embed.color = discord.Color.red()
+            embed.set_footer(text="🗑️ Deleted by user")
+            await forwarded.edit(embed=embed)
+            metrics.incr("dm_deletes_mirrored")
+        except discord.HTTPException as e:
+            log.warning("Failed to mirror DM delete %s: %s", payload.message_id, e, extra={"event": "dm_delete_failed"})
+
+    def is_staff_or_special_user(self, user_id, guild):
+        """Check if user is staff or the special user who can run all commands"""
+        return is_staff_id(self, user_id)
 
     async def check_command_permissions(self, ctx):
         """Check if user can run modmail commands"""
@@ -314,6 +730,8 @@ class ModmailBot(commands.Bot):
                   "• `?a_reply <message>` - Send anonymous reply\n"
                   "• `?close [reason]` - Close a ticket\n"
                   "• `?claim` - Claim a ticket\n"
+                  "• `?block [user] [duration] [reason]` - Block a user from opening tickets\n"
+                  "• `?unblock [user]` - Unblock a user\n"
                   "• `?repair` - Repair bot issues",
             inline=False
         )
@@ -356,10 +774,12 @@ class ModmailBot(commands.Bot):
         # Toggle the whitelist channel ID (set to None to disable, restore to enable)
         if self.whitelist_channel_id == 1400532622161215598:
             self.whitelist_channel_id = None
+            self.watched_channel_ids = set()
             status = "disabled"
             color = discord.Color.red()
         else:
             self.whitelist_channel_id = 1400532622161215598
+            self.watched_channel_ids = {self.whitelist_channel_id}
             status = "enabled"
             color = discord.Color.green()
         
@@ -399,7 +819,29 @@ def get_uptime():
     else:
         return f"{seconds}s"
 
+async def run_standby(bot, token):
+    async with bot:
+        await bot.lease.wait(warm=bot.warm_state)
+        bot.warm_state()
+        await bot.start(token)
+
 # Run the bot
 if __name__ == "__main__":
+    setup_logging()
+    apply_profile()
     bot = ModmailBot()
-    bot.run(os.getenv('DISCORD_TOKEN'))
\ No newline at end of file
+    try:
+        if bot.lease:
+            # Stand by until the lease is free, then connect
+            try:
+                asyncio.run(run_standby(bot, os.getenv('DISCORD_TOKEN')))
+            except KeyboardInterrupt:
+                pass
+        else:
+            # discord.py logs through our queue-based root handler instead of its own
+            bot.run(os.getenv('DISCORD_TOKEN'), log_handler=None)
+    finally:
+        bot.store.close()
+        stop_logging()
+    # A distinct exit code tells the supervisor this was a requested restart
+    sys.exit(bot.exit_code)
\ No newline at end of file
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# config.py reads the environment at import time, give it a throwaway setup before anything imports it
+os.environ.update({
+    "GUILD_ID": "1",
+    "TRANSCRIPT_CHANNEL": "2",
+    "TICKET_CATEGORY": "3",
+    "STAFF_ROLE": "4",
+    "STANDBY_MODE": "1",
+    "STORE_PATH": os.path.join(tempfile.mkdtemp(), "modmail.db"),
+    "LOG_FILE": os.path.join(tempfile.mkdtemp(), "modmail.log"),
+})
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
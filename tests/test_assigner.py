@@ -0,0 +1,84 @@
+"""Auto-assign: least-loaded online staff, oldest ticket first"""
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from config import AUTO_ASSIGN_MAX_CLAIMS
+from utils.assigner import Assigner
+from utils.auth import StaffCache
+from utils.registry import TicketRecord, TicketRegistry
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.sent = []
+
+    async def send(self, content=None, embed=None):
+        self.sent.append(content)
+
+class FakeGuild:
+    def __init__(self, statuses):
+        self.members = {staff_id: SimpleNamespace(id=staff_id, bot=False, status=status, mention=f"<@{staff_id}>")
+                        for staff_id, status in statuses.items()}
+        self.channels = {}
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    def get_channel_or_thread(self, channel_id):
+        return self.channels.setdefault(channel_id, FakeChannel(channel_id))
+
+def make_assigner(statuses, claims=()):
+    staff = StaffCache()
+    staff.members = set(statuses)
+    staff.loaded = True
+    tickets = TicketRegistry()
+    for channel_id, claimer_id in claims:
+        tickets.add(TicketRecord(channel_id - 100, channel_id, claimer_id, created=1.0))
+    assigner = Assigner(SimpleNamespace(staff=staff, tickets=tickets), mode="claim")
+    for staff_id in statuses:
+        assigner.staff_added(staff_id)
+    return assigner, tickets, FakeGuild(statuses)
+
+def open_ticket(assigner, tickets, channel_id, opened_at):
+    tickets.add(TicketRecord(channel_id - 100, channel_id, created=opened_at))
+    assigner.ticket_opened(channel_id, opened_at)
+
+def test_oldest_ticket_goes_to_least_loaded_online_staff():
+    online, offline = discord.Status.online, discord.Status.offline
+    assigner, tickets, guild = make_assigner({11: online, 12: online, 13: offline}, claims=[(301, 11), (302, 11)])
+    open_ticket(assigner, tickets, 402, opened_at=20.0)
+    open_ticket(assigner, tickets, 401, opened_at=10.0)
+    open_ticket(assigner, tickets, 403, opened_at=30.0)
+
+    asyncio.run(assigner.assign(guild))
+
+    # 12 starts empty and takes the two oldest, then ties with 11 at two claims (lower id wins)
+    assert [tickets.claimer_of(c) for c in (401, 402, 403)] == [12, 12, 11]
+    assert tickets.claims_of(13) == 0
+    assert guild.channels[401].sent == ["<@12>"]
+
+def test_stale_entries_are_skipped():
+    assigner, tickets, guild = make_assigner({11: discord.Status.online, 12: discord.Status.online})
+    open_ticket(assigner, tickets, 401, opened_at=10.0)
+    open_ticket(assigner, tickets, 402, opened_at=20.0)
+
+    # Claimed by hand before the assigner got to it, and 11 lost the staff role
+    tickets.claim(401, 12)
+    assigner.claimed(401, 12)
+    assigner.bot.staff.members.discard(11)
+
+    asyncio.run(assigner.assign(guild))
+    assert tickets.claimer_of(402) == 12
+    assert 11 not in assigner.indexed
+    assert 401 not in guild.channels
+
+def test_staff_at_the_claim_limit_are_skipped():
+    claims = [(300 + i, 11) for i in range(AUTO_ASSIGN_MAX_CLAIMS)]
+    assigner, tickets, guild = make_assigner({11: discord.Status.online}, claims=claims)
+    open_ticket(assigner, tickets, 401, opened_at=10.0)
+
+    asyncio.run(assigner.assign(guild))
+    assert tickets.claimer_of(401) is None
+    assert assigner._next_ticket() == (10.0, 401)  # still waiting for someone to free up
@@ -0,0 +1,37 @@
+"""Staff membership cache and permission checks"""
+from types import SimpleNamespace
+
+from config import BOT_OWNER_ID, STAFF_ROLE
+from utils.auth import StaffCache, is_staff_id
+
+def member(member_id, *role_ids):
+    return SimpleNamespace(id=member_id, roles=[SimpleNamespace(id=role_id) for role_id in role_ids])
+
+def test_cache_follows_role_and_member_events():
+    staff = StaffCache()
+    assert not staff.populated
+    role = SimpleNamespace(id=STAFF_ROLE, members=[member(11), member(12)])
+    staff.load(SimpleNamespace(get_role=lambda role_id: role if role_id == STAFF_ROLE else None))
+    assert staff.populated and 11 in staff and len(staff) == 2
+
+    assert staff.member_update(member(13), member(13, STAFF_ROLE))
+    assert not staff.member_update(member(11, STAFF_ROLE), member(11))
+    assert not staff.member_update(member(12, 5), member(12, 5, 6))
+    assert sorted(staff.members) == [12, 13]
+
+    staff.member_remove(member(12))
+    staff.role_deleted(SimpleNamespace(id=STAFF_ROLE + 1))
+    assert sorted(staff.members) == [13]
+    staff.role_deleted(SimpleNamespace(id=STAFF_ROLE))
+    assert len(staff) == 0 and not staff.populated
+
+def test_missing_role_loads_an_empty_cache():
+    staff = StaffCache()
+    staff.load(SimpleNamespace(get_role=lambda role_id: None))
+    assert staff.loaded and not staff.populated
+
+def test_owner_counts_as_staff():
+    bot = SimpleNamespace(staff=StaffCache())
+    bot.staff.members = {11}
+    assert is_staff_id(bot, 11) and is_staff_id(bot, BOT_OWNER_ID)
+    assert not is_staff_id(bot, 12)
@@ -0,0 +1,41 @@
+"""Persistent blocklist"""
+import asyncio
+import time
+
+from utils import blocklist as blocklist_module
+from utils.blocklist import Blocklist
+from utils.store import Store
+
+def test_blocks_survive_a_restart_and_expired_ones_are_dropped(tmp_path, monkeypatch):
+    store = Store(str(tmp_path / "modmail.db"))
+    blocklist = Blocklist(store)
+    blocklist.block(101, reason="spam", blocked_by=7)
+    blocklist.block(102, duration=60)
+    blocklist.block(103, duration=10)
+    assert 101 in blocklist and 102 in blocklist
+
+    assert blocklist.unblock(101)
+    assert not blocklist.unblock(101)
+
+    # Restart 30 seconds later
+    later = time.time() + 30
+    monkeypatch.setattr(blocklist_module.time, "time", lambda: later)
+    restarted = Blocklist(store)
+    assert 101 not in restarted and 103 not in restarted
+    assert 102 in restarted and restarted.expiry[102] == blocklist.expiry[102]
+    assert [row[0] for row in store.all_blocks()] == [102]
+
+def test_timed_block_expires_and_reblock_supersedes_it(tmp_path):
+    async def scenario():
+        blocklist = Blocklist(Store(str(tmp_path / "modmail.db")))
+        blocklist.start()
+        blocklist.block(101, duration=0.05)
+        blocklist.block(102, duration=0.05)
+        blocklist.block(102)  # made permanent, the old expiry must not lift it
+
+        await asyncio.sleep(0.15)
+        assert 101 not in blocklist
+        assert 102 in blocklist
+        blocklist._task.cancel()
+
+    asyncio.run(scenario())
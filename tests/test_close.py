@@ -0,0 +1,78 @@
+"""Ticket close: the ticket goes first, the transcript follows in the background"""
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import discord
+
+import commands.close as close_module
+from commands.close import Close
+from utils.lifecycle import WorkTracker
+from utils.store import Store
+
+class FakeChannel:
+    def __init__(self, channel_id, name="ticket-101", history=()):
+        self.id = channel_id
+        self.name = name
+        self.history_messages = list(history)
+        self.sent = []
+        self.deleted = False
+
+    async def send(self, content=None, embed=None):
+        self.sent.append((content, embed))
+
+    async def delete(self, reason=None):
+        self.deleted = True
+
+class FailingBatcher:
+    def __init__(self, channel):
+        self.channel = channel
+        self.deleted_before_upload = None
+
+    def submit(self, embed, files, summary=None):
+        self.deleted_before_upload = self.channel.deleted
+        future = asyncio.get_running_loop().create_future()
+        future.set_exception(discord.HTTPException(SimpleNamespace(status=500, reason="boom"), "boom"))
+        return future
+
+def message(content):
+    author = SimpleNamespace(display_avatar=SimpleNamespace(url="https://cdn.example/a.png"))
+    return SimpleNamespace(created_at=datetime.now(timezone.utc), author=author, content=content, embeds=[], attachments=[])
+
+def test_close_deletes_ticket_before_transcript_upload(tmp_path, monkeypatch):
+    async def scenario():
+        async def no_sleep(_):
+            pass
+        async def render(channel_name, formats, records):
+            assert [record["content"] for record in records] == ["hi"]
+            return []
+        monkeypatch.setattr(close_module.asyncio, "sleep", no_sleep)
+        monkeypatch.setattr(close_module, "render_transcripts", render)
+
+        ticket = FakeChannel(500, history=[message("hi")])
+        log_channel = FakeChannel(close_module.TRANSCRIPT_CHANNEL, name="transcripts")
+        user = SimpleNamespace(id=101, send=lambda **kwargs: asyncio.sleep(0))
+        bot = SimpleNamespace(
+            store=Store(str(tmp_path / "modmail.db")),
+            work=WorkTracker(),
+            message_cache=SimpleNamespace(history=lambda channel_id: ticket.history_messages, drop=lambda channel_id: None),
+            tickets=SimpleNamespace(remove=lambda channel_id: None),
+            assigner=SimpleNamespace(closed=lambda channel_id, claimer_id: None),
+            transcript_batcher=FailingBatcher(ticket),
+            get_user=lambda user_id: None,
+            get_channel=lambda channel_id: log_channel if channel_id == log_channel.id else None,
+        )
+        payload = {"channel_id": ticket.id, "user_id": user.id, "closer_id": 7, "reason": "done", "stage": "transcript"}
+        job_id = bot.store.add_job("close", payload)
+
+        await Close(bot).run_close(job_id, payload, ticket, user)
+        assert ticket.deleted
+        assert bot.store.pending_jobs("close")[0][2]["stage"] == "upload"
+
+        await bot.work.drain(5)
+        assert bot.transcript_batcher.deleted_before_upload
+        (_, report), = log_channel.sent
+        assert report.title == "❌ Transcript Failed"
+        assert bot.store.pending_jobs("close") == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+"""Per-user DM ordering in the dispatcher, including DMs parked when the queues are full"""
+import asyncio
+from types import SimpleNamespace
+
+import main
+from utils import metrics
+from utils.dispatcher import DMDispatcher
+from utils.lifecycle import WorkTracker
+from utils.store import Store
+
+class FakeBot:
+    """What the dispatcher and replay_parked_dms use, with DMs fetched from a dict"""
+
+    def __init__(self, store):
+        self.store = store
+        self.work = WorkTracker()
+        self.dm_cache = SimpleNamespace(get=lambda channel_id, message_id: None)
+        self.messages = {}
+        self.handled = []
+        self.dm_dispatcher = DMDispatcher(self, self.handle, workers=2, limit=2)
+
+    def get_user(self, user_id):
+        async def fetch_message(message_id):
+            return self.messages[message_id]
+        return SimpleNamespace(dm_channel=SimpleNamespace(id=user_id, fetch_message=fetch_message))
+
+    async def replay_parked_dms(self):
+        await main.ModmailBot.replay_parked_dms(self)
+
+    async def handle(self, message):
+        await asyncio.sleep(0.01)
+        self.handled.append((message.author.id, message.id))
+
+    def receive(self, user_id, message_id):
+        """What on_message does with a DM"""
+        message = SimpleNamespace(id=message_id, author=SimpleNamespace(id=user_id))
+        self.messages[message_id] = message
+        if not self.dm_dispatcher.submit(message):
+            self.dm_dispatcher.park(message)
+
+def test_parked_dms_keep_their_order_under_steady_load(tmp_path):
+    async def scenario():
+        bot = FakeBot(Store(str(tmp_path / "modmail.db")))
+        bot.dm_dispatcher.start()
+        parked_before = metrics.counters["dm_dispatch_parked"]
+
+        # User 2 keeps the queues busy the whole time, so they never drain to empty
+        for message_id in range(1, 11):
+            bot.receive(1, message_id)
+            bot.receive(2, 100 + message_id)
+            await asyncio.sleep(0.004)
+
+        for _ in range(200):
+            if len(bot.handled) == 20 and not bot.store.pending_jobs("forward_dm"):
+                break
+            await asyncio.sleep(0.01)
+
+        assert metrics.counters["dm_dispatch_parked"] > parked_before
+        for user_id in (1, 2):
+            order = [message_id for owner, message_id in bot.handled if owner == user_id]
+            assert order == sorted(order) and len(order) == 10
+        assert not bot.dm_dispatcher.parked_users
+        assert bot.dm_dispatcher.depth == 0 and bot.work.inflight == 0
+
+    asyncio.run(scenario())
+
+def test_users_without_parked_dms_are_not_held_back(tmp_path):
+    async def scenario():
+        bot = FakeBot(Store(str(tmp_path / "modmail.db")))
+        dispatcher = bot.dm_dispatcher
+        dispatcher.parked_users.add(1)
+        assert not dispatcher.submit(SimpleNamespace(id=1, author=SimpleNamespace(id=1)))
+        assert dispatcher.submit(SimpleNamespace(id=2, author=SimpleNamespace(id=2)))
+
+    asyncio.run(scenario())
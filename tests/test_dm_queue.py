@@ -0,0 +1,119 @@
+"""Outbound DM retry queue"""
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from commands.reply import Reply
+from config import DM_RETRY_BASE_DELAY, DM_RETRY_MAX_DELAY
+from utils.dm_queue import DMQueue
+from utils.store import Store
+
+class FakeUser:
+    def __init__(self, user_id, failures=0):
+        self.id = user_id
+        self.mention = f"<@{user_id}>"
+        self.failures = failures
+        self.sent = []
+
+    async def send(self, content=None, embed=None):
+        if self.failures:
+            self.failures -= 1
+            raise discord.HTTPException(SimpleNamespace(status=503, reason="Service Unavailable"), "unavailable")
+        self.sent.append((content, embed))
+
+class FakeChannel:
+    id = 900
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, embed=None):
+        message = SimpleNamespace(id=901 + len(self.sent), channel=self, embeds=[embed])
+        self.sent.append(message)
+        return message
+
+def make_queue(tmp_path, user):
+    bot = SimpleNamespace(get_user=lambda user_id: user, get_channel=lambda channel_id: None)
+    queue = DMQueue(bot, Store(str(tmp_path / "modmail.db")))
+    bot.dm_queue = queue
+    return bot, queue
+
+def test_queued_reply_delivers_attachment_links(tmp_path):
+    async def scenario():
+        user = FakeUser(101)
+        bot, queue = make_queue(tmp_path, user)
+        attachments = [SimpleNamespace(url="https://cdn.example/a.png"), SimpleNamespace(url="https://cdn.example/b.pdf")]
+        ctx = SimpleNamespace(
+            author=SimpleNamespace(mention="<@7>"),
+            message=SimpleNamespace(id=555, attachments=attachments),
+            send=FakeChannel().send,
+        )
+
+        await Reply(bot).queue_retry(ctx, user, discord.Embed(description="hello"), "hello", "Reply")
+        (_, outbox_id), = queue.store.due_outbox(10)
+        await queue._attempt(outbox_id)
+
+        (content, embed), = user.sent
+        assert embed.description == "hello"
+        assert "https://cdn.example/a.png" in content and "https://cdn.example/b.pdf" in content
+        assert queue.store.get_outbox(outbox_id) is None
+
+    asyncio.run(scenario())
+
+def test_backoff_stays_in_the_upper_half_of_a_capped_window(tmp_path):
+    _, queue = make_queue(tmp_path, FakeUser(101))
+    for attempts in range(1, 20):
+        window = min(DM_RETRY_MAX_DELAY, DM_RETRY_BASE_DELAY * 2 ** attempts)
+        for _ in range(20):
+            assert window / 2 <= queue.backoff(attempts) <= window
+
+def test_heap_overflow_is_reloaded_from_the_store(tmp_path):
+    _, queue = make_queue(tmp_path, FakeUser(101))
+    queue.memory_limit = 2
+    for i in range(4):
+        assert queue.enqueue(101, f"reply:{i}", content=str(i))
+    assert not queue.enqueue(101, "reply:0", content="again")  # deduplicated
+
+    assert len(queue.heap) == 2 and queue.overflow
+    queue._load()
+    assert len(queue.heap) == 2 and queue.overflow
+    assert sorted(queue.heap) == [tuple(row) for row in queue.store.due_outbox(2)]
+
+    for _, outbox_id in queue.store.due_outbox(10)[:3]:
+        queue.store.remove_outbox(outbox_id)
+    queue._load()
+    assert len(queue.heap) == 1 and not queue.overflow
+
+def test_permanent_failure_gives_up_at_once(tmp_path):
+    async def scenario():
+        user = FakeUser(101)
+        async def closed_dms(content=None, embed=None):
+            raise discord.Forbidden(SimpleNamespace(status=403, reason="Forbidden"), "Cannot send messages to this user")
+        user.send = closed_dms
+        _, queue = make_queue(tmp_path, user)
+        queue.enqueue(101, "close:1", content="closed")
+        (_, outbox_id), = queue.store.due_outbox(10)
+
+        await queue._attempt(outbox_id)
+        assert queue.store.get_outbox(outbox_id) is None
+
+    asyncio.run(scenario())
+
+def test_transient_failure_is_rescheduled(tmp_path):
+    async def scenario():
+        user = FakeUser(101, failures=1)
+        _, queue = make_queue(tmp_path, user)
+        queue.enqueue(101, "close:1", content="closed")
+        (_, outbox_id), = queue.store.due_outbox(10)
+        queue.heap.clear()
+
+        await queue._attempt(outbox_id)
+        _, _, _, attempts = queue.store.get_outbox(outbox_id)
+        assert attempts == 2 and [entry[1] for entry in queue.heap] == [outbox_id]
+
+        await queue._attempt(outbox_id)
+        assert user.sent == [("closed", None)]
+        assert queue.store.get_outbox(outbox_id) is None
+
+    asyncio.run(scenario())
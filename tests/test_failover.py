@@ -0,0 +1,166 @@
+"""Standby takeover against a fake gateway: no DM to an open ticket may be lost or forwarded twice"""
+import asyncio
+from datetime import timedelta
+
+import discord
+import pytest
+
+import main
+from utils.registry import TicketRecord
+from utils.store import Store
+
+HEARTBEAT = 0.05
+TTL = 0.3
+
+class FakeUser:
+    bot = False
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self.dm_channel = FakeDMChannel(self)
+
+class FakeMessage:
+    def __init__(self, message_id, author, content):
+        self.id = message_id
+        self.author = author
+        self.content = content
+        self.channel = author.dm_channel
+
+class FakeDMChannel:
+    def __init__(self, user):
+        self.id = user.id + 1
+        self.messages = []
+
+    async def history(self, limit=None, after=None, before=None, oldest_first=False):
+        matching = [m for m in self.messages
+                    if (after is None or m.id > after.id) and (before is None or m.id < before.id)]
+        matching.sort(key=lambda m: m.id, reverse=not oldest_first)
+        for message in matching[:limit]:
+            yield message
+
+class FakeGateway:
+    """Delivers DMs to whichever bot is connected, the DM channel history keeps them regardless"""
+
+    def __init__(self, start):
+        self.clock = start
+        self.users = {}
+        self.connected = None
+        self.forwarded = []  # DM ids in the order they reached a ticket
+
+    def user(self, user_id):
+        return self.users.setdefault(user_id, FakeUser(user_id))
+
+    def now(self):
+        self.clock += timedelta(seconds=1)
+        return self.clock
+
+    async def connect(self, bot):
+        self.connected = bot
+        bot.get_user = self.users.get
+        bot.dm_dispatcher.submit = lambda message: self.forward(bot, message)
+        await bot.on_connect()
+        bot._connected_at = self.now()  # the gateway's clock stands in for utcnow
+
+    def send_dm(self, user_id, content, deliver=True):
+        author = self.user(user_id)
+        message = FakeMessage(discord.utils.time_snowflake(self.now()), author, content)
+        author.dm_channel.messages.append(message)
+        if deliver and self.connected:
+            self.connected.dm_dispatcher.submit(message)
+        return message
+
+    def forward(self, bot, message):
+        """The bookkeeping handle_dm_message does once a DM is posted in the ticket"""
+        record = bot.tickets.for_owner(message.author.id)
+        bot.message_map.add(message.id, record.channel_id, message.id + 1)
+        bot.tickets.touch(record.channel_id, dm_id=message.id)
+        self.forwarded.append(message.id)
+        return True
+
+@pytest.fixture
+def store_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "modmail.db")
+    monkeypatch.setattr(main, "Store", lambda: Store(path))
+    return path
+
+def make_bot(holder):
+    bot = main.ModmailBot()
+    bot.lease.holder = holder
+    bot.lease.ttl = TTL
+    bot.lease.heartbeat = HEARTBEAT
+    return bot
+
+def test_standby_takeover_loses_no_dms(store_path):
+    async def scenario():
+        gateway = FakeGateway(discord.utils.utcnow() - timedelta(hours=1))
+        leader = make_bot("leader")
+        assert leader.lease.try_acquire()
+        for owner_id, channel_id in ((101, 201), (102, 202)):
+            leader.tickets.add(TicketRecord(owner_id, channel_id))
+        await gateway.connect(leader)
+        heartbeat = asyncio.create_task(leader.lease.keep(on_beat=leader.flush_state))
+
+        standby = make_bot("standby")
+        takeover = asyncio.create_task(standby.lease.wait(warm=standby.warm_state))
+
+        sent = [gateway.send_dm(101, "first"), gateway.send_dm(102, "second")]
+        await asyncio.sleep(HEARTBEAT * 3)
+        assert not takeover.done()
+
+        # The leader dies: it stops renewing, a DM it received is never forwarded, and another
+        # one arrives while nothing is connected
+        heartbeat.cancel()
+        gateway.connected = None
+        sent.append(gateway.send_dm(101, "lost in flight", deliver=False))
+        sent.append(gateway.send_dm(102, "sent during the gap", deliver=False))
+
+        await asyncio.wait_for(takeover, TTL * 4)
+        standby.warm_state()
+        await gateway.connect(standby)
+        sent.append(gateway.send_dm(101, "after reconnect"))
+        await standby.catch_up_dms()
+
+        assert sorted(gateway.forwarded) == sorted(m.id for m in sent)
+        leader.store.close()
+        standby.store.close()
+
+    asyncio.run(scenario())
+
+def test_clean_shutdown_hands_over_immediately(store_path):
+    async def scenario():
+        leader = make_bot("leader")
+        standby = make_bot("standby")
+        assert leader.lease.try_acquire()
+        assert not standby.lease.try_acquire()
+
+        leader.lease.release()
+        assert standby.lease.try_acquire()
+        leader.store.close()
+        standby.store.close()
+
+    asyncio.run(scenario())
+
+def test_fenced_leader_stops_writing_state(store_path):
+    async def scenario():
+        leader = make_bot("leader")
+        standby = make_bot("standby")
+        assert leader.lease.try_acquire()
+        leader.tickets.add(TicketRecord(101, 201))
+        leader.flush_state()
+
+        # The leader stalls past the TTL, the standby takes over and the leader notices on its next beat
+        await asyncio.sleep(TTL + HEARTBEAT)
+        assert standby.lease.try_acquire()
+        await leader.lease.keep(on_lost=leader.lease_lost)
+        assert leader._fenced
+        assert leader.exit_code == main.RESTART_EXIT_CODE
+        await asyncio.sleep(0.05)  # let the shutdown that lease_lost started run
+        assert leader.is_closed()
+
+        leader.tickets.remove(201)
+        leader.flush_state()
+        assert [row[1] for row in standby.store.get('tickets')] == [201]
+        leader.store.close()
+        standby.store.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,41 @@
+"""Structured logging: JSON lines, sampling and repeated-error suppression"""
+import json
+import logging
+
+from utils import logger
+from utils.logger import JsonFormatter, RepeatedErrorFilter, SamplingFilter
+
+def record(level=logging.INFO, msg="Forwarded %s", args=(1,), event=None, name="main"):
+    entry = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    if event:
+        entry.event = event
+    return entry
+
+def test_json_formatter_writes_one_object_per_record():
+    line = JsonFormatter().format(record(event="dm_forwarded"))
+    entry = json.loads(line)
+    assert entry["event"] == "dm_forwarded" and entry["msg"] == "Forwarded 1" and entry["level"] == "INFO"
+    assert "\n" not in line
+
+def test_sampling_only_applies_below_warning(monkeypatch):
+    sampler = SamplingFilter({"dm_forwarded": 0.1})
+    monkeypatch.setattr(logger.random, "random", lambda: 0.5)
+    assert not sampler.filter(record(event="dm_forwarded"))
+    assert sampler.filter(record(level=logging.WARNING, event="dm_forwarded"))
+    assert sampler.filter(record(event="ticket_opened"))
+
+def test_repeated_errors_are_suppressed_and_counted(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(logger.time, "monotonic", lambda: now[0])
+    errors = RepeatedErrorFilter(window=60)
+
+    assert errors.filter(record(logging.ERROR, "Send failed: %s", ("a",)))
+    assert not errors.filter(record(logging.ERROR, "Send failed: %s", ("b",)))
+    assert not errors.filter(record(logging.ERROR, "Send failed: %s", ("c",)))
+    assert errors.filter(record(logging.ERROR, "Other failure", ()))
+    assert errors.filter(record(logging.INFO, "Send failed: %s", ("d",)))
+
+    now[0] += 61
+    next_error = record(logging.ERROR, "Send failed: %s", ("e",))
+    assert errors.filter(next_error)
+    assert json.loads(JsonFormatter().format(next_error))["suppressed"] == 2
@@ -0,0 +1,50 @@
+"""Per-channel message cache"""
+from types import SimpleNamespace
+
+from utils.message_cache import MessageCache
+
+def message(channel_id, message_id):
+    return SimpleNamespace(id=message_id, channel=SimpleNamespace(id=channel_id))
+
+def test_history_only_while_complete():
+    cache = MessageCache(per_channel=3, max_channels=10)
+    cache.start(1)
+    for message_id in (12, 10, 11):
+        cache.add(message(1, message_id))
+    assert [m.id for m in cache.history(1)] == [10, 11, 12]
+
+    # Started part-way through a conversation, the cache can't vouch for the history
+    cache.add(message(2, 20))
+    assert cache.history(2) is None
+
+    # Evicting a message from a channel makes its history incomplete
+    cache.add(message(1, 13))
+    assert cache.history(1) is None
+    assert cache.get(1, 12) is None  # oldest by arrival, not by id
+    assert cache.get(1, 13).id == 13 and len(cache) == 4
+
+def test_least_recently_active_channel_is_evicted():
+    cache = MessageCache(per_channel=5, max_channels=2)
+    cache.start(1)
+    cache.add(message(1, 10))
+    cache.add(message(2, 20))
+    cache.add(message(1, 11))  # channel 1 is now the most recent
+    cache.add(message(3, 30))
+
+    assert 2 not in cache and 1 in cache and 3 in cache
+    assert [m.id for m in cache.history(1)] == [10, 11]
+
+    cache.drop(1)
+    assert 1 not in cache and cache.history(1) is None
+
+def test_update_and_remove_only_touch_cached_messages():
+    cache = MessageCache(per_channel=5, max_channels=5)
+    cache.add(message(1, 10))
+    edited = message(1, 10)
+    cache.update(edited)
+    cache.update(message(1, 99))
+    assert cache.get(1, 10) is edited and cache.get(1, 99) is None
+
+    cache.remove(1, 10)
+    cache.remove(7, 10)
+    assert cache.get(1, 10) is None
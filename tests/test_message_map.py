@@ -0,0 +1,52 @@
+"""DM id -> forwarded ticket message map"""
+import discord
+
+from utils.message_map import MessageMap
+from utils.store import Store
+
+def recent_id(offset=0):
+    return discord.utils.time_snowflake(discord.utils.utcnow()) + offset
+
+def test_lookup_in_memory_and_after_spill(tmp_path):
+    store = Store(str(tmp_path / "modmail.db"))
+    message_map = MessageMap(store, capacity=4)
+    base = recent_id()
+    for i in range(5):
+        message_map.add(base + i, 900 + i, 800 + i)
+
+    # Passing the capacity spilled the oldest half to the store
+    assert len(message_map) == 3
+    assert list(message_map.dm_ids) == [base + 2, base + 3, base + 4]
+    assert message_map.get(base + 4) == (904, 804)
+    assert tuple(message_map.get(base)) == (900, 800)
+    assert message_map.get(base + 10) is None
+
+def test_out_of_order_add_keeps_ids_sorted(tmp_path):
+    message_map = MessageMap(Store(str(tmp_path / "modmail.db")), capacity=10)
+    base = recent_id()
+    for offset in (0, 5, 2):
+        message_map.add(base + offset, 900, 800 + offset)
+    message_map.add(base + 2, 901, 899)  # replayed DM, replaces the entry
+
+    assert list(message_map.dm_ids) == [base, base + 2, base + 5]
+    assert message_map.get(base + 2) == (901, 899)
+
+def test_save_writes_only_new_entries_and_late_ones_below_the_watermark(tmp_path):
+    store = Store(str(tmp_path / "modmail.db"))
+    message_map = MessageMap(store, capacity=10)
+    base = recent_id()
+    message_map.add(base + 1, 900, 801)
+    message_map.add(base + 3, 900, 803)
+    message_map.save()
+    assert message_map.saved_upto == base + 3
+
+    # Added under the watermark: written straight away, save() would skip it
+    message_map.add(base + 2, 900, 802)
+    assert tuple(store.lookup_message_map(base + 2)) == (900, 802)
+
+    message_map.add(base + 4, 900, 804)
+    assert store.lookup_message_map(base + 4) is None
+    message_map.save()
+
+    restarted = MessageMap(store, capacity=10)
+    assert [tuple(restarted.get(base + i)) for i in range(1, 5)] == [(900, 800 + i) for i in range(1, 5)]
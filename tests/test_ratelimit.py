@@ -0,0 +1,91 @@
+"""Per-user DM token buckets, digests and throttle notices"""
+from types import SimpleNamespace
+
+import pytest
+
+from utils import ratelimit
+from utils.ratelimit import UserRateLimiter
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+def dm(user_id, message_id=1):
+    return SimpleNamespace(id=message_id, author=SimpleNamespace(id=user_id))
+
+def test_throttle_notice_once_per_cooldown(clock):
+    limiter = UserRateLimiter(rate=0.5, burst=1, notice_cooldown=60)
+    assert limiter.allow(1)
+    assert not limiter.allow(1)
+    assert limiter.should_notify(1)
+
+    # Spamming on through several digest flushes gets no further notices
+    for _ in range(5):
+        clock.now += 2
+        assert not limiter.should_notify(1)
+
+    clock.now += 60
+    assert limiter.should_notify(1)
+
+def test_notice_state_is_evicted_with_the_bucket(clock):
+    limiter = UserRateLimiter(rate=1, burst=1, max_users=2, idle_seconds=1000)
+    limiter.allow(1)
+    limiter.should_notify(1)
+    limiter.allow(2)
+    limiter.allow(3)
+    assert 1 not in limiter.buckets and 1 not in limiter.notified
+
+def test_bucket_refills_at_the_rate_up_to_the_burst(clock):
+    limiter = UserRateLimiter(rate=0.5, burst=2)
+    assert limiter.allow(1) and limiter.allow(1)
+    assert not limiter.allow(1)
+    assert limiter.wait_time(1) == pytest.approx(2.0)
+
+    clock.now += 2
+    assert limiter.allow(1)
+    assert not limiter.allow(1)
+
+    # A long pause refills to the burst, never past it
+    clock.now += 100
+    assert limiter.allow(1) and limiter.allow(1)
+    assert not limiter.allow(1)
+    assert limiter.allow(2)  # other users have their own bucket
+
+def test_digest_holds_throttled_messages_until_taken(clock):
+    limiter = UserRateLimiter(rate=1, burst=1, digest_max=3)
+    assert limiter.allow(1)
+    assert limiter.buffer(dm(1, 10))
+    assert not limiter.buffer(dm(1, 11))
+
+    # With a digest pending the user stays throttled even once tokens are back
+    clock.now += 10
+    assert not limiter.allow(1)
+    limiter.buffer(dm(1, 12))
+    assert limiter.digest_full(1)
+
+    messages, throttled = limiter.drain_digest(1)
+    assert [m.id for m in messages] == [10, 11, 12] and throttled == 3
+    assert not limiter.digest_full(1) and not limiter.allow(1)
+
+    limiter.buffer(dm(1, 13))
+    messages, throttled = limiter.take_digest(1)
+    assert [m.id for m in messages] == [13] and throttled == 1
+    assert 1 not in limiter.digests
+
+def test_idle_buckets_are_evicted_unless_a_digest_is_pending(clock):
+    limiter = UserRateLimiter(rate=1, burst=1, max_users=10, idle_seconds=60)
+    limiter.allow(1)
+    limiter.allow(2)
+    limiter.buffer(dm(2))
+    clock.now += 61
+    limiter.allow(3)
+    assert list(limiter.buckets) == [2, 3]
@@ -0,0 +1,61 @@
+"""Startup sweep of stored ticket state"""
+import asyncio
+from types import SimpleNamespace
+
+from config import BOT_OWNER_ID
+from utils.auth import StaffCache
+from utils.reconcile import Reconciler
+from utils.registry import TicketRecord, TicketRegistry
+
+def make_bot(staff_ids, loaded=True):
+    staff = StaffCache()
+    staff.members = set(staff_ids)
+    staff.loaded = loaded
+    tickets = TicketRegistry()
+    tickets.add(TicketRecord(101, 201, claimer_id=11))           # claimed by staff
+    tickets.add(TicketRecord(102, 202, claimer_id=12))           # claimer lost the role
+    tickets.add(TicketRecord(103, 203, claimer_id=BOT_OWNER_ID)) # the owner counts as staff
+    return SimpleNamespace(staff=staff, tickets=tickets, category_pool=SimpleNamespace(channels=[]))
+
+def guild():
+    # Every ticket channel still exists (outside the categories, so nothing is adopted)
+    return SimpleNamespace(get_channel=lambda channel_id: None,
+                           get_channel_or_thread=lambda channel_id: SimpleNamespace(id=channel_id))
+
+def test_sweep_releases_only_claims_of_former_staff():
+    bot = make_bot({11})
+    report = Reconciler(bot).sweep(guild())
+    assert report["released"] == 1
+    assert [bot.tickets.claimer_of(c) for c in (201, 202, 203)] == [11, None, BOT_OWNER_ID]
+
+def test_sweep_keeps_claims_without_a_staff_list():
+    bot = make_bot(set())
+    report = Reconciler(bot).sweep(guild())
+    assert report["released"] == 0
+    assert bot.tickets.claimed_count == 3
+
+class FakeThread:
+    def __init__(self, thread_id, locked=False):
+        self.id = thread_id
+        self.locked = locked
+        self.edits = []
+
+    async def edit(self, **kwargs):
+        self.edits.append(kwargs)
+
+def test_auto_archived_ticket_thread_is_reopened():
+    bot = make_bot({11})
+    bot.message_cache = SimpleNamespace(drop=lambda channel_id: None)
+    bot.assigner = SimpleNamespace(closed=lambda channel_id, claimer_id: None)
+    reconciler = Reconciler(bot)
+
+    idle = FakeThread(201)
+    asyncio.run(reconciler.thread_archived(idle))
+    assert idle.edits == [{"archived": False, "reason": "Ticket is still open"}]
+    assert 201 in bot.tickets
+
+    # Archived and locked by hand is a close, not inactivity
+    locked = FakeThread(202, locked=True)
+    asyncio.run(reconciler.thread_archived(locked))
+    assert locked.edits == []
+    assert 202 not in bot.tickets
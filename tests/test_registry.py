@@ -0,0 +1,32 @@
+"""Ticket registry indexes and stored rows"""
+from types import SimpleNamespace
+
+from utils.registry import TicketRecord, TicketRegistry
+
+def test_claim_counts_follow_claims_and_removal():
+    tickets = TicketRegistry()
+    for channel_id in (201, 202, 203):
+        tickets.open(channel_id - 100, SimpleNamespace(id=channel_id))
+    tickets.claim(201, 11)
+    tickets.claim(202, 11)
+    tickets.claim(202, 12)  # moved to another staff member
+    assert (tickets.claims_of(11), tickets.claims_of(12), tickets.claimed_count) == (1, 1, 2)
+
+    record = tickets.remove(201)
+    assert record.claimer_id == 11
+    assert tickets.claims_of(11) == 0 and 11 not in tickets.by_claimer
+    assert (tickets.claimed_count, tickets.unclaimed_count) == (1, 1)
+
+def test_load_reads_current_and_older_rows():
+    rows = [
+        TicketRecord(101, 201, 11, 1000.0, 555).to_row(),
+        [102, 202, 900, 12, 2000.0, 2100.0, 3, 2, 666],  # before the write-only columns were dropped
+        [103, 203, 900, None, 3000.0, 3100.0, 1, 0],     # before the catch-up cursor existed
+    ]
+    tickets = TicketRegistry()
+    tickets.load(SimpleNamespace(get=lambda key, default=None: rows if key == "tickets" else default))
+
+    assert [(r.owner_id, r.claimer_id, r.created, r.last_dm_id) for r in tickets] == [
+        (101, 11, 1000.0, 555), (102, 12, 2000.0, 666), (103, None, 3000.0, None)
+    ]
+    assert tickets.claimed_count == 2
@@ -0,0 +1,60 @@
+"""Bulk role changes"""
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from commands.role import RoleCommand
+
+class FakeMember:
+    active = 0
+    peak = 0
+
+    def __init__(self, member_id, fail=False):
+        self.id = member_id
+        self.mention = f"<@{member_id}>"
+        self.fail = fail
+
+    async def _edit(self):
+        FakeMember.active += 1
+        FakeMember.peak = max(FakeMember.peak, FakeMember.active)
+        await asyncio.sleep(0.01)
+        FakeMember.active -= 1
+        if self.fail:
+            raise discord.HTTPException(SimpleNamespace(status=403, reason="Forbidden"), "Missing Permissions")
+
+    async def add_roles(self, role, reason=None):
+        await self._edit()
+
+    async def remove_roles(self, role, reason=None):
+        await self._edit()
+
+class FakeProgress:
+    def __init__(self):
+        self.edits = 0
+
+    async def edit(self, embed=None):
+        self.edits += 1
+
+def test_bulk_changes_run_with_bounded_concurrency():
+    async def scenario():
+        cog = RoleCommand(SimpleNamespace())
+        cog.bulk_progress_interval = 0.005
+        jobs = [(FakeMember(i, fail=i == 4), "add" if i % 2 else "remove") for i in range(10)]
+        progress = FakeProgress()
+        ctx = SimpleNamespace(author="owner")
+
+        added, removed, failed = await cog.run_bulk(ctx, SimpleNamespace(name="Trial"), "toggle", jobs, progress, 0)
+
+        assert FakeMember.peak == cog.bulk_concurrency
+        assert sorted(m.id for m in added) == [1, 3, 5, 7, 9]
+        assert sorted(m.id for m in removed) == [0, 2, 6, 8]
+        assert [m.id for m, _ in failed] == [4]
+        assert progress.edits >= 1
+
+    asyncio.run(scenario())
+
+def test_member_list_summarises_past_the_limit():
+    cog = RoleCommand(SimpleNamespace())
+    members = [FakeMember(i) for i in range(25)]
+    assert cog.member_list(members).endswith("<@19> and 5 more")
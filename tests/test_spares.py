@@ -0,0 +1,58 @@
+"""Spare ticket channel pool"""
+import asyncio
+from types import SimpleNamespace
+
+from utils.spares import SpareChannelPool
+
+class Role:
+    def __init__(self, role_id):
+        self.id = role_id
+
+class FakeGuild:
+    def __init__(self, names):
+        self.created = []
+        self.channels = {}
+        for i, (name, last_message_id) in enumerate(names):
+            self.channels[300 + i] = SimpleNamespace(id=300 + i, name=name, last_message_id=last_message_id)
+        self.category = SimpleNamespace(id=1, text_channels=list(self.channels.values()))
+        self.default_role = Role(0)
+        self.me = Role(2)
+
+    def get_channel(self, channel_id):
+        return self.category if channel_id == 1 else self.channels.get(channel_id)
+
+    def get_role(self, role_id):
+        return Role(role_id)
+
+    def get_member(self, member_id):
+        return None
+
+    async def create_text_channel(self, name, **kwargs):
+        channel = SimpleNamespace(id=400 + len(self.created), name=name)
+        self.created.append(channel)
+        return channel
+
+def test_new_spares_are_numbered_after_existing_ones():
+    async def scenario():
+        async def acquire(guild):
+            return guild.category
+        guild = FakeGuild([("spare-3", None), ("spare-7", 555), ("ticket-101", 556)])
+        bot = SimpleNamespace(
+            tickets=set(), special_user_id=None, is_closed=lambda: False,
+            category_pool=SimpleNamespace(channels={1: set()}, acquire=acquire, release=lambda *args: None),
+        )
+        pool = SpareChannelPool(bot, size=3, refill_interval=0)
+
+        await pool.reconcile(guild)
+        assert list(pool.spares) == [300]  # spare-7 holds a conversation
+        for _ in range(50):
+            if len(guild.created) == 2 or pool._task.done():
+                break
+            await asyncio.sleep(0)
+        if pool._task.done():
+            pool._task.result()
+        pool._task.cancel()
+
+        assert [channel.name for channel in guild.created] == ["spare-8", "spare-9"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,221 @@
+import discord
+import asyncio
+import heapq
+import logging
+import time
+from collections import deque
+from config import (
+    AUTO_ASSIGN_MODE, AUTO_ASSIGN_MAX_CLAIMS, AUTO_ASSIGN_REPLY_WEIGHT,
+    AUTO_ASSIGN_REPLY_WINDOW, AUTO_ASSIGN_INTERVAL, MODMAIL_EMBED_COLOR, BOT_OWNER_ID
+)
+from utils import metrics
+from utils.auth import is_staff_id
+from utils.tickets import add_ticket_member
+
+log = logging.getLogger(__name__)
+
+class Assigner:
+    """Hands unclaimed tickets to the least-loaded online staff member, oldest ticket first.
+
+    Both queues are heaps with lazy deletion: stale entries are skipped (or re-pushed with
+    their current load) when they reach the top, so every event costs O(log n).
+    """
+
+    def __init__(self, bot, mode=AUTO_ASSIGN_MODE):
+        self.bot = bot
+        self.mode = mode  # "off", "claim" or "ping"
+        self.waiting = []  # (opened_at, channel_id) of unclaimed tickets
+        self.queued = {}  # channel_id -> opened_at, the live entries in self.waiting
+        self.loads = []  # (load, staff_id) index, entries may be stale
+        self.indexed = {}  # staff_id -> load of their live entry in self.loads
+        self.replies = {}  # staff_id -> deque of recent reply times
+        self._wake = asyncio.Event()
+        self._task = None
+
+    @property
+    def enabled(self):
+        return self.mode in ("claim", "ping")
+
+    def load(self, staff_id):
+        """Current load of a staff member: open claims plus weighted replies inside the window"""
+        recent = self.replies.get(staff_id)
+        if recent:
+            cutoff = time.time() - AUTO_ASSIGN_REPLY_WINDOW
+            while recent and recent[0] < cutoff:
+                recent.popleft()
+        return self.bot.tickets.claims_of(staff_id) + AUTO_ASSIGN_REPLY_WEIGHT * len(recent or ())
+
+    def _push_load(self, staff_id):
+        load = self.load(staff_id)
+        self.indexed[staff_id] = load
+        heapq.heappush(self.loads, (load, staff_id))
+        if len(self.loads) > 2 * len(self.indexed) + 64:
+            # Too many superseded entries, rebuild from the live ones
+            self.loads = [(load, staff_id) for staff_id, load in self.indexed.items()]
+            heapq.heapify(self.loads)
+
+    def start(self, guild):
+        """Seed the queues from the tickets and claims that already exist"""
+        if not self.enabled:
+            return
+
+        self.loads = []
+        self.indexed = {}
+        for staff_id in self.bot.staff.members | {BOT_OWNER_ID}:
+            member = guild.get_member(staff_id)
+            if member and not member.bot:
+                self._push_load(staff_id)
+
+        self.waiting = []
+        self.queued = {}
+        for record in self.bot.tickets:
+            if record.claimer_id is None:
+                self.queued[record.channel_id] = record.created
+                self.waiting.append((record.created, record.channel_id))
+        heapq.heapify(self.waiting)
+
+        log.info("Auto-assign (%s) tracking %d staff and %d unclaimed tickets", self.mode, len(self.loads), len(self.waiting),
+                 extra={"event": "assigner_started"})
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(guild))
+        self._wake.set()
+
+    # Events
+
+    def ticket_opened(self, channel_id, opened_at=None):
+        if not self.enabled or channel_id in self.queued:
+            return
+        self.queued[channel_id] = opened_at or time.time()
+        heapq.heappush(self.waiting, (self.queued[channel_id], channel_id))
+        self._wake.set()
+
+    def claimed(self, channel_id, staff_id):
+        if not self.enabled:
+            return
+        self.queued.pop(channel_id, None)
+        self._push_load(staff_id)
+
+    def unclaimed(self, channel_id, staff_id, opened_at):
+        """Release a claim and put the ticket back in line at its original position"""
+        if not self.enabled:
+            return
+        self._push_load(staff_id)
+        self.ticket_opened(channel_id, opened_at)
+
+    def closed(self, channel_id, staff_id=None):
+        if not self.enabled:
+            return
+        self.queued.pop(channel_id, None)
+        if staff_id is not None:
+            self._push_load(staff_id)
+            self._wake.set()
+
+    def replied(self, staff_id):
+        if not self.enabled:
+            return
+        self.replies.setdefault(staff_id, deque()).append(time.time())
+        self._push_load(staff_id)
+
+    def staff_added(self, staff_id):
+        if self.enabled:
+            self._push_load(staff_id)
+            self._wake.set()
+
+    # Decisions
+
+    def _pick_staff(self, guild):
+        """Pop the least-loaded online staff member below the claim limit, or None"""
+        skipped = []
+        picked = None
+        while self.loads:
+            load, staff_id = heapq.heappop(self.loads)
+            if self.indexed.get(staff_id) != load:
+                continue  # superseded by a newer entry
+            current = self.load(staff_id)
+            if current != load:
+                # Recent replies aged out since the entry was pushed
+                self._push_load(staff_id)
+                continue
+            member = guild.get_member(staff_id)
+            if not member or not is_staff_id(self.bot, staff_id):
+                del self.indexed[staff_id]  # no longer staff
+                continue
+            skipped.append((load, staff_id))
+            if member.status == discord.Status.offline or self.bot.tickets.claims_of(staff_id) >= AUTO_ASSIGN_MAX_CLAIMS:
+                continue
+            picked = member
+            break
+        for entry in skipped:
+            heapq.heappush(self.loads, entry)
+        return picked
+
+    def _next_ticket(self):
+        """Oldest still-unclaimed ticket, without removing it"""
+        while self.waiting:
+            opened_at, channel_id = self.waiting[0]
+            record = self.bot.tickets.get(channel_id)
+            if self.queued.get(channel_id) == opened_at and record and record.claimer_id is None:
+                return opened_at, channel_id
+            heapq.heappop(self.waiting)
+        return None
+
+    async def assign(self, guild):
+        """Hand out waiting tickets until nobody is free"""
+        while (entry := self._next_ticket()) is not None:
+            opened_at, channel_id = entry
+            channel = guild.get_channel_or_thread(channel_id)
+            if not channel:
+                heapq.heappop(self.waiting)
+                self.queued.pop(channel_id, None)
+                continue
+
+            member = self._pick_staff(guild)
+            if not member:
+                return
+
+            heapq.heappop(self.waiting)
+            del self.queued[channel_id]
+            waited = int(time.time() - opened_at)
+
+            if self.mode == "claim":
+                self.bot.tickets.claim(channel_id, member.id)
+                self.claimed(channel_id, member.id)
+                embed = discord.Embed(
+                    title="📌 Ticket Auto-Assigned",
+                    description=f"{member.mention} has been assigned this ticket",
+                    color=MODMAIL_EMBED_COLOR,
+                    timestamp=discord.utils.utcnow()
+                )
+                embed.add_field(name="Waiting for", value=f"{waited // 60}m {waited % 60}s", inline=True)
+                embed.add_field(name="Open claims", value=str(self.bot.tickets.claims_of(member.id)), inline=True)
+                metrics.incr("tickets_auto_claimed")
+            else:
+                # Count the ping as activity so the next ticket goes to someone else
+                self.replied(member.id)
+                embed = discord.Embed(
+                    title="🔔 Ticket Waiting",
+                    description=f"{member.mention}, this ticket has been waiting {waited // 60}m {waited % 60}s - "
+                                f"use `?claim` to take it",
+                    color=0xffaa00
+                )
+                metrics.incr("tickets_auto_pinged")
+
+            await add_ticket_member(channel, member)
+            try:
+                await channel.send(content=member.mention, embed=embed)
+            except discord.HTTPException as e:
+                log.warning("Failed to announce assignment in %s: %s", channel_id, e, extra={"event": "assign_announce_failed"})
+            log.info("Assigned ticket %s to %s (%s)", channel_id, member.id, self.mode, extra={"event": "ticket_assigned"})
+
+    async def _run(self, guild):
+        """Assign on every wake-up, and periodically in case someone came online"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=AUTO_ASSIGN_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.assign(guild)
+            except Exception as e:
+                log.exception("Auto-assign pass failed: %s", e, extra={"event": "assign_failed"})
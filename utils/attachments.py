@@ -0,0 +1,127 @@
+import discord
+import asyncio
+import hashlib
+import logging
+import tempfile
+from collections import OrderedDict
+import aiohttp
+from config import (
+    ATTACHMENT_CONCURRENCY, ATTACHMENT_MAX_BYTES, ATTACHMENT_SPOOL_BYTES, ATTACHMENT_DEDUP_ENTRIES
+)
+from utils import metrics
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+MAX_FILES_PER_MESSAGE = 10
+
+def format_bytes(size):
+    return f"{size / (1024 * 1024):.1f} MB" if size >= 1024 * 1024 else f"{size / 1024:.0f} KB"
+
+class AttachmentRelay:
+    """Re-uploads attachments from the CDN so they outlive the original (expiring) links.
+
+    Files are streamed through a spooled buffer that moves to disk past ATTACHMENT_SPOOL_BYTES,
+    hashed on the way, and skipped if the same content already went to the same destination.
+    """
+
+    def __init__(self, concurrency=ATTACHMENT_CONCURRENCY, max_bytes=ATTACHMENT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.sent = OrderedDict()  # (destination id, sha256) -> jump url of the message holding the copy
+        self._session = None
+
+    async def session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120))
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    async def relay(self, attachments, destination, content=None):
+        """Send attachments to a channel or user as one message.
+
+        Returns (sent message or None, notes), where notes explain anything that wasn't re-uploaded.
+        """
+        notes = []
+        downloads = []
+        for attachment in attachments[:MAX_FILES_PER_MESSAGE]:
+            if attachment.size > self.max_bytes:
+                metrics.incr("attachments_oversize")
+                notes.append(f"⚠️ **{attachment.filename}** is too large to relay ({format_bytes(attachment.size)}): {attachment.url}")
+            else:
+                downloads.append(attachment)
+        for attachment in attachments[MAX_FILES_PER_MESSAGE:]:
+            notes.append(f"📎 **{attachment.filename}**: {attachment.url}")
+
+        results = await asyncio.gather(*(self._download(attachment) for attachment in downloads))
+
+        files = []
+        digests = []
+        relayed = []
+        try:
+            for attachment, result in zip(downloads, results):
+                if result is None:
+                    notes.append(f"⚠️ **{attachment.filename}** could not be downloaded: {attachment.url}")
+                    continue
+                buffer, digest = result
+                previous = self.sent.get((destination.id, digest))
+                if previous:
+                    buffer.close()
+                    metrics.incr("attachments_deduplicated")
+                    notes.append(f"🔁 **{attachment.filename}** was already sent: {previous}")
+                    continue
+                files.append(discord.File(buffer, filename=attachment.filename, spoiler=attachment.is_spoiler()))
+                digests.append(digest)
+                relayed.append(attachment)
+
+            if not files:
+                return None, notes
+
+            try:
+                message = await destination.send(content=content, files=files)
+            except discord.HTTPException as e:
+                # e.g. over the destination's upload limit - fall back to the original links
+                log.warning("Failed to re-upload %d attachments: %s", len(files), e, extra={"event": "attachment_upload_failed"})
+                metrics.incr("attachments_failed", len(files))
+                notes += [f"📎 **{attachment.filename}**: {attachment.url}" for attachment in relayed]
+                return None, notes
+            for digest in digests:
+                self._remember((destination.id, digest), message.jump_url)
+            metrics.incr("attachments_relayed", len(files))
+            return message, notes
+        finally:
+            for file in files:
+                file.close()
+
+    async def _download(self, attachment):
+        """Stream one attachment into a spooled buffer, returning (buffer, sha256) or None"""
+        buffer = tempfile.SpooledTemporaryFile(max_size=ATTACHMENT_SPOOL_BYTES)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with self.semaphore:
+                session = await self.session()
+                async with session.get(attachment.url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            raise ValueError("attachment grew past the size cap")
+                        digest.update(chunk)
+                        buffer.write(chunk)
+            buffer.seek(0)
+            return buffer, digest.hexdigest()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            buffer.close()
+            metrics.incr("attachments_failed")
+            log.warning("Failed to download attachment %s: %s", attachment.filename, e, extra={"event": "attachment_download_failed"})
+            return None
+
+    def _remember(self, key, jump_url):
+        self.sent[key] = jump_url
+        self.sent.move_to_end(key)
+        while len(self.sent) > ATTACHMENT_DEDUP_ENTRIES:
+            self.sent.popitem(last=False)
@@ -0,0 +1,72 @@
+import discord
+import logging
+from config import STAFF_ROLE, BOT_OWNER_ID, ROLE_MANAGER_IDS
+
+log = logging.getLogger(__name__)
+
+class StaffCache:
+    """Ids of members holding the staff role, kept current from member and role events"""
+
+    def __init__(self, role_id=STAFF_ROLE):
+        self.role_id = role_id
+        self.members = set()
+        self.loaded = False
+
+    def __contains__(self, user_id):
+        return user_id in self.members
+
+    def __len__(self):
+        return len(self.members)
+
+    @property
+    def populated(self):
+        """Loaded with at least one member - an empty set means the role is missing or not cached yet"""
+        return self.loaded and bool(self.members)
+
+    def load(self, guild):
+        """Build the set once from the role's member list"""
+        role = guild.get_role(self.role_id)
+        self.members = {member.id for member in role.members} if role else set()
+        self.loaded = True
+        log.info("Cached %d staff members", len(self.members), extra={"event": "staff_cache_loaded"})
+
+    def member_update(self, before, after):
+        """Returns True if the member just became staff"""
+        had = any(role.id == self.role_id for role in before.roles)
+        has = any(role.id == self.role_id for role in after.roles)
+        if has and not had:
+            self.members.add(after.id)
+            return True
+        if had and not has:
+            self.members.discard(after.id)
+        return False
+
+    def member_remove(self, member):
+        self.members.discard(member.id)
+
+    def role_deleted(self, role):
+        if role.id == self.role_id:
+            log.error("Staff role %s was deleted", role.id, extra={"event": "staff_role_deleted"})
+            self.members.clear()
+
+def is_owner_id(user_id):
+    return user_id == BOT_OWNER_ID
+
+def is_staff_id(bot, user_id):
+    """Staff role holders and the bot owner"""
+    return user_id in bot.staff or user_id == BOT_OWNER_ID
+
+def is_role_manager_id(user_id):
+    return user_id in ROLE_MANAGER_IDS
+
+def is_staff():
+    """Check if user has staff role"""
+    async def predicate(ctx):
+        return ctx.guild is not None and is_staff_id(ctx.bot, ctx.author.id)
+    return discord.ext.commands.check(predicate)
+
+def is_owner():
+    """Check if user is the bot owner (for repair commands)"""
+    async def predicate(ctx):
+        return is_owner_id(ctx.author.id)
+    return discord.ext.commands.check(predicate)
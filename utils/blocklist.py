@@ -0,0 +1,86 @@
+import asyncio
+import heapq
+import logging
+import time
+from config import BLOCKED_USERS
+
+log = logging.getLogger(__name__)
+
+class Blocklist:
+    """Blocked user ids in a set for O(1) checks, with a timer heap for expiring blocks"""
+
+    def __init__(self, store):
+        self.store = store
+        self.users = set(BLOCKED_USERS)
+        self.expiry = {}  # user_id: expiry timestamp (timed blocks only)
+        self.heap = []    # (expiry timestamp, user_id), may hold stale entries
+        self._wake = asyncio.Event()
+        self._task = None
+
+        now = time.time()
+        for user_id, expires, _, _ in store.all_blocks():
+            if expires and expires <= now:
+                store.remove_block(user_id)
+                continue
+            self.users.add(user_id)
+            if expires:
+                self.expiry[user_id] = expires
+                self.heap.append((expires, user_id))
+        heapq.heapify(self.heap)
+
+    def __contains__(self, user_id):
+        return user_id in self.users
+
+    def __len__(self):
+        return len(self.users)
+
+    def start(self):
+        """Start the task that lifts timed blocks when they expire"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._expire_loop())
+
+    def block(self, user_id, duration=None, reason=None, blocked_by=None):
+        """Block a user, optionally for `duration` seconds"""
+        expires = time.time() + duration if duration else None
+        self.store.add_block(user_id, expires, reason, blocked_by)
+        self.users.add(user_id)
+        if expires:
+            self.expiry[user_id] = expires
+            heapq.heappush(self.heap, (expires, user_id))
+            if self.heap[0][1] == user_id:
+                self._wake.set()
+        else:
+            self.expiry.pop(user_id, None)
+        return expires
+
+    def unblock(self, user_id):
+        """Lift a block, returning False if the user wasn't blocked"""
+        if user_id not in self.users:
+            return False
+        self.store.remove_block(user_id)
+        self.users.discard(user_id)
+        self.expiry.pop(user_id, None)
+        return True
+
+    async def _expire_loop(self):
+        while True:
+            if not self.heap:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            expires, user_id = self.heap[0]
+            delay = expires - time.time()
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self.heap)
+            # Skip heap entries left behind by an unblock or a re-block
+            if self.expiry.get(user_id) == expires:
+                self.unblock(user_id)
+                log.info("Block on %s expired", user_id, extra={"event": "block_expired"})
@@ -0,0 +1,153 @@
+import discord
+import logging
+import asyncio
+from config import TICKET_CATEGORIES, CATEGORY_CHANNEL_LIMIT, OVERFLOW_CATEGORY_PREFIX
+
+log = logging.getLogger(__name__)
+
+class CategoryPool:
+    """Keeps live channel counts for every ticket category so new tickets go to the least-full one"""
+
+    def __init__(self, limit=CATEGORY_CHANNEL_LIMIT):
+        self.limit = limit
+        self.channels = {}  # category_id: set of channel ids inside it
+        self.pending = {}   # category_id: channels currently being created
+        self.counts = {}    # category_id: channels + pending
+        # buckets[n] holds the categories with exactly n channels, so picking the emptiest is O(1)
+        self.buckets = [set() for _ in range(limit + 1)]
+        self.min_count = limit
+        self.loaded = False
+        self._lock = asyncio.Lock()
+
+    def load(self, guild):
+        """Build the counters from the guild cache (runs once, then events keep them current)"""
+        self.channels.clear()
+        self.pending.clear()
+        self.counts.clear()
+        for bucket in self.buckets:
+            bucket.clear()
+        self.min_count = self.limit
+
+        category_ids = list(TICKET_CATEGORIES)
+        for category in guild.categories:
+            if category.name.startswith(OVERFLOW_CATEGORY_PREFIX) and category.id not in category_ids:
+                category_ids.append(category.id)
+
+        for category_id in category_ids:
+            category = guild.get_channel(category_id)
+            if isinstance(category, discord.CategoryChannel):
+                self._track(category)
+            else:
+                log.warning("Ticket category %s not found, skipping", category_id, extra={"event": "category_missing"})
+
+        self.loaded = True
+
+    def _track(self, category):
+        self.channels[category.id] = {channel.id for channel in category.channels}
+        self.pending[category.id] = 0
+        self.counts[category.id] = None
+        self._update(category.id)
+
+    def _update(self, category_id):
+        """Move a category to the bucket matching its current occupancy"""
+        old = self.counts[category_id]
+        new = min(len(self.channels[category_id]) + self.pending[category_id], self.limit)
+        if old == new:
+            return
+
+        if old is not None:
+            self.buckets[old].discard(category_id)
+        self.buckets[new].add(category_id)
+        self.counts[category_id] = new
+
+        if new < self.min_count:
+            self.min_count = new
+        elif old == self.min_count and not self.buckets[old]:
+            while self.min_count < self.limit and not self.buckets[self.min_count]:
+                self.min_count += 1
+
+    def pick(self):
+        """Return the ID of the least-full category, or None if every category is full"""
+        if self.min_count >= self.limit:
+            return None
+        return next(iter(self.buckets[self.min_count]))
+
+    async def acquire(self, guild):
+        """Reserve a slot in the least-full category, creating an overflow category if all are full"""
+        if not self.loaded:
+            self.load(guild)
+
+        async with self._lock:
+            category_id = self.pick()
+            if category_id is None:
+                category = await self._create_overflow(guild)
+                if not category:
+                    return None
+                category_id = category.id
+            else:
+                category = guild.get_channel(category_id)
+
+            self.pending[category_id] += 1
+            self._update(category_id)
+            return category
+
+    def release(self, category_id, channel=None):
+        """Drop a reservation made by acquire, recording the created channel if there is one"""
+        if category_id not in self.pending:
+            return
+        self.pending[category_id] = max(self.pending[category_id] - 1, 0)
+        if channel is not None:
+            self.channels[category_id].add(channel.id)
+        self._update(category_id)
+
+    async def _create_overflow(self, guild):
+        primary = guild.get_channel(TICKET_CATEGORIES[0])
+        overwrites = primary.overwrites if primary else {}
+        name = f"{OVERFLOW_CATEGORY_PREFIX} {len(self.channels)}"
+        try:
+            category = await guild.create_category(
+                name=name,
+                overwrites=overwrites,
+                reason="All ticket categories are full"
+            )
+        except discord.HTTPException as e:
+            log.error("Failed to create overflow category: %s", e, extra={"event": "overflow_category_failed"})
+            return None
+
+        self._track(category)
+        log.info("Created overflow ticket category %s", category.name, extra={"event": "overflow_category_created"})
+        return category
+
+    def channel_created(self, channel):
+        """Event hook for on_guild_channel_create"""
+        if channel.category_id in self.channels:
+            self.channels[channel.category_id].add(channel.id)
+            self._update(channel.category_id)
+
+    def channel_deleted(self, channel):
+        """Event hook for on_guild_channel_delete"""
+        if channel.category_id in self.channels:
+            self.channels[channel.category_id].discard(channel.id)
+            self._update(channel.category_id)
+        elif channel.id in self.channels:
+            # A whole ticket category was removed
+            del self.channels[channel.id]
+            del self.pending[channel.id]
+            self.buckets[self.counts.pop(channel.id)].discard(channel.id)
+            self.min_count = self.limit
+            for count in self.counts.values():
+                self.min_count = min(self.min_count, count)
+
+    def channel_moved(self, before, after):
+        """Event hook for on_guild_channel_update when a channel changes category"""
+        if before.category_id != after.category_id:
+            self.channel_deleted(before)
+            self.channel_created(after)
+
+    def load_summary(self, guild):
+        """Return (name, count) pairs for every tracked category"""
+        summary = []
+        for category_id, count in self.counts.items():
+            category = guild.get_channel(category_id)
+            summary.append((category.name if category else str(category_id), count))
+        return summary
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from collections import deque
+from config import DM_WORKERS, DM_QUEUE_LIMIT
+from utils import metrics
+
+log = logging.getLogger(__name__)
+
+class DMDispatcher:
+    """Runs DM handling off the gateway event: one ordered queue per user, served by a fixed worker pool.
+
+    A user's messages are handled one at a time in arrival order, different users in parallel.
+    Each worker handles one message and puts the user back at the end of the line, so one
+    chatty user can't hold a worker while others wait. DMs that don't fit under the global limit
+    are parked in the store, and the user's later DMs park behind them until the backlog has been
+    replayed (oldest first, whenever a slot frees up), so their order is kept.
+    """
+
+    def __init__(self, bot, handler, workers=DM_WORKERS, limit=DM_QUEUE_LIMIT):
+        self.bot = bot
+        self.handler = handler
+        self.workers = workers
+        self.limit = limit
+        self.queues = {}  # user_id -> deque of messages
+        self.ready = asyncio.Queue()  # user ids with queued messages, each present at most once
+        self.depth = 0
+        self.peak = 0
+        self.parked_users = set()  # users with DMs parked in the store, their new DMs queue up behind them
+        self.replaying = False
+        self._tasks = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, message, handler=None):
+        """Queue a DM for handling, returning False if it has to be parked instead: the global limit
+        is hit or the user already has parked DMs that must go first.
+
+        `handler` replaces the default handler for this entry, for work that has to run in the
+        user's turn (e.g. a digest of throttled DMs).
+        """
+        if self.depth >= self.limit or message.author.id in self.parked_users:
+            metrics.incr("dm_dispatch_overflow")
+            return False
+        self.enqueue(message, handler)
+        return True
+
+    def park(self, message):
+        """Keep a DM that couldn't be queued in the store until there is room for it"""
+        self.bot.store.add_job("forward_dm", {"user_id": message.author.id, "message_id": message.id})
+        self.parked_users.add(message.author.id)
+        metrics.incr("dm_dispatch_parked")
+        self._replay_when_free()
+
+    def enqueue(self, message, handler=None):
+        """Queue a DM regardless of parked users (used by the replay itself)"""
+        queue = self.queues.get(message.author.id)
+        if queue is None:
+            queue = self.queues[message.author.id] = deque()
+            self.ready.put_nowait(message.author.id)
+        queue.append((handler or self.handler, message))
+
+        self.depth += 1
+        self.peak = max(self.peak, self.depth)
+        self.bot.work.begin()
+        metrics.incr("dm_dispatch_queued")
+
+    def _replay_when_free(self):
+        if self.parked_users and not self.replaying and self.depth < self.limit and self.bot.work.accepting:
+            self.replaying = True
+            asyncio.create_task(self._replay())
+
+    async def _replay(self):
+        try:
+            await self.bot.replay_parked_dms()
+        finally:
+            self.replaying = False
+
+    async def _worker(self):
+        while True:
+            user_id = await self.ready.get()
+            queue = self.queues[user_id]
+            handler, message = queue.popleft()
+            try:
+                await handler(message)
+            except Exception as e:
+                log.exception("DM worker failed on %s: %s", message.id, e, extra={"event": "dm_dispatch_failed"})
+            finally:
+                self.depth -= 1
+                self.bot.work.end()
+                if queue:
+                    self.ready.put_nowait(user_id)
+                else:
+                    del self.queues[user_id]
+                self._replay_when_free()
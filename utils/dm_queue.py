@@ -0,0 +1,165 @@
+import discord
+import asyncio
+import heapq
+import logging
+import random
+import time
+from config import (DM_RETRY_MAX_ATTEMPTS, DM_RETRY_BASE_DELAY, DM_RETRY_MAX_DELAY, DM_QUEUE_MEMORY_LIMIT,
+                    MODMAIL_EMBED_COLOR, ERROR_EMBED_COLOR)
+from utils.helpers import deliver_dm, classify_dm_error
+from utils import metrics
+
+log = logging.getLogger(__name__)
+
+class DMQueue:
+    """Durable outbound DM queue that retries transient failures with backoff.
+
+    Every queued DM lives in the store's dm_outbox table. Only the soonest
+    DM_QUEUE_MEMORY_LIMIT (time, id) pairs are kept in an in-memory heap;
+    the rest are reloaded from disk as the heap drains.
+    """
+
+    def __init__(self, bot, store):
+        self.bot = bot
+        self.store = store
+        self.memory_limit = DM_QUEUE_MEMORY_LIMIT
+        self.heap = []  # (next_attempt, outbox_id)
+        self.overflow = False  # True when the store holds entries the heap doesn't
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        """Load queued DMs from the store and start the retry worker"""
+        self._load()
+        if self.heap:
+            log.info("Resuming %d queued DMs", len(self.heap), extra={"event": "dm_queue_loaded"})
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _load(self):
+        rows = self.store.due_outbox(self.memory_limit + 1)
+        self.overflow = len(rows) > self.memory_limit
+        self.heap = [tuple(row) for row in rows[:self.memory_limit]]
+        heapq.heapify(self.heap)
+
+    def backoff(self, attempts):
+        """Exponential backoff with jitter over the upper half of the window"""
+        window = min(DM_RETRY_MAX_DELAY, DM_RETRY_BASE_DELAY * 2 ** attempts)
+        return window / 2 + random.uniform(0, window / 2)
+
+    def enqueue(self, user_id, dedup_key, embed=None, content=None, confirm=None, label="Reply"):
+        """Queue a DM that just failed transiently. Returns False if the dedup key is already queued."""
+        payload = {
+            "embed": embed.to_dict() if embed else None,
+            "content": content,
+            "confirm": {
+                "channel_id": confirm.channel.id,
+                "message_id": confirm.id,
+                "embed": confirm.embeds[0].to_dict() if confirm.embeds else {},
+                "label": label
+            } if confirm else None
+        }
+        next_attempt = time.time() + self.backoff(1)
+        outbox_id = self.store.add_outbox(dedup_key, user_id, payload, 1, next_attempt)
+        if outbox_id is None:
+            metrics.incr("dm_queue_deduplicated")
+            return False
+
+        metrics.incr("dm_queue_enqueued")
+        self._schedule(next_attempt, outbox_id)
+        return True
+
+    def _schedule(self, when, outbox_id):
+        if len(self.heap) >= self.memory_limit:
+            self.overflow = True
+            return
+        heapq.heappush(self.heap, (when, outbox_id))
+        if self.heap[0][1] == outbox_id:
+            self._wake.set()
+
+    async def _run(self):
+        while not self.bot.is_closed():
+            if not self.heap:
+                if self.overflow:
+                    self._load()
+                    continue
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            when, outbox_id = self.heap[0]
+            delay = when - time.time()
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self.heap)
+            async with self.bot.work.track():
+                try:
+                    await self._attempt(outbox_id)
+                except Exception as e:
+                    log.exception("DM retry %s crashed: %s", outbox_id, e, extra={"event": "dm_retry_error"})
+
+    async def _attempt(self, outbox_id):
+        entry = self.store.get_outbox(outbox_id)
+        if not entry:
+            return
+        _, user_id, payload, attempts = entry
+        attempts += 1
+
+        try:
+            user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+        except Exception as e:
+            result = classify_dm_error(e)
+        else:
+            embed = discord.Embed.from_dict(payload["embed"]) if payload["embed"] else None
+            result = await deliver_dm(user, embed=embed, content=payload["content"])
+
+        if result == "sent":
+            self.store.remove_outbox(outbox_id)
+            metrics.incr("dm_queue_delivered")
+            await self._update_confirmation(payload, "sent", attempts)
+        elif result == "permanent" or attempts >= DM_RETRY_MAX_ATTEMPTS:
+            self.store.remove_outbox(outbox_id)
+            metrics.incr("dm_queue_failed")
+            log.warning("Giving up on DM to %s after %d attempts (%s)", user_id, attempts, result,
+                        extra={"event": "dm_retry_gave_up"})
+            await self._update_confirmation(payload, "failed", attempts)
+        else:
+            next_attempt = time.time() + self.backoff(attempts)
+            self.store.reschedule_outbox(outbox_id, attempts, next_attempt)
+            self._schedule(next_attempt, outbox_id)
+            metrics.incr("dm_queue_retried")
+            await self._update_confirmation(payload, "retrying", attempts, next_attempt)
+
+    async def _update_confirmation(self, payload, state, attempts, next_attempt=None):
+        """Edit the ticket's confirmation embed in place to show delivery progress"""
+        confirm = payload.get("confirm")
+        if not confirm:
+            return
+
+        label = confirm["label"]
+        embed = discord.Embed.from_dict(confirm["embed"])
+        if state == "sent":
+            embed.title = f"✅ {label} Sent"
+            embed.color = MODMAIL_EMBED_COLOR
+            status = f"Delivered on attempt {attempts}"
+        elif state == "failed":
+            embed.title = f"❌ {label} Failed"
+            embed.color = ERROR_EMBED_COLOR
+            status = f"Gave up after {attempts} attempts"
+        else:
+            status = f"Attempt {attempts} failed, retrying <t:{int(next_attempt)}:R>"
+        embed.add_field(name="Delivery", value=status, inline=False)
+
+        channel = self.bot.get_channel(confirm["channel_id"])
+        if not channel:
+            return
+        try:
+            await channel.get_partial_message(confirm["message_id"]).edit(embed=embed)
+        except discord.HTTPException as e:
+            log.warning("Could not update DM confirmation: %s", e, extra={"event": "dm_confirm_failed"})
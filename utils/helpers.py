@@ -1,14 +1,9 @@
 import discord
+import asyncio
 import io
 from datetime import datetime
-from config import STAFF_ROLE
-
-def is_staff():
-    """Check if user has staff role"""
-    async def predicate(ctx):
-        staff_role = ctx.guild.get_role(STAFF_ROLE)
-        return staff_role in ctx.author.roles
-    return discord.ext.commands.check(predicate)
+from utils.transcripts import collect_records, render
+from utils.auth import is_staff  # noqa: F401 - re-exported for the command cogs
 
 def is_ticket_channel():
     """Check if command is used in a ticket channel"""
@@ -16,12 +11,6 @@ def is_ticket_channel():
         return ctx.channel.name.startswith("ticket-")
     return discord.ext.commands.check(predicate)
 
-def is_authorized_user(user_id: int):
-    """Check if user is authorized (for repair command)"""
-    async def predicate(ctx):
-        return ctx.author.id == user_id
-    return discord.ext.commands.check(predicate)
-
 async def get_user_from_channel(bot, channel):
     """Extract user ID from ticket channel name and return user object"""
     try:
@@ -30,43 +19,54 @@ async def get_user_from_channel(bot, channel):
     except (ValueError, IndexError):
         return None
 
-async def create_transcript(channel):
+async def create_transcript(channel, fmt="txt"):
     """Create a transcript of the ticket channel"""
-    transcript = f"Transcript for {channel.name}\nGenerated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\nGenerated by SereneEnterprise, all rights reserved (c) (Taken from London Network)\n"
-    transcript += "=" * 50 + "\n\n"
+    return (await create_transcripts(channel, [fmt]))[0]
+
+async def create_transcripts(channel, formats, messages=None):
+    """Create one transcript file per format - history is read once here, rendering runs in worker processes"""
+    records = await collect_records(channel, messages)
+    return await render_transcripts(channel.name, formats, records)
 
-    async for message in channel.history(limit=None, oldest_first=True):
-        timestamp = message.created_at.strftime("%Y-%m-%d %H:%M:%S")
+async def render_transcripts(channel_name, formats, records):
+    """Transcript files from already collected records, so the channel itself may be gone by now"""
+    generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rendered = await asyncio.gather(*(render(fmt, channel_name, generated_at, records) for fmt in formats))
 
-        if message.embeds and not message.content:
-            # Handle embed messages
-            for embed in message.embeds:
-                if embed.author:
-                    transcript += f"[{timestamp}] {embed.author.name}: {embed.description}\n"
-                else:
-                    transcript += f"[{timestamp}] {message.author}: {embed.description}\n"
-        else:
-            transcript += f"[{timestamp}] {message.author}: {message.content}\n"
+    # Create file objects
+    return [
+        discord.File(io.BytesIO(transcript.encode("utf-8")), filename=f"transcript-{channel_name}.{fmt}")
+        for fmt, transcript in zip(formats, rendered)
+    ]
 
-        # Add attachments info
-        for attachment in message.attachments:
-            transcript += f"    📎 Attachment: {attachment.filename} ({attachment.url})\n"
+def format_duration(seconds):
+    """Short human duration, e.g. 2d 3h, 4h 10m or 12m"""
+    minutes, _ = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
 
-        transcript += "\n"
+def classify_dm_error(error):
+    """Classify a DM failure: permanent if a retry can't fix it (DMs closed, unknown user), else transient"""
+    if isinstance(error, (discord.Forbidden, discord.NotFound)):
+        return "permanent"
+    if isinstance(error, discord.HTTPException):
+        return "transient" if error.status == 429 or error.status >= 500 else "permanent"
+    # Connection resets, timeouts and other network errors
+    return "transient"
 
-    # Create file object
-    transcript_file = io.StringIO(transcript)
-    return discord.File(transcript_file, filename=f"transcript-{channel.name}.txt")
+async def deliver_dm(user, embed=None, content=None):
+    """Send a DM and return "sent", "permanent" or "transient" """
+    try:
+        await user.send(content=content, embed=embed)
+        return "sent"
+    except Exception as e:
+        return classify_dm_error(e)
 
 async def send_dm_safely(user, embed=None, content=None):
     """Safely send DM to user, return success status"""
-    try:
-        if embed:
-            await user.send(embed=embed)
-        else:
-            await user.send(content)
-        return True
-    except discord.Forbidden:
-        return False
-    except Exception:
-        return False
\ No newline at end of file
+    return await deliver_dm(user, embed=embed, content=content) == "sent"
\ No newline at end of file
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import os
+import socket
+from config import LEASE_TTL, LEASE_HEARTBEAT
+
+log = logging.getLogger(__name__)
+
+class Lease:
+    """Leader lease in the local store, so a standby process only connects when the leader is gone.
+
+    The leader renews the lease every LEASE_HEARTBEAT seconds. If it stops (crash, hang, restart)
+    the lease lapses after LEASE_TTL seconds and the standby's next poll takes it over.
+    """
+
+    def __init__(self, store, name="leader", ttl=LEASE_TTL, heartbeat=LEASE_HEARTBEAT):
+        self.store = store
+        self.name = name
+        self.ttl = ttl
+        self.heartbeat = heartbeat
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.held = False
+
+    def try_acquire(self):
+        self.held = self.store.acquire_lease(self.name, self.holder, self.ttl)
+        return self.held
+
+    async def wait(self, warm=None):
+        """Poll until the lease is ours, refreshing warm state from the store between polls"""
+        if not self.try_acquire():
+            log.info("Standing by, lease held by %s", self.store.lease_holder(self.name), extra={"event": "lease_standby"})
+            while not self.try_acquire():
+                if warm:
+                    warm()
+                await asyncio.sleep(self.heartbeat)
+        log.info("Acquired leader lease as %s", self.holder, extra={"event": "lease_acquired"})
+
+    async def keep(self, on_beat=None, on_lost=None):
+        """Renew the lease until it is lost or released"""
+        while self.held:
+            await asyncio.sleep(self.heartbeat)
+            if not self.held:
+                return
+            if not self.try_acquire():
+                log.error("Lost leader lease to %s", self.store.lease_holder(self.name), extra={"event": "lease_lost"})
+                if on_lost:
+                    on_lost()
+                return
+            if on_beat:
+                on_beat()
+
+    def release(self):
+        if self.held:
+            self.held = False
+            self.store.release_lease(self.name, self.holder)
+            log.info("Released leader lease", extra={"event": "lease_released"})
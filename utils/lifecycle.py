@@ -0,0 +1,39 @@
+import asyncio
+import contextlib
+
+class WorkTracker:
+    """Counts in-flight units of work so shutdown can wait for them to finish"""
+
+    def __init__(self):
+        self.accepting = True
+        self.inflight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def begin(self):
+        """Register a unit of work that finishes later (pair with end())"""
+        self.inflight += 1
+        self._idle.clear()
+
+    def end(self):
+        self.inflight -= 1
+        if self.inflight == 0:
+            self._idle.set()
+
+    @contextlib.asynccontextmanager
+    async def track(self):
+        """Wrap a unit of work (a DM forward, a close) so drain() waits for it"""
+        self.begin()
+        try:
+            yield
+        finally:
+            self.end()
+
+    async def drain(self, timeout):
+        """Stop accepting new work and wait up to `timeout` seconds for in-flight work to finish"""
+        self.accepting = False
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
@@ -0,0 +1,117 @@
+import logging
+import logging.handlers
+import json
+import os
+import queue
+import random
+import time
+from config import LOG_LEVEL, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_SAMPLE_RATES, LOG_ERROR_WINDOW
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "msg": record.getMessage(),
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records for noisy events (keyed by the `event` extra)"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        rate = self.rates.get(getattr(record, "event", None))
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+        return random.random() < rate
+
+class RepeatedErrorFilter(logging.Filter):
+    """Let the same warning/error through once per window, counting the copies it drops"""
+
+    def __init__(self, window):
+        super().__init__()
+        self.window = window
+        self.seen = {}  # (logger, template): [first emitted at, suppressed count]
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            return True
+
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        entry = self.seen.get(key)
+        if entry and now - entry[0] < self.window:
+            entry[1] += 1
+            return False
+
+        record.suppressed = entry[1] if entry else 0
+        self.seen[key] = [now, 0]
+        if len(self.seen) > 1000:
+            # Forget the oldest keys so the table stays bounded
+            for stale in sorted(self.seen, key=lambda k: self.seen[k][0])[:500]:
+                del self.seen[stale]
+        return True
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread"""
+
+    def prepare(self, record):
+        # The queue never leaves the process, so the record can be handed over as-is
+        return record
+
+def setup_logging():
+    """Route all logging through a queue so formatting and I/O happen on a listener thread"""
+    global _listener
+    if _listener:
+        return
+
+    formatter = JsonFormatter()
+    handlers = []
+
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+    handlers.append(console)
+
+    if LOG_FILE:
+        log_dir = os.path.dirname(LOG_FILE)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    # Filters run on the producer side so dropped records never reach the queue
+    queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(SamplingFilter(LOG_SAMPLE_RATES))
+    queue_handler.addFilter(RepeatedErrorFilter(LOG_ERROR_WINDOW))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging():
+    """Flush and stop the listener thread"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from config import TICKET_CACHE_MESSAGES, TICKET_CACHE_CHANNELS
+
+class MessageCache:
+    """Recent messages for a bounded set of channels, bounded per channel.
+
+    Used instead of discord.py's global cache for the channels this bot cares about (tickets
+    and DMs). A channel registered with start() before its first message is "complete" until
+    something is evicted from it, and then its history can be served without the REST API.
+    """
+
+    def __init__(self, per_channel=TICKET_CACHE_MESSAGES, max_channels=TICKET_CACHE_CHANNELS):
+        self.per_channel = per_channel
+        self.max_channels = max_channels
+        self.channels = OrderedDict()  # channel_id -> {message_id: Message}, least recently active first
+        self.complete = set()
+
+    def __contains__(self, channel_id):
+        return channel_id in self.channels
+
+    def __len__(self):
+        return sum(len(messages) for messages in self.channels.values())
+
+    def start(self, channel_id):
+        """Begin caching a brand-new channel, so the cache holds its whole history"""
+        self._channel(channel_id)
+        self.complete.add(channel_id)
+
+    def add(self, message):
+        messages = self._channel(message.channel.id)
+        messages[message.id] = message
+        if len(messages) > self.per_channel:
+            del messages[next(iter(messages))]
+            self.complete.discard(message.channel.id)
+
+    def update(self, message):
+        """Swap in the edited version of a cached message"""
+        messages = self.channels.get(message.channel.id)
+        if messages is not None and message.id in messages:
+            messages[message.id] = message
+
+    def remove(self, channel_id, message_id):
+        messages = self.channels.get(channel_id)
+        if messages is not None:
+            messages.pop(message_id, None)
+
+    def get(self, channel_id, message_id):
+        messages = self.channels.get(channel_id)
+        return messages.get(message_id) if messages is not None else None
+
+    def history(self, channel_id):
+        """Every message in the channel oldest first, or None if the cache doesn't hold all of them"""
+        if channel_id not in self.complete:
+            return None
+        return sorted(self.channels[channel_id].values(), key=lambda message: message.id)
+
+    def drop(self, channel_id):
+        self.channels.pop(channel_id, None)
+        self.complete.discard(channel_id)
+
+    def _channel(self, channel_id):
+        messages = self.channels.get(channel_id)
+        if messages is None:
+            messages = self.channels[channel_id] = {}
+            if len(self.channels) > self.max_channels:
+                evicted, _ = self.channels.popitem(last=False)
+                self.complete.discard(evicted)
+        else:
+            self.channels.move_to_end(channel_id)
+        return messages
@@ -0,0 +1,73 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+import discord
+from config import MESSAGE_MAP_CAPACITY, MESSAGE_MAP_RETENTION_DAYS
+
+class MessageMap:
+    """Maps a DM message id to the ticket message it was forwarded as.
+
+    Entries live in three parallel unsigned 64-bit arrays (24 bytes each) kept sorted by
+    DM id - snowflakes only grow, so adding is an append and lookup is a binary search.
+    When the arrays pass `capacity`, the oldest half is spilled to the local store, and save()
+    writes out everything added since the last save so a restart keeps recent entries too.
+    """
+
+    def __init__(self, store, capacity=MESSAGE_MAP_CAPACITY):
+        self.store = store
+        self.capacity = capacity
+        self.dm_ids = array('Q')
+        self.channel_ids = array('Q')
+        self.message_ids = array('Q')
+        self.saved_upto = 0  # entries up to this DM id are in the store
+
+    def __len__(self):
+        return len(self.dm_ids)
+
+    def add(self, dm_id, channel_id, message_id):
+        if not self.dm_ids or dm_id > self.dm_ids[-1]:
+            index = len(self.dm_ids)
+        else:
+            # Out-of-order insert (rare - e.g. replayed DMs after a restart)
+            index = bisect_left(self.dm_ids, dm_id)
+            if index < len(self.dm_ids) and self.dm_ids[index] == dm_id:
+                self.channel_ids[index] = channel_id
+                self.message_ids[index] = message_id
+                if dm_id <= self.saved_upto:
+                    self.store.spill_message_map([(dm_id, channel_id, message_id)])
+                return
+        self.dm_ids.insert(index, dm_id)
+        self.channel_ids.insert(index, channel_id)
+        self.message_ids.insert(index, message_id)
+        if dm_id <= self.saved_upto:
+            # Below the save watermark, save() would skip it
+            self.store.spill_message_map([(dm_id, channel_id, message_id)])
+
+        if len(self.dm_ids) > self.capacity:
+            self._spill()
+
+    def get(self, dm_id):
+        """Return (ticket_channel_id, ticket_message_id) or None"""
+        index = bisect_left(self.dm_ids, dm_id)
+        if index < len(self.dm_ids) and self.dm_ids[index] == dm_id:
+            return self.channel_ids[index], self.message_ids[index]
+        if self.dm_ids and dm_id > self.dm_ids[0]:
+            return None
+        return self.store.lookup_message_map(dm_id)
+
+    def save(self):
+        """Write entries added since the last save to the store, keeping them in memory"""
+        index = bisect_right(self.dm_ids, self.saved_upto)
+        if index < len(self.dm_ids):
+            rows = list(zip(self.dm_ids[index:], self.channel_ids[index:], self.message_ids[index:]))
+            self.store.spill_message_map(rows)
+            self.saved_upto = self.dm_ids[-1]
+
+    def _spill(self):
+        count = len(self.dm_ids) // 2
+        rows = list(zip(self.dm_ids[:count], self.channel_ids[:count], self.message_ids[:count]))
+        cutoff = discord.utils.time_snowflake(discord.utils.utcnow() - timedelta(days=MESSAGE_MAP_RETENTION_DAYS))
+        self.store.spill_message_map(rows, min_dm_id=cutoff)
+        del self.dm_ids[:count]
+        del self.channel_ids[:count]
+        del self.message_ids[:count]
@@ -0,0 +1,12 @@
+from collections import Counter
+
+# Process-wide event counters, shown in ?repair
+counters = Counter()
+
+def incr(name, amount=1):
+    """Increment a named counter"""
+    counters[name] += amount
+
+def snapshot():
+    """Return the counters sorted by name"""
+    return sorted(counters.items())
@@ -0,0 +1,106 @@
+import time
+from collections import OrderedDict
+from config import (DM_RATE_PER_SECOND, DM_BURST, DM_LIMITER_MAX_USERS, DM_LIMITER_IDLE_SECONDS,
+                    DM_DIGEST_MAX_MESSAGES, DM_THROTTLE_NOTICE_COOLDOWN)
+from utils import metrics
+
+class UserRateLimiter:
+    """Per-user token buckets with LRU/idle eviction, plus a digest buffer for throttled messages"""
+
+    def __init__(self, rate=DM_RATE_PER_SECOND, burst=DM_BURST, max_users=DM_LIMITER_MAX_USERS,
+                 idle_seconds=DM_LIMITER_IDLE_SECONDS, digest_max=DM_DIGEST_MAX_MESSAGES,
+                 notice_cooldown=DM_THROTTLE_NOTICE_COOLDOWN):
+        self.rate = rate
+        self.burst = burst
+        self.max_users = max_users
+        self.idle_seconds = idle_seconds
+        self.digest_max = digest_max
+        self.notice_cooldown = notice_cooldown
+        self.buckets = OrderedDict()  # user_id: [tokens, last refill], least recently used first
+        self.digests = {}             # user_id: throttled messages waiting to be forwarded
+        self.throttle_counts = {}     # user_id: messages throttled in the current digest
+        self.notified = {}            # user_id: when they were last told to slow down
+
+    def _bucket(self, user_id, now):
+        bucket = self.buckets.get(user_id)
+        if bucket is None:
+            bucket = [float(self.burst), now]
+            self.buckets[user_id] = bucket
+            self._evict(now)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self.buckets.move_to_end(user_id)
+        return bucket
+
+    def _evict(self, now):
+        # Oldest entries sit at the front, so this stops at the first active bucket.
+        # Buckets with a pending digest are skipped, their user is still being throttled.
+        remaining = len(self.buckets)
+        evicted = []
+        for user_id, (_, last) in self.buckets.items():
+            if remaining <= self.max_users and now - last < self.idle_seconds:
+                break
+            if user_id in self.digests:
+                continue
+            evicted.append(user_id)
+            remaining -= 1
+        for user_id in evicted:
+            del self.buckets[user_id]
+            self.notified.pop(user_id, None)
+
+    def allow(self, user_id):
+        """Take a token for this user, returning False if they are over the limit"""
+        now = time.monotonic()
+        bucket = self._bucket(user_id, now)
+        if bucket[0] >= 1 and user_id not in self.digests:
+            bucket[0] -= 1
+            return True
+        metrics.incr("dm_throttled")
+        return False
+
+    def buffer(self, message):
+        """Hold a throttled message for the user's digest. Returns True if this started a new digest."""
+        user_id = message.author.id
+        digest = self.digests.get(user_id)
+        started = digest is None
+        if started:
+            digest = self.digests[user_id] = []
+        self.throttle_counts[user_id] = self.throttle_counts.get(user_id, 0) + 1
+        digest.append(message)
+        return started
+
+    def digest_full(self, user_id):
+        return len(self.digests.get(user_id, ())) >= self.digest_max
+
+    def drain_digest(self, user_id):
+        """Pop the buffered messages of a full digest so they go out early.
+
+        The user stays throttled with an empty digest, the pending flush picks up whatever follows.
+        """
+        messages = self.digests.get(user_id, [])
+        self.digests[user_id] = []
+        return messages, self.throttle_counts.pop(user_id, 0)
+
+    def should_notify(self, user_id):
+        """True the first time a user is throttled, and again once the notice cooldown has passed"""
+        now = time.monotonic()
+        last = self.notified.get(user_id)
+        if last is not None and now - last < self.notice_cooldown:
+            return False
+        self.notified[user_id] = now
+        return True
+
+    def wait_time(self, user_id):
+        """Seconds until this user's bucket has a token again"""
+        bucket = self.buckets.get(user_id)
+        if bucket is None:
+            return 0
+        return max(0.0, (1 - bucket[0]) / self.rate)
+
+    def take_digest(self, user_id):
+        """Pop the buffered messages and throttled count for a user, spending one token on the digest send"""
+        now = time.monotonic()
+        bucket = self._bucket(user_id, now)
+        bucket[0] = max(0.0, bucket[0] - 1)
+        return self.digests.pop(user_id, []), self.throttle_counts.pop(user_id, 0)
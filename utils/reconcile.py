@@ -0,0 +1,193 @@
+import discord
+import asyncio
+import logging
+import time
+from collections import deque
+from config import TICKET_MODE, TICKET_THREAD_CHANNEL, RECONCILE_BATCH_SIZE, RECONCILE_BATCH_INTERVAL
+from utils import metrics
+from utils.auth import is_staff_id
+
+log = logging.getLogger(__name__)
+
+class Reconciler:
+    """Keeps the ticket registry in step with the channels that actually exist.
+
+    Channel delete/update events fix single tickets as they happen. A sweep on startup diffs
+    the stored state against the ticket categories once, fixes what it can locally and queues
+    anything that needs API calls, which runs in batches of RECONCILE_BATCH_SIZE every
+    RECONCILE_BATCH_INTERVAL seconds.
+    """
+
+    def __init__(self, bot, batch_size=RECONCILE_BATCH_SIZE, batch_interval=RECONCILE_BATCH_INTERVAL):
+        self.bot = bot
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.repairs = deque()  # (description, coroutine function, args)
+        self.report = {}
+        self.last_sweep = None
+        self._task = None
+
+    def ticket_locations(self, guild):
+        """Yield every channel or thread in the ticket categories (or the ticket thread parent)"""
+        if TICKET_MODE == "thread":
+            parent = guild.get_channel(TICKET_THREAD_CHANNEL)
+            for thread in parent.threads if parent else ():
+                if not thread.archived:
+                    yield thread
+            return
+        for category_id in self.bot.category_pool.channels:
+            category = guild.get_channel(category_id)
+            if category:
+                yield from category.text_channels
+
+    # Events
+
+    def channel_created(self, channel):
+        """Adopt ticket channels made outside open_ticket, the name lookup is off once synced"""
+        if channel.name.startswith("ticket-"):
+            self.bot.tickets.adopt(channel)
+
+    def channel_deleted(self, channel):
+        """A ticket channel was deleted (by us or by hand), forget it"""
+        record = self.bot.tickets.remove(channel.id)
+        self.bot.message_cache.drop(channel.id)
+        if record:
+            self.bot.assigner.closed(channel.id, record.claimer_id)
+            metrics.incr("tickets_removed_externally")
+            log.info("Ticket %s for %s removed outside ?close", channel.id, record.owner_id, extra={"event": "ticket_orphan_removed"})
+
+    async def thread_archived(self, thread):
+        """?close archives and locks a thread after dropping it from the registry, so a ticket that is
+        still registered was archived by Discord's inactivity timer (7 days at most) - reopen it"""
+        if thread.id not in self.bot.tickets or thread.locked:
+            self.channel_deleted(thread)
+            return
+        try:
+            await thread.edit(archived=False, reason="Ticket is still open")
+            metrics.incr("ticket_threads_unarchived")
+            log.info("Unarchived open ticket thread %s", thread.id, extra={"event": "ticket_thread_unarchived"})
+        except discord.HTTPException as e:
+            log.warning("Could not unarchive ticket thread %s: %s", thread.id, e, extra={"event": "ticket_thread_unarchive_failed"})
+            self.channel_deleted(thread)
+
+    def channel_updated(self, before, after):
+        """Follow renames: a ticket renamed away is forgotten, a channel renamed to ticket-<id> is adopted"""
+        if before.name == after.name:
+            return
+        was_ticket = after.id in self.bot.tickets
+        is_ticket = after.name.startswith("ticket-")
+        if was_ticket and not is_ticket:
+            self.channel_deleted(after)
+        elif is_ticket:
+            record = self.bot.tickets.get(after.id)
+            if record and after.name == f"ticket-{record.owner_id}":
+                return
+            # New or re-pointed at another user, re-read the owner from the name
+            claimer_id = record.claimer_id if record else None
+            self.bot.tickets.remove(after.id)
+            record = self.bot.tickets.adopt(after)
+            if record and claimer_id is not None:
+                self.bot.tickets.claim(after.id, claimer_id)
+
+    # Startup sweep
+
+    def sweep(self, guild):
+        """Diff stored ticket state against the ticket categories in one pass"""
+        tickets = self.bot.tickets
+        live = {}
+        owners = {}
+        duplicates = []
+        for channel in self.ticket_locations(guild):
+            if not channel.name.startswith("ticket-"):
+                continue
+            live[channel.id] = channel
+            try:
+                owner_id = int(channel.name.split("-")[1])
+            except (ValueError, IndexError):
+                continue
+            if owner_id in owners:
+                duplicates.append((owners[owner_id], channel))
+            else:
+                owners[owner_id] = channel
+
+        # Records whose channel is gone (a ticket moved out of the categories by hand still counts)
+        stale = [record for record in tickets
+                 if record.channel_id not in live and not guild.get_channel_or_thread(record.channel_id)]
+        for record in stale:
+            tickets.remove(record.channel_id)
+
+        # Channels the stored state doesn't know about
+        adopted = 0
+        for channel in live.values():
+            if channel.id not in tickets and tickets.adopt(channel):
+                adopted += 1
+
+        # Claims held by people who are no longer staff. Without a staff list to check against
+        # (role missing or members not cached) every claim would look stale, so leave them alone.
+        released = 0
+        if self.bot.staff.populated:
+            for record in tickets:
+                if record.claimer_id is not None and not is_staff_id(self.bot, record.claimer_id):
+                    tickets.unclaim(record.channel_id)
+                    released += 1
+        else:
+            log.warning("Staff list is empty, skipping the claim check", extra={"event": "reconcile_claims_skipped"})
+
+        # A second ticket for the same user needs staff to merge or close it
+        for first, second in duplicates:
+            older, newer = sorted((first, second), key=lambda c: c.created_at)
+            tickets.prefer(older.id)
+            self.repairs.append((f"flag duplicate {newer.id}", self._flag_duplicate, (newer, older)))
+
+        # Every ticket channel is in the registry now, find_ticket_channel can stop scanning by name
+        tickets.synced = True
+        self.last_sweep = time.time()
+        self.report = {
+            "checked": len(live),
+            "stale": len(stale),
+            "adopted": adopted,
+            "released": released,
+            "duplicates": len(duplicates),
+        }
+        log.info("Reconciled tickets: %s", self.report, extra={"event": "tickets_reconciled"})
+        if self.repairs and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run_repairs())
+        return self.report
+
+    async def _flag_duplicate(self, channel, original):
+        embed = discord.Embed(
+            title="⚠️ Duplicate Ticket",
+            description=f"This user already has a ticket open in {original.mention}. "
+                        f"New messages go there - close this one once it's been checked.",
+            color=0xffaa00
+        )
+        await channel.send(embed=embed)
+
+    async def _run_repairs(self):
+        """Work through the repair queue a batch at a time"""
+        while self.repairs:
+            for _ in range(min(self.batch_size, len(self.repairs))):
+                description, func, args = self.repairs.popleft()
+                try:
+                    await func(*args)
+                    metrics.incr("reconcile_repairs")
+                except discord.HTTPException as e:
+                    metrics.incr("reconcile_repairs_failed")
+                    log.warning("Reconcile repair failed (%s): %s", description, e, extra={"event": "reconcile_repair_failed"})
+            if self.repairs:
+                await asyncio.sleep(self.batch_interval)
+
+    def summary(self):
+        """Lines for ?repair"""
+        if self.last_sweep is None:
+            return ["No sweep has run yet"]
+        report = self.report
+        return [
+            f"**Last sweep:** <t:{int(self.last_sweep)}:R>",
+            f"**Channels checked:** {report['checked']}",
+            f"**Stale entries dropped:** {report['stale']}",
+            f"**Channels adopted:** {report['adopted']}",
+            f"**Claims released:** {report['released']}",
+            f"**Duplicates flagged:** {report['duplicates']}",
+            f"**Repairs pending:** {len(self.repairs)}",
+        ]
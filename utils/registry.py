@@ -0,0 +1,160 @@
+import time
+
+class TicketRecord:
+    """One open ticket - only what something reads, every slot costs 8 bytes per ticket"""
+    __slots__ = ("owner_id", "channel_id", "claimer_id", "created", "last_dm_id")
+
+    def __init__(self, owner_id, channel_id, claimer_id=None, created=None, last_dm_id=None):
+        self.owner_id = owner_id
+        self.channel_id = channel_id
+        self.claimer_id = claimer_id
+        self.created = created or time.time()
+        self.last_dm_id = last_dm_id  # newest DM forwarded into the ticket, where catch-up resumes
+
+    def to_row(self):
+        return [getattr(self, slot) for slot in self.__slots__]
+
+    @classmethod
+    def from_row(cls, row):
+        """Build from a stored row, including the older 8/9 column layout
+        (owner, channel, category, claimer, created, last activity, message counts, last DM)"""
+        if len(row) <= len(cls.__slots__):
+            return cls(*row)
+        return cls(row[0], row[1], row[3], row[4], row[8] if len(row) > 8 else None)
+
+class TicketRegistry:
+    """All open tickets, indexed by channel and owner, with running totals"""
+
+    def __init__(self):
+        self.by_channel = {}  # channel_id -> TicketRecord
+        self.by_owner = {}  # owner_id -> TicketRecord
+        self.by_claimer = {}  # claimer_id -> number of claimed tickets
+        self.claimed_count = 0
+        self.synced = False  # every ticket channel has been adopted, no need to look them up by name
+
+    def __len__(self):
+        return len(self.by_channel)
+
+    def __contains__(self, channel_id):
+        return channel_id in self.by_channel
+
+    def __iter__(self):
+        return iter(self.by_channel.values())
+
+    @property
+    def open_count(self):
+        return len(self.by_channel)
+
+    @property
+    def unclaimed_count(self):
+        return len(self.by_channel) - self.claimed_count
+
+    def get(self, channel_id):
+        return self.by_channel.get(channel_id)
+
+    def for_owner(self, owner_id):
+        return self.by_owner.get(owner_id)
+
+    def claims_of(self, staff_id):
+        """Number of tickets a staff member has claimed"""
+        return self.by_claimer.get(staff_id, 0)
+
+    def claimer_of(self, channel_id):
+        record = self.by_channel.get(channel_id)
+        return record.claimer_id if record else None
+
+    # Changes
+
+    def add(self, record):
+        """Register a record, replacing any older ticket for the same channel"""
+        self.remove(record.channel_id)
+        self.by_channel[record.channel_id] = record
+        self.by_owner[record.owner_id] = record
+        if record.claimer_id is not None:
+            self.by_claimer[record.claimer_id] = self.by_claimer.get(record.claimer_id, 0) + 1
+            self.claimed_count += 1
+        return record
+
+    def open(self, owner_id, channel):
+        return self.add(TicketRecord(owner_id, channel.id))
+
+    def adopt(self, channel):
+        """Register a ticket channel found by name (opened before the registry knew about it)"""
+        record = self.by_channel.get(channel.id)
+        if record:
+            return record
+        try:
+            owner_id = int(channel.name.split("-")[1])
+        except (ValueError, IndexError):
+            return None
+        return self.add(TicketRecord(owner_id, channel.id, created=channel.created_at.timestamp()))
+
+    def prefer(self, channel_id):
+        """Make this the ticket found for its owner when they have more than one"""
+        record = self.by_channel.get(channel_id)
+        if record:
+            self.by_owner[record.owner_id] = record
+
+    def remove(self, channel_id):
+        """Forget a ticket and return its record, or None"""
+        record = self.by_channel.pop(channel_id, None)
+        if not record:
+            return None
+        if self.by_owner.get(record.owner_id) is record:
+            del self.by_owner[record.owner_id]
+        # The returned record keeps its claimer so callers can see who had it
+        claimer_id = record.claimer_id
+        self._drop_claim(record)
+        record.claimer_id = claimer_id
+        return record
+
+    def claim(self, channel_id, staff_id):
+        record = self.by_channel[channel_id]
+        self._drop_claim(record)
+        record.claimer_id = staff_id
+        self.by_claimer[staff_id] = self.by_claimer.get(staff_id, 0) + 1
+        self.claimed_count += 1
+        return record
+
+    def unclaim(self, channel_id):
+        """Release a claim and return the previous claimer id"""
+        record = self.by_channel.get(channel_id)
+        if not record:
+            return None
+        claimer_id = record.claimer_id
+        self._drop_claim(record)
+        return claimer_id
+
+    def touch(self, channel_id, dm_id):
+        """Move the catch-up cursor past a DM forwarded into the ticket"""
+        record = self.by_channel.get(channel_id)
+        if record and (record.last_dm_id is None or dm_id > record.last_dm_id):
+            record.last_dm_id = dm_id
+
+    def _drop_claim(self, record):
+        if record.claimer_id is None:
+            return
+        claims = self.by_claimer.get(record.claimer_id, 0) - 1
+        if claims > 0:
+            self.by_claimer[record.claimer_id] = claims
+        else:
+            self.by_claimer.pop(record.claimer_id, None)
+        record.claimer_id = None
+        self.claimed_count -= 1
+
+    # Startup and persistence
+
+    def dump(self):
+        return [record.to_row() for record in self.by_channel.values()]
+
+    def load(self, store):
+        """Restore from the store, migrating the old active/claimed ticket dicts if needed"""
+        rows = store.get('tickets')
+        if rows is not None:
+            for row in rows:
+                self.add(TicketRecord.from_row(row))
+            return
+
+        claimed = {int(k): v for k, v in store.get('claimed_tickets', {}).items()}
+        for owner_id, channel_id in store.get('active_tickets', {}).items():
+            self.add(TicketRecord(int(owner_id), channel_id, claimer_id=claimed.get(channel_id)))
@@ -0,0 +1,24 @@
+import asyncio
+import logging
+import discord
+from config import RUNTIME_PROFILE
+
+log = logging.getLogger(__name__)
+
+def apply_profile(profile=RUNTIME_PROFILE):
+    """Set up the event loop for the chosen profile (call before the loop starts).
+
+    "performance" swaps in uvloop when it's installed. orjson is not part of the profile:
+    discord.py decodes with it in every profile whenever it can import it
+    (pip install "discord.py[speed]"), so it is only reported here.
+    """
+    features = {"profile": profile, "uvloop": False, "orjson": discord.utils.HAS_ORJSON}
+    if profile == "performance":
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            features["uvloop"] = True
+        except ImportError:
+            log.warning("Performance profile requested but uvloop is not installed", extra={"event": "uvloop_missing"})
+    log.info("Runtime profile %s", features, extra={"event": "runtime_profile"})
+    return features
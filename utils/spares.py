@@ -0,0 +1,135 @@
+import discord
+import logging
+import asyncio
+from collections import deque
+from config import TICKET_MODE, SPARE_POOL_SIZE, SPARE_REFILL_INTERVAL, SPARE_CHANNEL_PREFIX
+from utils import metrics
+from utils.tickets import ticket_overwrites
+
+log = logging.getLogger(__name__)
+
+def spare_index(name):
+    """Numeric suffix of a spare channel name, 0 if it has none"""
+    suffix = name[len(SPARE_CHANNEL_PREFIX):]
+    return int(suffix) if suffix.isdigit() else 0
+
+class SpareChannelPool:
+    """Keeps hidden, pre-created ticket channels ready so a new ticket skips the create round-trip"""
+
+    def __init__(self, bot, size=SPARE_POOL_SIZE, refill_interval=SPARE_REFILL_INTERVAL):
+        self.bot = bot
+        self.size = size if TICKET_MODE == "channel" else 0
+        self.refill_interval = refill_interval
+        self.spares = deque()  # channel ids ready to hand out
+        self._wake = asyncio.Event()
+        self._task = None
+        self._counter = 0
+
+    @property
+    def enabled(self):
+        return self.size > 0
+
+    async def reconcile(self, guild):
+        """Adopt spare channels left over from the last run, trim extras and start refilling"""
+        if not self.enabled:
+            return
+
+        self.spares.clear()
+        self._counter = 0
+        for category_id in self.bot.category_pool.channels:
+            category = guild.get_channel(category_id)
+            if not category:
+                continue
+            for channel in category.text_channels:
+                if not channel.name.startswith(SPARE_CHANNEL_PREFIX):
+                    continue
+                # New spares are numbered after every existing one, a restart must not reuse a name
+                self._counter = max(self._counter, spare_index(channel.name))
+                if channel.id in self.bot.tickets or channel.last_message_id is not None:
+                    # Handed to a user but never renamed - it holds a conversation, so it must not be reused
+                    log.warning("Spare channel %s has ticket history, not reusing it", channel.name, extra={"event": "spare_in_use"})
+                    continue
+                self.spares.append(channel.id)
+
+        while len(self.spares) > self.size:
+            channel = guild.get_channel(self.spares.pop())
+            if channel:
+                try:
+                    await channel.delete(reason="Trimming spare ticket channel pool")
+                except discord.HTTPException as e:
+                    log.warning("Failed to delete extra spare channel %s: %s", channel.name, e, extra={"event": "spare_trim_failed"})
+
+        log.info("Spare ticket pool reconciled with %d/%d channels", len(self.spares), self.size, extra={"event": "spare_pool_reconciled"})
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refill_loop(guild))
+        self._wake.set()
+
+    def take(self, guild):
+        """Pop a ready spare channel, or None if the pool is empty"""
+        if not self.enabled:
+            return None
+
+        while self.spares:
+            channel = guild.get_channel(self.spares.popleft())
+            if channel:
+                metrics.incr("spare_pool_hits")
+                self._wake.set()
+                return channel
+
+        metrics.incr("spare_pool_misses")
+        self._wake.set()
+        return None
+
+    async def activate(self, channel, name, overwrites):
+        """Rename a taken spare and open it to staff, returning False if that failed"""
+        try:
+            await channel.edit(name=name, overwrites=overwrites, reason="Spare channel assigned to ticket")
+            return True
+        except discord.HTTPException as e:
+            metrics.incr("spare_activate_failed")
+            log.error("Failed to activate spare channel %s as %s: %s", channel.id, name, e, extra={"event": "spare_activate_failed"})
+            # Nothing was posted in it yet, get rid of it rather than leave a hidden channel behind
+            try:
+                await channel.delete(reason="Spare channel could not be activated")
+            except discord.HTTPException:
+                pass
+            return False
+
+    async def _refill_loop(self, guild):
+        """Top the pool back up, creating at most one channel per refill interval"""
+        while not self.bot.is_closed():
+            await self._wake.wait()
+            self._wake.clear()
+
+            while len(self.spares) < self.size:
+                if not await self._create_spare(guild):
+                    break
+                await asyncio.sleep(self.refill_interval)
+
+    async def _create_spare(self, guild):
+        overwrites = ticket_overwrites(self.bot, guild, staff_visible=False)
+        if overwrites is None:
+            return False
+
+        category = await self.bot.category_pool.acquire(guild)
+        if not category:
+            return False
+
+        self._counter += 1
+        try:
+            channel = await guild.create_text_channel(
+                name=f"{SPARE_CHANNEL_PREFIX}{self._counter}",
+                category=category,
+                overwrites=overwrites,
+                reason="Pre-warming spare ticket channel"
+            )
+        except discord.HTTPException as e:
+            self.bot.category_pool.release(category.id)
+            log.error("Failed to create spare ticket channel: %s", e, extra={"event": "spare_create_failed"})
+            return False
+
+        self.bot.category_pool.release(category.id, channel)
+        self.spares.append(channel.id)
+        metrics.incr("spare_pool_created")
+        return True
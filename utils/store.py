@@ -0,0 +1,201 @@
+import json
+import os
+import sqlite3
+import time
+from config import STORE_PATH
+
+class Store:
+    """Small SQLite-backed store for state that has to survive restarts"""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS kv (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS message_map (
+                dm_id INTEGER PRIMARY KEY,
+                channel_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS dm_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                dedup_key TEXT UNIQUE,
+                user_id INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS dm_outbox_next ON dm_outbox (next_attempt);
+            CREATE TABLE IF NOT EXISTS blocked_users (
+                user_id INTEGER PRIMARY KEY,
+                expires REAL,
+                reason TEXT,
+                blocked_by INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS user_history (
+                user_id INTEGER PRIMARY KEY,
+                tickets INTEGER NOT NULL,
+                total_resolution REAL NOT NULL,
+                last_channel_id INTEGER NOT NULL,
+                last_closed REAL NOT NULL,
+                last_reason TEXT,
+                last_closer INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                expires REAL NOT NULL
+            );
+        """)
+
+    # Key/value state
+
+    def get(self, key, default=None):
+        row = self.db.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key, value):
+        self.db.execute(
+            "INSERT INTO kv (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value))
+        )
+
+    # Resumable jobs
+
+    def add_job(self, kind, payload):
+        """Record a unit of work that must be finished even across a restart"""
+        cursor = self.db.execute(
+            "INSERT INTO jobs (kind, payload, created) VALUES (?, ?, ?)",
+            (kind, json.dumps(payload), time.time())
+        )
+        return cursor.lastrowid
+
+    def update_job(self, job_id, payload):
+        self.db.execute("UPDATE jobs SET payload = ? WHERE id = ?", (json.dumps(payload), job_id))
+
+    def finish_job(self, job_id):
+        self.db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def pending_jobs(self, kind=None):
+        """Return (id, kind, payload) for unfinished jobs, oldest first"""
+        if kind:
+            rows = self.db.execute("SELECT id, kind, payload FROM jobs WHERE kind = ? ORDER BY id", (kind,))
+        else:
+            rows = self.db.execute("SELECT id, kind, payload FROM jobs ORDER BY id")
+        return [(job_id, job_kind, json.loads(payload)) for job_id, job_kind, payload in rows]
+
+    # DM message -> forwarded ticket message entries spilled out of memory
+
+    def spill_message_map(self, rows, min_dm_id=0):
+        """Append (dm_id, channel_id, message_id) rows and drop entries older than min_dm_id"""
+        self.db.executemany("INSERT OR REPLACE INTO message_map VALUES (?, ?, ?)", rows)
+        if min_dm_id:
+            self.db.execute("DELETE FROM message_map WHERE dm_id < ?", (min_dm_id,))
+
+    def lookup_message_map(self, dm_id):
+        return self.db.execute(
+            "SELECT channel_id, message_id FROM message_map WHERE dm_id = ?", (dm_id,)
+        ).fetchone()
+
+    # Outbound DMs waiting for a retry
+
+    def add_outbox(self, dedup_key, user_id, payload, attempts, next_attempt):
+        """Queue a DM, returning its id or None if the dedup key is already queued"""
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO dm_outbox (dedup_key, user_id, payload, attempts, next_attempt) VALUES (?, ?, ?, ?, ?)",
+            (dedup_key, user_id, json.dumps(payload), attempts, next_attempt)
+        )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def get_outbox(self, outbox_id):
+        row = self.db.execute(
+            "SELECT id, user_id, payload, attempts FROM dm_outbox WHERE id = ?", (outbox_id,)
+        ).fetchone()
+        return (row[0], row[1], json.loads(row[2]), row[3]) if row else None
+
+    def reschedule_outbox(self, outbox_id, attempts, next_attempt):
+        self.db.execute(
+            "UPDATE dm_outbox SET attempts = ?, next_attempt = ? WHERE id = ?", (attempts, next_attempt, outbox_id)
+        )
+
+    def remove_outbox(self, outbox_id):
+        self.db.execute("DELETE FROM dm_outbox WHERE id = ?", (outbox_id,))
+
+    def due_outbox(self, limit):
+        """Return (next_attempt, id) for the `limit` soonest queued DMs"""
+        return self.db.execute(
+            "SELECT next_attempt, id FROM dm_outbox ORDER BY next_attempt LIMIT ?", (limit,)
+        ).fetchall()
+
+    # Blocked users
+
+    def add_block(self, user_id, expires, reason, blocked_by):
+        self.db.execute(
+            "INSERT OR REPLACE INTO blocked_users VALUES (?, ?, ?, ?)", (user_id, expires, reason, blocked_by)
+        )
+
+    def remove_block(self, user_id):
+        self.db.execute("DELETE FROM blocked_users WHERE user_id = ?", (user_id,))
+
+    def all_blocks(self):
+        """Return (user_id, expires, reason, blocked_by) for every block"""
+        return self.db.execute("SELECT user_id, expires, reason, blocked_by FROM blocked_users").fetchall()
+
+    # Per-user ticket history, updated on every close
+
+    def record_close(self, user_id, channel_id, opened, closed, reason, closer_id):
+        """Fold one closed ticket into the user's summary (a repeated close of the same channel is ignored)"""
+        self.db.execute(
+            "INSERT INTO user_history VALUES (?, 1, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET tickets = tickets + 1, "
+            "total_resolution = total_resolution + excluded.total_resolution, "
+            "last_channel_id = excluded.last_channel_id, last_closed = excluded.last_closed, "
+            "last_reason = excluded.last_reason, last_closer = excluded.last_closer "
+            "WHERE user_history.last_channel_id != excluded.last_channel_id",
+            (user_id, max(closed - opened, 0), channel_id, closed, reason, closer_id)
+        )
+
+    def user_history(self, user_id):
+        """Return (tickets, total_resolution, last_closed, last_reason, last_closer) or None"""
+        return self.db.execute(
+            "SELECT tickets, total_resolution, last_closed, last_reason, last_closer FROM user_history WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+
+    # Leader lease shared by the active and standby processes
+
+    def acquire_lease(self, name, holder, ttl):
+        """Take or renew a lease, returning True if `holder` has it for the next `ttl` seconds"""
+        now = time.time()
+        self.db.execute(
+            "INSERT INTO leases (name, holder, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires = excluded.expires "
+            "WHERE leases.holder = excluded.holder OR leases.expires < ?",
+            (name, holder, now + ttl, now)
+        )
+        return self.lease_holder(name) == holder
+
+    def release_lease(self, name, holder):
+        self.db.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+
+    def lease_holder(self, name):
+        row = self.db.execute("SELECT holder FROM leases WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,142 @@
+import discord
+import logging
+from config import STAFF_ROLE, TICKET_MODE, TICKET_THREAD_CHANNEL
+
+log = logging.getLogger(__name__)
+
+def ticket_name(user_id):
+    """Name used for a user's ticket channel or thread"""
+    return f"ticket-{user_id}"
+
+def find_ticket_channel(bot, guild, user_id):
+    """Return the open ticket channel or thread for a user, if any"""
+    # Fast path: the ticket we opened ourselves
+    record = bot.tickets.for_owner(user_id)
+    if record:
+        channel = guild.get_channel_or_thread(record.channel_id)
+        if channel:
+            return channel
+        bot.tickets.remove(record.channel_id)  # deleted while we weren't looking
+
+    # Once the startup sweep has run the registry knows every ticket
+    if bot.tickets.synced:
+        return None
+
+    # Fall back to a name lookup (tickets opened before a restart)
+    name = ticket_name(user_id)
+    candidates = guild.threads if TICKET_MODE == "thread" else guild.text_channels
+    for channel in candidates:
+        if channel.name == name and not getattr(channel, "archived", False):
+            bot.tickets.adopt(channel)
+            return channel
+    return None
+
+async def open_ticket(bot, guild, user):
+    """Open a ticket for a user with the configured backend"""
+    if TICKET_MODE == "thread":
+        return await create_ticket_thread(bot, guild, user)
+    return await create_ticket_channel(bot, guild, user)
+
+def ticket_overwrites(bot, guild, staff_visible=True):
+    """Build the permission overwrites for a ticket channel"""
+    staff_role = guild.get_role(STAFF_ROLE)
+    if not staff_role:
+        log.error("Could not find staff role with ID %s", STAFF_ROLE, extra={"event": "staff_role_missing"})
+        return None
+
+    # Get the specific user to add to all tickets
+    auto_add_user_id = bot.special_user_id
+    auto_add_user = guild.get_member(auto_add_user_id)
+
+    # Create ticket channel with permission overwrites
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(read_messages=False),
+        guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+    }
+    if staff_visible:
+        overwrites[staff_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+
+        # Add the specific user to the ticket permissions if they exist in the guild
+        if auto_add_user:
+            overwrites[auto_add_user] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+            log.debug("Added user %s to ticket permissions", auto_add_user, extra={"event": "ticket_permissions"})
+        else:
+            log.warning("User with ID %s not found in guild, but ticket will still be created", auto_add_user_id, extra={"event": "auto_add_user_missing"})
+
+    return overwrites
+
+async def create_ticket_channel(bot, guild, user):
+    """Create a text channel for the ticket in the least-full ticket category"""
+    overwrites = ticket_overwrites(bot, guild)
+    if overwrites is None:
+        return None
+
+    # Hand out a pre-warmed spare channel if one is ready, a spare that can't be opened up falls back to a new channel
+    spare = bot.spare_pool.take(guild)
+    if spare and await bot.spare_pool.activate(spare, ticket_name(user.id), overwrites):
+        return spare
+
+    # Pick the least-full ticket category (creates an overflow one if all are full)
+    category = await bot.category_pool.acquire(guild)
+    if not category:
+        log.error("No ticket category available, all categories are full", extra={"event": "categories_full"})
+        return None
+
+    try:
+        ticket_channel = await guild.create_text_channel(
+            name=ticket_name(user.id),
+            category=category,
+            overwrites=overwrites
+        )
+    except discord.HTTPException as e:
+        bot.category_pool.release(category.id)
+        log.error("Failed to create ticket channel: %s", e, extra={"event": "ticket_create_failed"})
+        return None
+
+    bot.category_pool.release(category.id, ticket_channel)
+    return ticket_channel
+
+async def create_ticket_thread(bot, guild, user):
+    """Open a private thread for the ticket under the staff channel"""
+    parent = guild.get_channel(TICKET_THREAD_CHANNEL) if TICKET_THREAD_CHANNEL else None
+    if not isinstance(parent, discord.TextChannel):
+        log.error("Could not find ticket thread channel with ID %s", TICKET_THREAD_CHANNEL, extra={"event": "thread_parent_missing"})
+        return None
+
+    try:
+        thread = await parent.create_thread(
+            name=ticket_name(user.id),
+            type=discord.ChannelType.private_thread,
+            invitable=False,
+            auto_archive_duration=10080
+        )
+    except discord.HTTPException as e:
+        log.error("Failed to create ticket thread: %s", e, extra={"event": "ticket_create_failed"})
+        return None
+
+    # Add the specific user to every ticket thread
+    auto_add_user = guild.get_member(bot.special_user_id)
+    if auto_add_user:
+        try:
+            await thread.add_user(auto_add_user)
+        except discord.HTTPException as e:
+            log.warning("Could not add %s to ticket thread: %s", auto_add_user, e, extra={"event": "thread_add_user_failed"})
+
+    return thread
+
+async def add_ticket_member(channel, member):
+    """Make sure a member is in a ticket thread - private threads can't be opened to a role, so
+    claimers are added one by one (ticket channels already let the staff role in)"""
+    if not isinstance(channel, discord.Thread):
+        return
+    try:
+        await channel.add_user(member)
+    except discord.HTTPException as e:
+        log.warning("Could not add %s to ticket thread %s: %s", member, channel.id, e, extra={"event": "thread_add_user_failed"})
+
+async def delete_ticket(channel, reason=None):
+    """Remove a closed ticket - threads are archived and locked, channels are deleted"""
+    if isinstance(channel, discord.Thread):
+        await channel.edit(archived=True, locked=True, reason=reason)
+    else:
+        await channel.delete(reason=reason)
@@ -0,0 +1,132 @@
+import discord
+import asyncio
+import io
+import logging
+from config import (
+    TRANSCRIPT_CHANNEL, TRANSCRIPT_BATCH_WINDOW, TRANSCRIPT_BATCH_MAX_FILES, TRANSCRIPT_BATCH_MAX_BYTES,
+    MODMAIL_EMBED_COLOR
+)
+from utils import metrics
+
+log = logging.getLogger(__name__)
+
+def file_size(file):
+    """Size of a discord.File's buffer without consuming it"""
+    fp = file.fp
+    position = fp.tell()
+    size = fp.seek(0, io.SEEK_END)
+    fp.seek(position)
+    return size
+
+class TranscriptBatcher:
+    """Groups transcript uploads from concurrent closes into as few messages as possible.
+
+    A transcript that arrives while nothing is pending or uploading is sent straight away.
+    Anything arriving during an upload waits up to TRANSCRIPT_BATCH_WINDOW seconds and goes
+    out with the others as one message: a combined summary embed plus up to 10 files, kept
+    under TRANSCRIPT_BATCH_MAX_BYTES. If a combined upload fails, each transcript is retried
+    on its own so one bad request can't take the rest of the batch with it.
+    """
+
+    def __init__(self, bot, window=TRANSCRIPT_BATCH_WINDOW, max_files=TRANSCRIPT_BATCH_MAX_FILES,
+                 max_bytes=TRANSCRIPT_BATCH_MAX_BYTES):
+        self.bot = bot
+        self.window = window
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.pending = []  # (embed, files, summary, future)
+        self.pending_files = 0
+        self.pending_bytes = 0
+        self.sending = 0  # uploads in flight
+        self._timer = None
+
+    def submit(self, embed, files, summary):
+        """Queue a transcript for upload without waiting. Returns a future that resolves once it is posted."""
+        future = asyncio.get_running_loop().create_future()
+        self.bot.work.begin()
+
+        size = sum(file_size(file) for file in files)
+        if self.pending_files + len(files) > self.max_files or self.pending_bytes + size > self.max_bytes:
+            self._flush()
+
+        self.pending.append((embed, files, summary, future))
+        self.pending_files += len(files)
+        self.pending_bytes += size
+
+        if not self.sending and len(self.pending) == 1:
+            # Quiet channel - upload immediately
+            self._flush()
+        elif self.pending_files >= self.max_files or self.pending_bytes >= self.max_bytes:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.pending:
+            return
+        batch, self.pending, self.pending_files, self.pending_bytes = self.pending, [], 0, 0
+        self.sending += 1
+        asyncio.create_task(self._send(batch))
+
+    async def _send(self, batch):
+        try:
+            channel = self.bot.get_channel(TRANSCRIPT_CHANNEL)
+            if channel is None:
+                raise RuntimeError("transcript channel not found")
+            if len(batch) == 1:
+                await self._upload(channel, batch)
+                return
+            embed = discord.Embed(
+                title=f"📄 Ticket Transcripts ({len(batch)})",
+                description="\n".join(summary for _, _, summary, _ in batch)[:4000],
+                color=MODMAIL_EMBED_COLOR,
+                timestamp=discord.utils.utcnow()
+            )
+            files = [file for _, item_files, _, _ in batch for file in item_files]
+            try:
+                await channel.send(embed=embed, files=files)
+            except discord.HTTPException as e:
+                log.warning("Combined upload of %d transcripts failed (%s), sending them one by one", len(batch), e,
+                            extra={"event": "transcript_batch_split"})
+                metrics.incr("transcript_batches_split")
+                for item in batch:
+                    for file in item[1]:
+                        file.reset()
+                    await self._upload(channel, [item])
+                return
+            metrics.incr("transcript_uploads")
+            metrics.incr("transcripts_uploaded", len(batch))
+            self._resolve(batch)
+        except Exception as e:
+            log.exception("Failed to upload %d transcripts: %s", len(batch), e, extra={"event": "transcript_upload_failed"})
+            self._resolve(batch, e)
+        finally:
+            self.sending -= 1
+            for _ in batch:
+                self.bot.work.end()
+
+    async def _upload(self, channel, batch):
+        """Post a single transcript with its own embed"""
+        embed, files, _, _ = batch[0]
+        try:
+            await channel.send(embed=embed, files=files)
+        except Exception as e:
+            log.exception("Failed to upload transcript: %s", e, extra={"event": "transcript_upload_failed"})
+            self._resolve(batch, e)
+            return
+        metrics.incr("transcript_uploads")
+        metrics.incr("transcripts_uploaded")
+        self._resolve(batch)
+
+    def _resolve(self, batch, error=None):
+        for _, _, _, future in batch:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(True)
+            else:
+                future.set_exception(error)
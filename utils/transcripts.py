@@ -0,0 +1,164 @@
+import asyncio
+import html
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from config import TRANSCRIPT_WORKERS
+
+HEADER = "Generated by SereneEnterprise, all rights reserved (c) (Taken from London Network)"
+
+_pool = None
+
+def get_pool():
+    """Lazily start the rendering process pool"""
+    global _pool
+    if _pool is None:
+        # spawn keeps the workers clear of the bot's threads and sockets
+        _pool = ProcessPoolExecutor(max_workers=TRANSCRIPT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def collect_records(channel, messages=None):
+    """Read the channel history into plain, picklable dicts (runs on the event loop, no formatting)
+
+    messages is the full history from the ticket cache, if it has it; otherwise it is fetched.
+    """
+    if messages is None:
+        messages = [message async for message in channel.history(limit=None, oldest_first=True)]
+    return [message_record(message) for message in messages]
+
+def message_record(message):
+    """Plain, picklable copy of one message for the renderers"""
+    return {
+        "timestamp": message.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "author": str(message.author),
+        "avatar": message.author.display_avatar.url,
+        "content": message.content,
+        "embeds": [
+            {
+                "author": embed.author.name if embed.author else None,
+                "author_icon": embed.author.icon_url if embed.author else None,
+                "title": embed.title,
+                "description": embed.description,
+                "color": embed.color.value if embed.color else None,
+                "fields": [(field.name, field.value) for field in embed.fields],
+            }
+            for embed in message.embeds
+        ],
+        "attachments": [
+            {
+                "filename": attachment.filename,
+                "url": attachment.url,
+                "content_type": attachment.content_type or "",
+            }
+            for attachment in message.attachments
+        ],
+    }
+
+def render_text(channel_name, generated_at, records):
+    """Plain-text transcript, same layout the bot has always produced"""
+    parts = [
+        f"Transcript for {channel_name}\nGenerated at: {generated_at}\n{HEADER}\n",
+        "=" * 50 + "\n\n",
+    ]
+    for record in records:
+        timestamp = record["timestamp"]
+        if record["embeds"] and not record["content"]:
+            # Handle embed messages
+            for embed in record["embeds"]:
+                author = embed["author"] or record["author"]
+                parts.append(f"[{timestamp}] {author}: {embed['description']}\n")
+        else:
+            parts.append(f"[{timestamp}] {record['author']}: {record['content']}\n")
+
+        # Add attachments info
+        for attachment in record["attachments"]:
+            parts.append(f"    📎 Attachment: {attachment['filename']} ({attachment['url']})\n")
+
+        parts.append("\n")
+    return "".join(parts)
+
+HTML_STYLE = """
+body { background: #313338; color: #dbdee1; font-family: "gg sans", "Helvetica Neue", Arial, sans-serif; margin: 0; }
+header { padding: 16px 24px; border-bottom: 1px solid #1e1f22; }
+header h1 { margin: 0 0 4px; font-size: 20px; color: #f2f3f5; }
+header p { margin: 0; font-size: 12px; color: #949ba4; }
+.message { display: flex; gap: 12px; padding: 8px 24px; }
+.message:hover { background: #2e3035; }
+.avatar { width: 40px; height: 40px; border-radius: 50%; flex-shrink: 0; }
+.author { font-weight: 600; color: #f2f3f5; }
+.time { font-size: 12px; color: #949ba4; margin-left: 6px; }
+.content { white-space: pre-wrap; word-wrap: break-word; margin-top: 2px; }
+.embed { border-left: 4px solid #1e1f22; background: #2b2d31; border-radius: 4px; padding: 8px 12px; margin-top: 6px; max-width: 520px; }
+.embed-author { display: flex; align-items: center; gap: 8px; font-size: 13px; font-weight: 600; }
+.embed-author img { width: 24px; height: 24px; border-radius: 50%; }
+.embed-title { font-weight: 600; margin-top: 4px; }
+.embed-description { white-space: pre-wrap; margin-top: 4px; font-size: 14px; }
+.embed-field { margin-top: 6px; font-size: 14px; }
+.embed-field b { display: block; font-size: 13px; }
+.attachment { margin-top: 6px; }
+.attachment img { max-width: 400px; max-height: 300px; border-radius: 4px; display: block; }
+a { color: #00a8fc; }
+"""
+
+def _render_embed_html(embed):
+    style = f' style="border-left-color: #{embed["color"]:06x}"' if embed["color"] is not None else ""
+    parts = [f'<div class="embed"{style}>']
+    if embed["author"]:
+        icon = f'<img src="{html.escape(embed["author_icon"])}" alt="">' if embed["author_icon"] else ""
+        parts.append(f'<div class="embed-author">{icon}{html.escape(embed["author"])}</div>')
+    if embed["title"]:
+        parts.append(f'<div class="embed-title">{html.escape(embed["title"])}</div>')
+    if embed["description"]:
+        parts.append(f'<div class="embed-description">{html.escape(embed["description"])}</div>')
+    for name, value in embed["fields"]:
+        parts.append(f'<div class="embed-field"><b>{html.escape(str(name))}</b>{html.escape(str(value))}</div>')
+    parts.append("</div>")
+    return "".join(parts)
+
+def _render_attachment_html(attachment):
+    url = html.escape(attachment["url"])
+    name = html.escape(attachment["filename"])
+    if attachment["content_type"].startswith("image/"):
+        return f'<div class="attachment"><a href="{url}"><img src="{url}" alt="{name}"></a></div>'
+    return f'<div class="attachment">📎 <a href="{url}">{name}</a></div>'
+
+def render_html(channel_name, generated_at, records):
+    """Self-contained HTML transcript with avatars, embeds and attachment previews"""
+    title = html.escape(f"Transcript for {channel_name}")
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">",
+        f"<title>{title}</title><style>{HTML_STYLE}</style></head><body>",
+        f"<header><h1>{title}</h1><p>Generated at: {html.escape(generated_at)}</p><p>{html.escape(HEADER)}</p></header>",
+    ]
+    for record in records:
+        parts.append('<div class="message">')
+        parts.append(f'<img class="avatar" src="{html.escape(record["avatar"])}" alt="">')
+        parts.append("<div>")
+        parts.append(
+            f'<span class="author">{html.escape(record["author"])}</span>'
+            f'<span class="time">{html.escape(record["timestamp"])}</span>'
+        )
+        if record["content"]:
+            parts.append(f'<div class="content">{html.escape(record["content"])}</div>')
+        for embed in record["embeds"]:
+            parts.append(_render_embed_html(embed))
+        for attachment in record["attachments"]:
+            parts.append(_render_attachment_html(attachment))
+        parts.append("</div></div>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+RENDERERS = {
+    "txt": render_text,
+    "html": render_html,
+}
+
+async def render(fmt, channel_name, generated_at, records):
+    """Render a transcript in the process pool so large closes don't stall the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), RENDERERS[fmt], channel_name, generated_at, records)